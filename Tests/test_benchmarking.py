@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import numpy as np
+import numpy.testing as npt
+import pandas as pd
+from lightgbm import LGBMClassifier
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from lib.benchmarking import benchmark_pipeline, matrix_nbytes
+
+
+def test_matrix_nbytes() -> None:  # noqa: D103
+    matrix = np.eye(4)
+    npt.assert_equal(matrix_nbytes(matrix), 128)
+    npt.assert_equal(matrix_nbytes(sparse.csr_matrix(matrix)), 4 * 8 + 4 * 4 + 5 * 4)
+
+
+def test_benchmark_pipeline() -> None:  # noqa: D103
+    rng = np.random.default_rng(0)
+    x = pd.DataFrame({"Gender": rng.choice(["Male", "Female"], 400), "Age": rng.integers(18, 80, 400)})
+    y = ((x["Age"] > 40) ^ (x["Gender"] == "Male")).astype(int)
+    preprocessor = ColumnTransformer([("cat", OneHotEncoder(), ["Gender"])], remainder="passthrough")
+    pipeline = Pipeline([("preprocessor", preprocessor), ("model", LGBMClassifier(n_estimators=10, verbose=-1))])
+
+    results = benchmark_pipeline(pipeline, x.iloc[:300], y.iloc[:300], x.iloc[300:], y.iloc[300:])
+
+    npt.assert_equal(results["n_features"], 3)
+    npt.assert_equal(results["densified_mb"], 100 * 3 * 8 / 1024**2)
+    npt.assert_(results["fit_peak_memory_mb"] > 0)
+    npt.assert_(results["roc_auc"] > 0.9)
@@ -0,0 +1,55 @@
+import os
+import sys
+import warnings
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import numpy as np
+import numpy.testing as npt
+import pandas as pd
+from scipy import sparse
+
+from lib.cross_validation import calculate_fold_metrics, cross_validate, make_folds
+
+
+@pytest.fixture
+def training_data() -> tuple[pd.DataFrame, pd.Series]:  # noqa: D103
+    rng = np.random.default_rng(0)
+    x = pd.DataFrame({"CalYear": rng.choice([2009, 2010, 2011], 600), "Age": rng.integers(18, 80, 600)})
+    y = pd.Series((x["Age"] + rng.normal(0, 10, 600) > 50).astype(int))
+    return x, y
+
+
+def test_make_folds_time(training_data: tuple[pd.DataFrame, pd.Series]) -> None:  # noqa: D103
+    x, y = training_data
+    folds = make_folds(x, y, "time", n_splits=2)
+    npt.assert_equal(len(folds), 2)
+    for (train_rows, valid_rows), year in zip(folds, [2010, 2011], strict=True):
+        npt.assert_array_equal(x["CalYear"].iloc[valid_rows].unique(), [year])
+        npt.assert_array_less(x["CalYear"].iloc[train_rows], year)
+    with pytest.raises(ValueError):
+        make_folds(x, y, "time", n_splits=3)
+
+
+@pytest.mark.parametrize("to_matrix", [np.asarray, sparse.csr_matrix])
+def test_cross_validate(training_data: tuple[pd.DataFrame, pd.Series], to_matrix: callable) -> None:  # noqa: D103
+    x, y = training_data
+    folds = make_folds(x, y, "stratified", n_splits=3)
+    params = {"objective": "binary", "verbose": -1, "num_iterations": 10}
+
+    fold_metrics, oof_predictions = cross_validate(to_matrix(x.to_numpy(dtype=float)), y, folds, params, n_workers=2)
+
+    npt.assert_array_equal(fold_metrics.columns, ["accuracy", "precision", "recall", "f1", "roc_auc"])
+    npt.assert_equal(len(fold_metrics), 3)
+    npt.assert_array_less(0.7, fold_metrics["roc_auc"])
+    npt.assert_equal(np.isnan(oof_predictions).sum(), 0)
+
+
+def test_calculate_fold_metrics_without_positives() -> None:  # noqa: D103
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        metrics = calculate_fold_metrics(np.array([0, 0, 0, 0]), np.array([0.1, 0.2, 0.3, 0.4]))
+    npt.assert_equal([metrics["precision"], metrics["recall"], metrics["f1"]], [0.0, 0.0, 0.0])
+    npt.assert_array_equal(["ROC AUC" in str(warning.message) for warning in caught], [True])
@@ -0,0 +1,66 @@
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import pandas as pd
+import pandas.testing as pdt
+
+from lib import data_cache
+from lib.data_cache import load_preprocessed_data
+
+COLUMNS_TO_DROP = ["Numtppd", "Numtpbi", "Indtppd", "Indtpbi"]
+
+
+@pytest.fixture
+def csv_path(tmp_path: str) -> str:  # noqa: D103
+    df = pd.DataFrame(
+        {
+            "PolNum": [200114978, 200114994, 200115241],
+            "CalYear": [2009, 2009, 2010],
+            "Gender": ["Male", "Female", "Male"],
+            "Type": ["C", "E", "A"],
+            "Category": ["Large", "Medium", "Small"],
+            "Age": [42, 35, 60],
+            "Group1": [18, 11, 5],
+            "Bonus": [-30, 0, 50],
+            "Poldur": [15, 2, 0],
+            "Value": [15080.0, 22522.0, 9000.0],
+            "Adind": [0, 1, 1],
+            "SubGroup2": ["L46", "L112", "L46"],
+            "Density": [72.01, 39.47, 150.3],
+            "Numtppd": [0, 1, 2],
+            "Numtpbi": [0, 0, 1],
+            "Indtppd": [0.0, 210.5, 84.2],
+            "Indtpbi": [0.0, 0.0, 1055.0],
+        }
+    )
+    path = os.path.join(tmp_path, "data.csv")
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_load_preprocessed_data(csv_path: str, tmp_path: str) -> None:  # noqa: D103
+    cache_dir = os.path.join(tmp_path, "cache")
+    x_miss, y_miss, fingerprint_miss, metadata_miss = load_preprocessed_data(
+        csv_path, COLUMNS_TO_DROP, "target", cache_dir
+    )
+    x_hit, y_hit, fingerprint_hit, metadata_hit = load_preprocessed_data(csv_path, COLUMNS_TO_DROP, "target", cache_dir)
+    pdt.assert_frame_equal(x_hit, x_miss.reset_index(drop=True))
+    pdt.assert_series_equal(y_hit, y_miss.reset_index(drop=True))
+    pdt.assert_series_equal(pd.Series(metadata_hit), pd.Series(metadata_miss))
+    pdt.assert_series_equal(pd.Series([fingerprint_hit]), pd.Series([fingerprint_miss]))
+
+
+def test_load_preprocessed_data_validation_mode(csv_path: str, tmp_path: str) -> None:  # noqa: D103
+    cache_dir = os.path.join(tmp_path, "cache")
+    with mock.patch.object(data_cache, "validate_schemas", wraps=data_cache.validate_schemas) as validate_schemas:
+        for validation_mode in ("sampled", "sampled", "full", "sampled", "parallel"):
+            metadata = load_preprocessed_data(csv_path, COLUMNS_TO_DROP, "target", cache_dir, validation_mode)[3]
+    pdt.assert_series_equal(
+        pd.Series([call.kwargs["mode"] for call in validate_schemas.call_args_list]), pd.Series(["sampled", "full"])
+    )
+    pdt.assert_series_equal(pd.Series([metadata["validation_mode"]]), pd.Series(["full"]))
@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import pandas as pd
+import pandas.testing as pdt
+
+from lib.data_loading import read_data, stream_data
+
+
+@pytest.fixture
+def csv_path(tmp_path: str) -> str:  # noqa: D103
+    df = pd.DataFrame(
+        {
+            "PolNum": [200114978, 200114994, 200115241, 200115517, 200115552],
+            "Gender": ["Male", "Female", "Male", "Female", "Male"],
+            "Age": [42, 35, 60, 27, 51],
+            "SubGroup2": ["L46", "L112", "L46", "L7", "L112"],
+            "Numtppd": [0, 1, 0, 0, 2],
+        }
+    )
+    path = os.path.join(tmp_path, "data.csv")
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("chunksize", [1, 2, 10])
+def test_read_data(csv_path: str, chunksize: int) -> None:  # noqa: D103
+    df_output = read_data(csv_path, chunksize=chunksize)
+    df_expected = pd.read_csv(csv_path).astype(
+        {
+            "PolNum": "int32",
+            "Gender": pd.CategoricalDtype(["Female", "Male"]),
+            "Age": "int8",
+            "SubGroup2": pd.CategoricalDtype(["L112", "L46", "L7"]),
+        }
+    )
+    pdt.assert_frame_equal(df_output, df_expected, check_categorical=False)
+    pdt.assert_series_equal(df_output.dtypes, df_expected.dtypes)
+
+
+def test_stream_data(csv_path: str) -> None:  # noqa: D103
+    chunks = list(stream_data(csv_path, chunksize=2))
+    pdt.assert_series_equal(pd.Series([len(chunk) for chunk in chunks]), pd.Series([2, 2, 1]))
+    pdt.assert_frame_equal(
+        pd.concat(chunks).astype({"Gender": object, "SubGroup2": object}),
+        read_data(csv_path).astype({"Gender": object, "SubGroup2": object}),
+        check_dtype=False,
+        check_index_type=False,
+    )
@@ -5,10 +5,19 @@ import pytest
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
 
+import numpy as np
+import numpy.testing as npt
 import pandas as pd
 import pandas.testing as pdt
 
-from lib.data_preprocessing import create_target, drop_cols
+from lib.data_preprocessing import (
+    create_target,
+    drop_cols,
+    filter_uncommon_datatype,
+    hash_split_mask,
+    remove_uncommon_datatype,
+    split_data,
+)
 
 
 @pytest.mark.parametrize(
@@ -97,3 +106,59 @@ def test_keyerror_create_target(df_input: pd.DataFrame, target_col_name: str) ->
 def test_keyerror_drop_cols(df_input: pd.DataFrame, columns_to_drop: list, target_col_name: str) -> None:  # noqa: D103
     with pytest.raises(KeyError):
         drop_cols(df_input, columns_to_drop, target_col_name)
+
+
+@pytest.mark.parametrize(
+    "df_input, df_expected, rejected_expected",
+    [
+        (
+            pd.DataFrame({"Date": [1, 2, 3], "Gender": ["Male", 0, "Female"]}),
+            pd.DataFrame({"Date": [1, 3], "Gender": ["Male", "Female"]}, index=[0, 2]),
+            {"Date": 0, "Gender": 1},
+        ),
+        (
+            pd.DataFrame({"Type": ["A", 1.5, "B", 2], "Value": [1.0, 2.0, "x", 4.0]}),
+            pd.DataFrame({"Type": ["A"], "Value": [1.0]}, dtype=object),
+            {"Type": 2, "Value": 1},
+        ),
+        (
+            pd.DataFrame({"Category": pd.Categorical(["Large", None, "Small"]), "Age": [20, 30, 40]}),
+            pd.DataFrame({"Category": pd.Categorical(["Large", "Small"]), "Age": [20, 40]}, index=[0, 2]),
+            {"Category": 1, "Age": 0},
+        ),
+    ],
+)
+def test_filter_uncommon_datatype(  # noqa: D103
+    df_input: pd.DataFrame, df_expected: pd.DataFrame, rejected_expected: dict
+) -> None:
+    df_output, rejected_output = filter_uncommon_datatype(df_input)
+    pdt.assert_frame_equal(df_output, df_expected)
+    pdt.assert_series_equal(pd.Series(rejected_output), pd.Series(rejected_expected))
+    pdt.assert_frame_equal(remove_uncommon_datatype(df_input), df_expected)
+
+
+def test_hash_split_mask() -> None:  # noqa: D103
+    x = pd.DataFrame({"PolNum": np.arange(20_000), "CalYear": 2009})
+    is_train = hash_split_mask(x, 0.8)
+    npt.assert_allclose(is_train.mean(), 0.8, atol=0.01)
+    npt.assert_array_equal(hash_split_mask(x.astype({"PolNum": "int32"}), 0.8), is_train)
+    npt.assert_array_equal(hash_split_mask(x.iloc[::-1], 0.8), is_train[::-1])
+    npt.assert_array_equal(hash_split_mask(x, 0.8)[:100], hash_split_mask(x.iloc[:100], 0.8))
+
+    x_years = pd.concat([x, x.assign(CalYear=2010)])
+    is_train_years = hash_split_mask(x_years, 0.8)
+    npt.assert_array_equal(is_train_years[:20_000], is_train_years[20_000:])
+    is_train_keyed = hash_split_mask(x_years, 0.8, ("PolNum", "CalYear"))
+    npt.assert_(not np.array_equal(is_train_keyed[:20_000], is_train_keyed[20_000:]))
+
+
+def test_split_data_hash() -> None:  # noqa: D103
+    x = pd.DataFrame({"PolNum": np.arange(1000), "Age": np.arange(1000) % 80})
+    y = pd.Series(np.arange(1000) % 2, name="target")
+    x_train, x_test, y_train, y_test = split_data(x, y, 0.8, 0, mode="hash")
+    npt.assert_equal(len(x_train) + len(x_test), 1000)
+    pdt.assert_index_equal(x_train.index, y_train.index)
+    pdt.assert_index_equal(x_test.index, y_test.index)
+    pdt.assert_frame_equal(split_data(x, y, 0.8, 1, mode="hash")[0], x_train)
+    with pytest.raises(ValueError):
+        split_data(x, y, 0.8, 0, mode="stratified")
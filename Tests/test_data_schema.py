@@ -0,0 +1,58 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import pandas as pd
+import pandas.testing as pdt
+from pandera.errors import SchemaErrors
+
+from lib.data_schema import validate_schemas
+
+
+@pytest.fixture
+def x() -> pd.DataFrame:  # noqa: D103
+    return pd.DataFrame(
+        {
+            "PolNum": [200114978, 200114994, 200115241, 200115517],
+            "CalYear": [2009, 2009, 2010, 2010],
+            "Gender": ["Male", "Female", "Male", "Female"],
+            "Type": ["C", "E", "A", "F"],
+            "Category": ["Large", "Medium", "Small", "Small"],
+            "Age": [42, 35, 60, 27],
+            "Group1": [18, 11, 5, 2],
+            "Bonus": [-30, 0, 50, 10],
+            "Poldur": [15, 2, 0, 4],
+            "Value": [15080.0, 22522.0, 9000.0, 12000.0],
+            "Adind": [0, 1, 1, 0],
+            "SubGroup2": ["L46", "L112", "L46", "L7"],
+            "Density": [72.01, 39.47, 150.3, 22.8],
+        }
+    )
+
+
+@pytest.fixture
+def y() -> pd.Series:  # noqa: D103
+    return pd.Series([0, 1, 0, 1], name="target")
+
+
+@pytest.mark.parametrize("mode", ["parallel", "sampled"])
+def test_validate_schemas(x: pd.DataFrame, y: pd.Series, mode: str) -> None:  # noqa: D103
+    validated_x, validated_y = validate_schemas(x, y, mode=mode, sample_fraction=0.5, n_workers=2)
+    expected_x, expected_y = validate_schemas(x, y)
+    pdt.assert_frame_equal(validated_x, expected_x)
+    pdt.assert_series_equal(validated_y, expected_y)
+
+
+@pytest.mark.parametrize("mode", ["parallel", "sampled"])
+def test_schemaerrors_validate_schemas(x: pd.DataFrame, y: pd.Series, mode: str) -> None:  # noqa: D103
+    x.loc[3, "Age"] = -1
+    with pytest.raises(SchemaErrors):
+        validate_schemas(x, y, mode=mode, sample_fraction=1.0, n_workers=2)
+
+
+def test_valueerror_validate_schemas(x: pd.DataFrame, y: pd.Series) -> None:  # noqa: D103
+    with pytest.raises(ValueError):
+        validate_schemas(x, y, mode="fast")
@@ -0,0 +1,66 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import lightgbm as lgb
+import numpy as np
+import numpy.testing as npt
+import pandas as pd
+from lightgbm import LGBMClassifier
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import OneHotEncoder
+
+from lib.dataset_cache import fingerprint_dataset, fit_classifier_on_dataset, load_binned_dataset
+from lib.model_evaluation import get_booster_params
+
+
+def make_training_data() -> tuple[pd.DataFrame, pd.Series, ColumnTransformer]:  # noqa: D103
+    rng = np.random.default_rng(0)
+    x = pd.DataFrame({"Gender": rng.choice(["Male", "Female"], 500), "Age": rng.integers(18, 80, 500)})
+    y = ((x["Age"] > 40) ^ (x["Gender"] == "Male")).astype(int)
+    preprocessor = ColumnTransformer([("cat", OneHotEncoder(), ["Gender"])], remainder="passthrough").fit(x)
+    return x, y, preprocessor
+
+
+def test_fingerprint_dataset() -> None:  # noqa: D103
+    x, y, preprocessor = make_training_data()
+    feature_names = preprocessor.get_feature_names_out()
+    fingerprint = fingerprint_dataset(x, y, feature_names, {"max_bin": 255, "learning_rate": 0.1})
+    npt.assert_equal(fingerprint_dataset(x, y, feature_names, {"max_bin": 255, "learning_rate": 0.5}), fingerprint)
+    npt.assert_(fingerprint_dataset(x, y, feature_names, {"max_bin": 63}) != fingerprint)
+    npt.assert_(fingerprint_dataset(x.iloc[1:], y.iloc[1:], feature_names, {"max_bin": 255}) != fingerprint)
+
+
+def test_load_binned_dataset(tmp_path: str) -> None:  # noqa: D103
+    x, y, preprocessor = make_training_data()
+    reference = LGBMClassifier(n_estimators=10, verbose=-1, random_state=0)
+    params = get_booster_params(reference)
+    x_transformed = preprocessor.transform(x)
+    reference.fit(x_transformed, y)
+
+    constructed = load_binned_dataset(x, y, preprocessor, params, tmp_path)
+    cached = load_binned_dataset(x, y, preprocessor, params, tmp_path)
+    model = fit_classifier_on_dataset(LGBMClassifier(n_estimators=10, verbose=-1, random_state=0), cached, params)
+
+    npt.assert_equal(len(os.listdir(tmp_path)), 1)
+    npt.assert_array_equal(cached.get_label(), constructed.get_label())
+    npt.assert_array_equal(model.classes_, [0, 1])
+    npt.assert_allclose(
+        model.predict_proba(preprocessor.transform(x)), reference.predict_proba(preprocessor.transform(x))
+    )
+
+
+def test_fit_classifier_on_dataset_early_stopping() -> None:  # noqa: D103
+    x, y, preprocessor = make_training_data()
+    params = get_booster_params(LGBMClassifier(n_estimators=500, verbose=-1, random_state=0))
+    dataset = lgb.Dataset(preprocessor.transform(x.iloc[:400]), label=y.iloc[:400].to_numpy(), params=params)
+    valid_set = lgb.Dataset(preprocessor.transform(x.iloc[400:]), label=y.iloc[400:].to_numpy(), reference=dataset)
+
+    model = fit_classifier_on_dataset(
+        LGBMClassifier(), dataset, params, valid_set, callbacks=[lgb.early_stopping(5, verbose=False)]
+    )
+
+    npt.assert_(0 < model.best_iteration_ < 500)
+    npt.assert_equal(model.booster_.num_trees(), model.best_iteration_)
+    npt.assert_array_equal(model.predict(preprocessor.transform(x)).shape, [500])
@@ -0,0 +1,58 @@
+import copy
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import numpy as np
+import numpy.testing as npt
+from scipy import sparse
+
+from lib.feature_store import FeatureStore, open_feature_store, write_feature_store
+
+
+def test_write_feature_store(tmp_path: str) -> None:  # noqa: D103
+    directory = os.path.join(tmp_path, "features")
+    x_train = sparse.random(100, 8, density=0.2, format="csr", random_state=0)
+    y_train = np.arange(100) % 2
+    write_feature_store(directory, {"x_train": x_train, "y_train": y_train}, [f"f{i}" for i in range(8)], {"v": 1})
+
+    feature_store = copy.deepcopy(FeatureStore(directory))
+    loaded_x, loaded_y = feature_store.load("x_train"), feature_store.load("y_train")
+
+    npt.assert_equal(feature_store.names, ["x_train", "y_train"])
+    npt.assert_equal(feature_store.feature_names[-1], "f7")
+    npt.assert_equal(feature_store.metadata, {"v": 1})
+    npt.assert_array_equal(loaded_x.toarray(), x_train.toarray())
+    npt.assert_array_equal(loaded_y, y_train)
+    npt.assert_(not loaded_x.data.flags.writeable)
+    npt.assert_(not loaded_y.flags.writeable)
+
+
+def test_write_feature_store_replaces(tmp_path: str) -> None:  # noqa: D103
+    directory = os.path.join(tmp_path, "features")
+    write_feature_store(directory, {"x_train": np.eye(3)})
+    write_feature_store(directory, {"x_valid": np.eye(2)})
+    npt.assert_equal(FeatureStore(directory).names, ["x_valid"])
+    npt.assert_equal(sorted(os.listdir(tmp_path)), ["features"])
+    with pytest.raises(KeyError):
+        FeatureStore(directory).load("x_train")
+
+
+def test_open_feature_store(tmp_path: str) -> None:  # noqa: D103
+    directory = os.path.join(tmp_path, "features")
+    npt.assert_(open_feature_store(directory) is None)
+    write_feature_store(directory, {"x": np.arange(4)})
+    npt.assert_array_equal(open_feature_store(directory).load("x"), np.arange(4))
+
+    manifest_path = os.path.join(directory, "manifest.json")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    with open(manifest_path, "w") as f:
+        json.dump({**manifest, "format_version": 0}, f)
+    with pytest.raises(ValueError):
+        FeatureStore(directory)
+    npt.assert_(open_feature_store(directory) is None)
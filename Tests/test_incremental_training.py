@@ -0,0 +1,111 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import numpy as np
+import numpy.testing as npt
+import pandas as pd
+from lightgbm import LGBMClassifier
+from sklearn.compose import ColumnTransformer
+from sklearn.dummy import DummyClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from lib.incremental_training import (
+    can_continue_training,
+    compare_retrains,
+    continue_training,
+    resolve_split_mode,
+    select_new_data,
+    split_leakage_reason,
+)
+from lib.model_evaluation import MixtureClassifier
+
+
+@pytest.fixture
+def training_data() -> tuple[pd.DataFrame, pd.Series]:  # noqa: D103
+    rng = np.random.default_rng(0)
+    x = pd.DataFrame(
+        {
+            "Gender": rng.choice(["Male", "Female"], 600),
+            "Age": rng.integers(18, 80, 600),
+            "CalYear": np.repeat([2009, 2010, 2011], 200),
+        }
+    )
+    y = ((x["Age"] > 40) ^ (x["Gender"] == "Male")).astype(int)
+    return x, y
+
+
+def make_pipeline(x: pd.DataFrame, y: pd.Series) -> Pipeline:  # noqa: D103
+    preprocessor = ColumnTransformer(
+        [("cat", OneHotEncoder(handle_unknown="ignore"), ["Gender"])], remainder="passthrough"
+    )
+    model = LGBMClassifier(n_estimators=10, min_child_samples=5, verbose=-1, random_state=0)
+    return Pipeline([("preprocessor", preprocessor), ("model", model)]).fit(x, y)
+
+
+def test_select_new_data(training_data: tuple[pd.DataFrame, pd.Series]) -> None:  # noqa: D103
+    x_new, y_new = select_new_data(*training_data)
+    npt.assert_array_equal(x_new["CalYear"].unique(), [2011])
+    npt.assert_equal(len(y_new), 200)
+    npt.assert_equal(len(select_new_data(*training_data, since=2010)[0]), 400)
+
+
+def test_continue_training(training_data: tuple[pd.DataFrame, pd.Series]) -> None:  # noqa: D103
+    x, y = training_data
+    is_old = (x["CalYear"] < 2011).to_numpy()
+    production = make_pipeline(x[is_old], y[is_old])
+    production_proba = production.predict_proba(x)
+
+    pipeline = continue_training(production, x[~is_old], y[~is_old], n_estimators=5)
+
+    npt.assert_equal(pipeline.named_steps["model"].booster_.num_trees(), 15)
+    npt.assert_equal(production.named_steps["model"].booster_.num_trees(), 10)
+    npt.assert_array_equal(production.predict_proba(x), production_proba)
+    npt.assert_array_equal(pipeline.predict(x).shape, [600])
+
+
+def test_valueerror_continue_training(training_data: tuple[pd.DataFrame, pd.Series]) -> None:  # noqa: D103
+    with pytest.raises(ValueError):
+        continue_training(DummyClassifier().fit(*training_data), *training_data, n_estimators=5)
+
+
+def test_can_continue_training(training_data: tuple[pd.DataFrame, pd.Series]) -> None:  # noqa: D103
+    pipeline = make_pipeline(*training_data)
+    npt.assert_(can_continue_training(pipeline))
+    npt.assert_(not can_continue_training(MixtureClassifier([pipeline, pipeline], np.array([0.5, 0.5]))))
+
+
+def test_compare_retrains(training_data: tuple[pd.DataFrame, pd.Series]) -> None:  # noqa: D103
+    pipeline = make_pipeline(*training_data)
+    report = compare_retrains(pipeline, pipeline, *training_data)
+    npt.assert_equal(report["roc_auc_delta"], 0.0)
+    npt.assert_equal(report["incremental_accuracy"], report["full_accuracy"])
+
+
+def test_resolve_split_mode() -> None:  # noqa: D103
+    npt.assert_equal(resolve_split_mode("full", "random"), "random")
+    npt.assert_equal(resolve_split_mode("incremental", "random"), "hash")
+    npt.assert_equal(resolve_split_mode("incremental", "hash"), "hash")
+    with pytest.raises(ValueError, match="Unknown training mode"):
+        resolve_split_mode("partial", "hash")
+
+
+def test_split_leakage_reason() -> None:  # noqa: D103
+    npt.assert_(split_leakage_reason({"split_mode": "hash", "split_train_size": "0.8"}, 0.8) is None)
+    npt.assert_(split_leakage_reason({"split_mode": "hash", "split_train_size": "0.7"}, 0.8) is None)
+    npt.assert_equal(
+        split_leakage_reason({"split_mode": "hash", "split_train_size": "0.9"}, 0.8),
+        "production model was trained on a hash split of train size 0.9",
+    )
+    npt.assert_equal(
+        split_leakage_reason({"split_mode": "random", "split_train_size": "0.8"}, 0.8),
+        "production model was trained with a 'random' split",
+    )
+    npt.assert_equal(
+        split_leakage_reason({"split_mode": "hash"}, 0.8),
+        "production model was trained on a hash split of train size None",
+    )
@@ -0,0 +1,326 @@
+import os
+import sys
+import warnings
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import lightgbm as lgb
+import numpy as np
+import numpy.testing as npt
+import pandas as pd
+import pandas.testing as pdt
+import shap
+from lightgbm import LGBMClassifier
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.dummy import DummyClassifier
+from sklearn.metrics import accuracy_score, confusion_matrix, f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder
+
+from lib.model_evaluation import (
+    ROW_ID_COLUMN,
+    BinnedData,
+    BinnedLGBMClassifier,
+    aggregate_by_original_columns,
+    bootstrap_metric_intervals,
+    calculate_feature_importances,
+    calculate_metrics,
+    calculate_shap_values,
+    check_is_model_better,
+    confusion_counts,
+    distill_mixture,
+    encode_original_columns,
+    fairness_report,
+    get_booster_params,
+    map_to_original_columns,
+    metrics_from_counts,
+    optimal_threshold,
+    prune_mitigator,
+    run_bias_detector,
+    run_explainer,
+    selection_rate_disparity,
+    threshold_sweep,
+    train_mitigator,
+    transform_features,
+)
+
+
+@pytest.fixture
+def training_data() -> tuple[pd.DataFrame, pd.Series]:  # noqa: D103
+    rng = np.random.default_rng(0)
+    x = pd.DataFrame({"Gender": rng.choice(["Male", "Female"], 500), "Age": rng.integers(18, 80, 500)})
+    y = ((x["Age"] > 40) ^ (x["Gender"] == "Male")).astype(int)
+    return x, y
+
+
+@pytest.fixture
+def fitted_pipeline(training_data: tuple[pd.DataFrame, pd.Series]) -> Pipeline:  # noqa: D103
+    preprocessor = ColumnTransformer([("cat", OneHotEncoder(), ["Gender"])], remainder="passthrough")
+    model = LGBMClassifier(n_estimators=10, min_child_samples=5, verbose=-1, random_state=0)
+    return Pipeline([("preprocessor", preprocessor), ("model", model)]).fit(*training_data)
+
+
+def test_binned_lgbm_classifier(  # noqa: D103
+    training_data: tuple[pd.DataFrame, pd.Series], fitted_pipeline: Pipeline
+) -> None:
+    x, y = training_data
+    preprocessor = fitted_pipeline.named_steps["preprocessor"]
+    params = get_booster_params(fitted_pipeline.named_steps["model"])
+    x_transformed = preprocessor.transform(x)
+    dataset = lgb.Dataset(x_transformed, label=y.to_numpy(), params=params, free_raw_data=False).construct()
+    estimator = BinnedLGBMClassifier(BinnedData(preprocessor, x_transformed, dataset), params)
+    row_ids = pd.DataFrame({ROW_ID_COLUMN: np.arange(len(x))})
+
+    estimator.fit(row_ids, y, sample_weight=np.ones(len(x)))
+
+    npt.assert_array_equal(estimator.predict(row_ids), fitted_pipeline.predict(x))
+    npt.assert_array_equal(estimator.predict(x), fitted_pipeline.predict(x))
+
+
+def test_binned_lgbm_classifier_refit_weights(  # noqa: D103
+    training_data: tuple[pd.DataFrame, pd.Series], fitted_pipeline: Pipeline
+) -> None:
+    x, y = training_data
+    preprocessor = fitted_pipeline.named_steps["preprocessor"]
+    params = get_booster_params(fitted_pipeline.named_steps["model"])
+    x_transformed = preprocessor.transform(x)
+    row_ids = pd.DataFrame({ROW_ID_COLUMN: np.arange(len(x))})
+    weights = np.random.default_rng(0).exponential(size=len(x))
+
+    def make_estimator() -> BinnedLGBMClassifier:
+        dataset = lgb.Dataset(x_transformed, label=y.to_numpy(), params=params, free_raw_data=False).construct()
+        return BinnedLGBMClassifier(BinnedData(preprocessor, x_transformed, dataset), params)
+
+    estimator = make_estimator()
+    for sample_weight in [weights, np.ones(len(x)), None]:
+        estimator.fit(row_ids, y, sample_weight=sample_weight)
+        expected = make_estimator().fit(row_ids, y, sample_weight=sample_weight)
+        npt.assert_array_equal(estimator.booster_.predict(x_transformed), expected.booster_.predict(x_transformed))
+
+
+def test_valueerror_train_mitigator(  # noqa: D103
+    training_data: tuple[pd.DataFrame, pd.Series], fitted_pipeline: Pipeline
+) -> None:
+    with pytest.raises(ValueError):
+        train_mitigator(fitted_pipeline, *training_data, "Gender", mode="grid")
+
+
+def test_prune_mitigator(training_data: tuple[pd.DataFrame, pd.Series]) -> None:  # noqa: D103
+    x, y = training_data
+    predictors = [DummyClassifier(strategy="constant", constant=c).fit(x, y) for c in (0, 1, 1)]
+    mitigator = SimpleNamespace(weights_=pd.Series([0.25, 0.0005, 0.5]), predictors_=pd.Series(predictors))
+
+    mixture = prune_mitigator(mitigator)
+
+    npt.assert_equal(len(mixture.predictors), 2)
+    npt.assert_allclose(mixture.weights, [1 / 3, 2 / 3])
+    npt.assert_allclose(mixture.predict_proba(x)[:, 1], 2 / 3)
+    npt.assert_allclose(mixture.predict(x, random_state=0).mean(), 2 / 3, atol=0.05)
+
+
+def test_distill_mixture(training_data: tuple[pd.DataFrame, pd.Series], fitted_pipeline: Pipeline) -> None:  # noqa: D103
+    x, y = training_data
+    mitigator = SimpleNamespace(weights_=pd.Series([1.0]), predictors_=pd.Series([fitted_pipeline]))
+
+    student = distill_mixture(prune_mitigator(mitigator), fitted_pipeline, x)
+
+    npt.assert_array_equal(student.predict(x), fitted_pipeline.predict(x))
+
+
+def test_selection_rate_disparity() -> None:  # noqa: D103
+    sensitive_features = pd.Series(["Male", "Male", "Female", "Female", "Female", "Female"])
+    disparity = selection_rate_disparity(np.array([1, 1, 0, 1, 0, 0]), sensitive_features)
+    pdt.assert_series_equal(pd.Series([disparity]), pd.Series([0.75]))
+
+
+def test_map_to_original_columns(fitted_pipeline: Pipeline) -> None:  # noqa: D103
+    column_positions, column_names = map_to_original_columns(fitted_pipeline.named_steps["preprocessor"])
+    npt.assert_array_equal(column_positions, [0, 0, 1])
+    npt.assert_array_equal(column_names, ["Gender", "Age"])
+    npt.assert_array_equal(aggregate_by_original_columns(np.array([[1.0, 2.0, 3.0]]), column_positions), [[3.0, 3.0]])
+
+    importances = calculate_feature_importances(fitted_pipeline)
+    model_importances = fitted_pipeline.named_steps["model"].feature_importances_
+    npt.assert_equal(importances, {"Gender": model_importances[:2].sum(), "Age": model_importances[2]})
+
+
+def test_map_to_original_columns_native(training_data: tuple[pd.DataFrame, pd.Series]) -> None:  # noqa: D103
+    preprocessor = ColumnTransformer([("cat", OrdinalEncoder(), ["Gender"])], remainder="passthrough")
+    column_positions, column_names = map_to_original_columns(preprocessor.fit(training_data[0]))
+    npt.assert_array_equal(column_positions, [0, 1])
+    npt.assert_array_equal(column_names, ["Gender", "Age"])
+
+
+@pytest.mark.parametrize("n_workers, chunk_size", [(1, 10_000), (1, 64), (2, 128)])
+def test_calculate_shap_values(  # noqa: D103
+    training_data: tuple[pd.DataFrame, pd.Series], n_workers: int, chunk_size: int
+) -> None:
+    x, y = training_data
+    preprocessor = ColumnTransformer(
+        [("cat", OneHotEncoder(), ["Gender"])], remainder="passthrough", sparse_threshold=1.0
+    )
+    model = LGBMClassifier(n_estimators=10, min_child_samples=5, verbose=-1, random_state=0)
+    pipeline = Pipeline([("preprocessor", preprocessor), ("model", model)]).fit(x, y)
+    x_transformed, _ = transform_features(pipeline, x)
+    npt.assert_(sparse.issparse(x_transformed))
+
+    shap_values, expected_value = calculate_shap_values(model, x_transformed, n_workers, chunk_size)
+    explainer = shap.TreeExplainer(model)
+    npt.assert_equal(shap_values.dtype, np.float32)
+    npt.assert_allclose(shap_values, explainer.shap_values(x_transformed.toarray()), rtol=1e-5, atol=1e-6)
+    npt.assert_allclose(expected_value, explainer.expected_value)
+
+
+def test_run_explainer(training_data: tuple[pd.DataFrame, pd.Series], fitted_pipeline: Pipeline) -> None:  # noqa: D103
+    x, _ = training_data
+    explanation = run_explainer(fitted_pipeline, x, chunk_size=128)
+    x_dense = fitted_pipeline.named_steps["preprocessor"].transform(x)
+    shap_values = shap.TreeExplainer(fitted_pipeline.named_steps["model"]).shap_values(x_dense)
+    npt.assert_array_equal(explanation.feature_names, ["Gender", "Age"])
+    npt.assert_allclose(
+        explanation.shap_values, np.column_stack([shap_values[:, :2].sum(axis=1), shap_values[:, 2]]), atol=1e-6
+    )
+
+
+def test_encode_original_columns() -> None:  # noqa: D103
+    data = pd.DataFrame(
+        {
+            "Gender": ["Male", "Female", None],
+            "Category": pd.Categorical(["Small", "Large", "Small"], categories=["Small", "Large"]),
+            "Age": [18, 40, 65],
+        }
+    )
+    npt.assert_array_equal(encode_original_columns(data), [[1.0, 0.0, 18.0], [0.0, 1.0, 40.0], [np.nan, 0.0, 65.0]])
+
+
+def test_metrics_from_counts() -> None:  # noqa: D103
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 2, 1000)
+    y_pred = np.where(rng.random(1000) < 0.8, y_true, 1 - y_true)
+
+    counts = confusion_counts(y_true, y_pred)
+    metrics = metrics_from_counts(counts)
+
+    npt.assert_array_equal(counts, confusion_matrix(y_true, y_pred).ravel())
+    npt.assert_allclose(metrics["accuracy"], accuracy_score(y_true, y_pred))
+    npt.assert_allclose(metrics["precision"], precision_score(y_true, y_pred))
+    npt.assert_allclose(metrics["recall"], recall_score(y_true, y_pred))
+    npt.assert_allclose(metrics["f1"], f1_score(y_true, y_pred))
+    npt.assert_allclose(metrics["roc_auc"], roc_auc_score(y_true, y_pred))
+    npt.assert_equal(metrics_from_counts(np.array([5, 0, 5, 0]))["precision"], 0.0)
+
+
+def test_bootstrap_metric_intervals() -> None:  # noqa: D103
+    counts = np.array([4000, 1000, 1000, 4000])
+    intervals = bootstrap_metric_intervals(counts, n_resamples=5000)
+    lower, upper = intervals["accuracy"]
+    npt.assert_(lower < 0.8 < upper)
+    npt.assert_allclose(upper - lower, 2 * 1.96 * np.sqrt(0.8 * 0.2 / 10_000), rtol=0.1)
+    npt.assert_equal(bootstrap_metric_intervals(counts, n_resamples=5000), intervals)
+
+
+def test_calculate_metrics() -> None:  # noqa: D103
+    y_true = np.array([0, 0, 1, 1, 1])
+    metrics = calculate_metrics(np.array([0, 1, 1, 1, 0]), y_true)
+    npt.assert_equal(metrics["accuracy"], 0.6)
+    npt.assert_("cm" not in metrics)
+    npt.assert_(metrics["accuracy_lower"] <= metrics["accuracy"] <= metrics["accuracy_upper"])
+    metrics = calculate_metrics(np.array([0, 1, 1, 1, 0]), y_true, plot_confusion_matrix=True, n_resamples=0)
+    npt.assert_array_equal(metrics["cm"].confusion_matrix, [[1, 1], [1, 2]])
+    npt.assert_("accuracy_lower" not in metrics)
+
+
+def test_threshold_sweep() -> None:  # noqa: D103
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 2, 500)
+    y_proba = np.round(np.clip(0.3 * y_true + rng.random(500) * 0.7, 0, 1), 2)
+
+    sweep = threshold_sweep(y_true, y_proba)
+
+    npt.assert_array_equal(sweep["threshold"], np.unique(y_proba)[::-1])
+    for row in sweep.sample(20, random_state=0).itertuples():
+        y_pred = (y_proba >= row.threshold).astype(int)
+        npt.assert_array_equal([row.tn, row.fp, row.fn, row.tp], confusion_matrix(y_true, y_pred).ravel())
+        npt.assert_allclose(row.f1, f1_score(y_true, y_pred))
+        npt.assert_allclose(row.selection_rate, y_pred.mean())
+    best = optimal_threshold(sweep, "f1")
+    npt.assert_equal(sweep.loc[sweep["threshold"] == best, "f1"].item(), sweep["f1"].max())
+
+
+def test_valueerror_optimal_threshold() -> None:  # noqa: D103
+    sweep = threshold_sweep(np.array([0, 1]), np.array([0.2, 0.8]))
+    with pytest.raises(ValueError, match="Unknown threshold metric"):
+        optimal_threshold(sweep, "selection_rate")
+
+
+@pytest.fixture
+def fairness_data() -> tuple[pd.DataFrame, np.ndarray, np.ndarray]:  # noqa: D103
+    rng = np.random.default_rng(0)
+    x = pd.DataFrame({"Gender": rng.choice(["F", "M"], 2000), "Category": rng.choice(["A", "B", "C"], 2000)})
+    y_true = rng.integers(0, 2, 2000)
+    y_pred = np.where(rng.random(2000) < 0.7 + 0.1 * (x["Gender"] == "F"), y_true, 1 - y_true)
+    return x, y_true, y_pred
+
+
+def test_fairness_report(fairness_data: tuple[pd.DataFrame, np.ndarray, np.ndarray]) -> None:  # noqa: D103
+    x, y_true, y_pred = fairness_data
+    report = fairness_report(y_true, y_pred, x, n_resamples=500)
+
+    npt.assert_array_equal(report.disparities.index, ["Gender", "Category", "Gender & Category"])
+    intersection = report.by_group[report.by_group["features"] == "Gender & Category"]
+    npt.assert_array_equal(intersection["group"], ["F & A", "F & B", "F & C", "M & A", "M & B", "M & C"])
+    for row in intersection.itertuples():
+        gender, category = row.group.split(" & ")
+        rows = ((x["Gender"] == gender) & (x["Category"] == category)).to_numpy()
+        npt.assert_equal(row.count, rows.sum())
+        npt.assert_allclose(row.accuracy, accuracy_score(y_true[rows], y_pred[rows]))
+        npt.assert_allclose(row.f1, f1_score(y_true[rows], y_pred[rows]))
+        npt.assert_allclose(row.selection_rate, y_pred[rows].mean())
+    gender = report.by_group[report.by_group["features"] == "Gender"].set_index("group")
+    npt.assert_allclose(
+        gender["recall"], [recall_score(y_true[x["Gender"] == g], y_pred[x["Gender"] == g]) for g in "FM"]
+    )
+    npt.assert_allclose(report.disparities.loc["Gender", "accuracy"], np.ptp(gender["accuracy"]))
+    npt.assert_((report.by_group["accuracy_lower"] <= report.by_group["accuracy"]).all())
+    npt.assert_((report.by_group["accuracy"] <= report.by_group["accuracy_upper"]).all())
+    npt.assert_(report.disparities.loc["Gender", "accuracy_lower"] > 0)
+    pdt.assert_frame_equal(fairness_report(y_true, y_pred, x, n_resamples=500).by_group, report.by_group)
+    npt.assert_array_equal(fairness_report(y_true, y_pred, x, intersections=False).disparities.index, x.columns)
+
+
+def test_run_bias_detector(fairness_data: tuple[pd.DataFrame, np.ndarray, np.ndarray]) -> None:  # noqa: D103
+    x, y_true, y_pred = fairness_data
+    results = run_bias_detector(x, y_true, y_pred, ["Category", "Gender"], n_resamples=0)
+    npt.assert_allclose(results["disparity"], selection_rate_disparity(y_pred, x["Category"]))
+    npt.assert_equal(len(results["report"].by_group), 3 + 2 + 6)
+
+
+def test_check_is_model_better() -> None:  # noqa: D103
+    with mock.patch("lib.model_evaluation.get_model_metric", return_value=0.8):
+        npt.assert_(check_is_model_better("model", "Production", 0.82, "accuracy"))
+        npt.assert_(not check_is_model_better("model", "Production", 0.78, "accuracy"))
+        npt.assert_(not check_is_model_better("model", "Production", 0.78, "accuracy", (0.75, 0.81)))
+        npt.assert_(not check_is_model_better("model", "Production", 0.82, "accuracy", (0.79, 0.85)))
+        npt.assert_(check_is_model_better("model", "Production", 0.84, "accuracy", (0.81, 0.87)))
+
+
+def test_fairness_report_unused_categories(  # noqa: D103
+    fairness_data: tuple[pd.DataFrame, np.ndarray, np.ndarray],
+) -> None:
+    x, y_true, y_pred = fairness_data
+    categorical = x.astype({"Gender": pd.CategoricalDtype(["M", "F", "Other"])})
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", FutureWarning)
+        report = fairness_report(y_true, y_pred, categorical)
+
+    pdt.assert_frame_equal(report.disparities, fairness_report(y_true, y_pred, x).disparities)
+    npt.assert_((report.by_group["count"] > 0).all())
+    npt.assert_allclose(
+        report.disparities.loc["Gender", "selection_rate"], selection_rate_disparity(y_pred, x["Gender"])
+    )
@@ -0,0 +1,82 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import mlflow
+import numpy as np
+import numpy.testing as npt
+import pandas as pd
+import pandas.testing as pdt
+from lightgbm import LGBMClassifier
+from mlflow.entities.model_registry import ModelVersion, ModelVersionTag
+from sklearn.pipeline import Pipeline
+
+from lib.model_registry import DECISION_THRESHOLD_TAG, ModelArtifactCache, ThresholdedModel, load_model_version
+
+
+def make_model_version(tmp_path: str, version: str, content: bytes) -> ModelVersion:  # noqa: D103
+    source = os.path.join(tmp_path, "registry", version, "lightgbm_model")
+    os.makedirs(source)
+    with open(os.path.join(source, "model.pkl"), "wb") as f:
+        f.write(content)
+    return ModelVersion("lightgbm", version, 0, source=source)
+
+
+def read_model(path: str) -> bytes:  # noqa: D103
+    with open(os.path.join(path, "model.pkl"), "rb") as f:
+        return f.read()
+
+
+@pytest.fixture
+def cache_dir(tmp_path: str) -> str:  # noqa: D103
+    return os.path.join(tmp_path, "cache")
+
+
+def test_model_artifact_cache(tmp_path: str, cache_dir: str) -> None:  # noqa: D103
+    model_version = make_model_version(tmp_path, "1", b"booster v1")
+    cache = ModelArtifactCache(cache_dir)
+    path = cache.get(model_version)
+    pdt.assert_series_equal(pd.Series([read_model(path)]), pd.Series([b"booster v1"]))
+    with open(os.path.join(path, "model.pkl"), "ab") as f:
+        f.write(b" corrupted")
+    pdt.assert_series_equal(pd.Series([read_model(cache.get(model_version))]), pd.Series([b"booster v1"]))
+
+
+def test_model_artifact_cache_source_change(tmp_path: str, cache_dir: str) -> None:  # noqa: D103
+    cache = ModelArtifactCache(cache_dir)
+    cache.get(make_model_version(os.path.join(tmp_path, "old"), "1", b"booster v1"))
+    path = cache.get(make_model_version(os.path.join(tmp_path, "new"), "1", b"retrained booster v1"))
+    pdt.assert_series_equal(pd.Series([read_model(path)]), pd.Series([b"retrained booster v1"]))
+
+
+def test_model_artifact_cache_eviction(tmp_path: str, cache_dir: str) -> None:  # noqa: D103
+    cache = ModelArtifactCache(cache_dir, max_bytes=20)
+    for version in ["1", "2", "3"]:
+        cache.get(make_model_version(tmp_path, version, b"booster v" + version.encode()))
+    pdt.assert_series_equal(
+        pd.Series(sorted(os.listdir(os.path.join(cache_dir, "lightgbm")))),
+        pd.Series(["2", "3"]),
+    )
+
+
+def test_load_model_version_threshold(tmp_path: str) -> None:  # noqa: D103
+    mlflow.set_tracking_uri(f"file://{tmp_path}/mlruns")
+    rng = np.random.default_rng(0)
+    x = pd.DataFrame({"a": rng.random(200), "b": rng.random(200)})
+    y = (x["a"] + 0.3 * rng.random(200) > 0.7).astype(int)
+    pipeline = Pipeline([("model", LGBMClassifier(n_estimators=10, verbose=-1))]).fit(x, y)
+    source = os.path.join(tmp_path, "lightgbm_model")
+    mlflow.lightgbm.save_model(pipeline, source)
+
+    untagged = load_model_version(ModelVersion("lightgbm", "1", 0, source=source))
+    tags = [ModelVersionTag(DECISION_THRESHOLD_TAG, "0.3")]
+    tagged = load_model_version(ModelVersion("lightgbm", "2", 0, source=source, tags=tags))
+
+    npt.assert_(not isinstance(untagged, ThresholdedModel))
+    npt.assert_(isinstance(tagged, ThresholdedModel))
+    npt.assert_array_equal(tagged.predict_proba(x), pipeline.predict_proba(x))
+    npt.assert_array_equal(tagged.predict(x), (pipeline.predict_proba(x)[:, 1] >= 0.3).astype(int))
+    npt.assert_(tagged.named_steps["model"] is tagged.model.named_steps["model"])
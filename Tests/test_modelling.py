@@ -0,0 +1,223 @@
+import os
+import sys
+from functools import partial
+from unittest import mock
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import mlflow
+import numpy as np
+import numpy.testing as npt
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from sklearn.pipeline import Pipeline
+
+from lib import modelling
+from lib.model_evaluation import MixtureClassifier, fairness_report, optimal_threshold, threshold_sweep
+from lib.model_registry import ThresholdedModel
+
+
+@pytest.fixture
+def training_data() -> tuple[pd.DataFrame, pd.Series]:  # noqa: D103
+    rng = np.random.default_rng(0)
+    n_rows = 2000
+    x = pd.DataFrame(
+        {
+            "PolNum": np.arange(200_000_000, 200_000_000 + n_rows),
+            "CalYear": rng.choice([2009, 2010], n_rows),
+            "Gender": rng.choice(["Male", "Female"], n_rows),
+            "Category": rng.choice(["Large", "Medium", "Small"], n_rows),
+            "Age": rng.integers(18, 80, n_rows),
+            "Bonus": rng.integers(-50, 150, n_rows),
+        }
+    )
+    score = (x["Age"] < 30) + (x["Category"] == "Small") + 0.01 * x["Bonus"] + rng.normal(0, 0.5, n_rows)
+    return x, pd.Series((score > 1).astype(int), name="target")
+
+
+@pytest.fixture
+def mlflow_run(tmp_path: str) -> mlflow.ActiveRun:  # noqa: D103
+    mlflow.set_tracking_uri(f"file://{tmp_path}/mlruns")
+    mlflow.set_experiment("test_modelling")
+    with mlflow.start_run() as run:
+        yield run
+
+
+def test_import_modelling() -> None:  # noqa: D103
+    npt.assert_(callable(modelling.trigger_pipeline))
+
+
+def test_train_pipeline_early_stopping(  # noqa: D103
+    training_data: tuple[pd.DataFrame, pd.Series], mlflow_run: mlflow.ActiveRun
+) -> None:
+    pipeline = modelling.train_pipeline(*training_data, "binary", -1, 500, 0.3, -1, 0, early_stopping_rounds=5)
+
+    model = pipeline.named_steps["model"]
+    npt.assert_(0 < model.best_iteration_ < 500)
+    npt.assert_equal(model.booster_.num_trees(), model.best_iteration_)
+    history = mlflow.MlflowClient().get_metric_history(mlflow_run.info.run_id, "valid_binary_logloss")
+    npt.assert_(len(history) > model.best_iteration_)
+    npt.assert_equal(pipeline.predict_proba(training_data[0]).shape, (len(training_data[0]), 2))
+
+
+def test_train_pipeline_dataset_cache(training_data: tuple[pd.DataFrame, pd.Series], tmp_path: str) -> None:  # noqa: D103
+    cache_dir = os.path.join(tmp_path, "datasets")
+    x, y = training_data
+
+    reference = modelling.train_pipeline(x, y, "binary", -1, 20, 0.1, -1, 0)
+    miss = modelling.train_pipeline(x, y, "binary", -1, 20, 0.1, -1, 0, dataset_cache_dir=cache_dir)
+    hit = modelling.train_pipeline(x, y, "binary", -1, 20, 0.1, -1, 0, dataset_cache_dir=cache_dir)
+
+    npt.assert_equal(len(os.listdir(cache_dir)), 1)
+    npt.assert_allclose(miss.predict_proba(x), reference.predict_proba(x))
+    npt.assert_allclose(hit.predict_proba(x), reference.predict_proba(x))
+
+
+def test_native_categorical_encoding(training_data: tuple[pd.DataFrame, pd.Series]) -> None:  # noqa: D103
+    x, y = training_data
+    onehot = modelling.init_pipeline(x, n_estimators=30, random_state=0).fit(x, y)
+    native = modelling.init_pipeline(x, n_estimators=30, random_state=0, categorical_encoding="native").fit(x, y)
+
+    npt.assert_equal(onehot.named_steps["preprocessor"].transform(x).shape[1], 4 + 2 + 3)
+    npt.assert_equal(native.named_steps["preprocessor"].transform(x).shape[1], 6)
+    npt.assert_equal(native.named_steps["model"].get_params()["categorical_column"], [0, 1])
+    decision_types = native.named_steps["model"].booster_.trees_to_dataframe()["decision_type"]
+    npt.assert_((decision_types == "==").any())
+    npt.assert_allclose(
+        roc_auc_score(y, native.predict_proba(x)[:, 1]), roc_auc_score(y, onehot.predict_proba(x)[:, 1]), atol=0.02
+    )
+    unseen = x.head(3).assign(Category="Unknown")
+    npt.assert_equal(native.predict_proba(unseen).shape, (3, 2))
+    with pytest.raises(ValueError, match="Unknown categorical encoding"):
+        modelling.init_pipeline(x, categorical_encoding="target")
+
+
+def test_threshold_holdout_and_prediction(  # noqa: D103
+    training_data: tuple[pd.DataFrame, pd.Series], mlflow_run: mlflow.ActiveRun
+) -> None:
+    x, y = training_data
+    x_train, x_test, y_train = x.iloc[:1500], x.iloc[1500:], y.iloc[:1500]
+
+    x_fit, y_fit, x_threshold, y_threshold = modelling.hold_out_threshold_data(x_train, y_train, "f1", 0.2, 0)
+    pipeline = modelling.init_pipeline(x_fit, n_estimators=20, random_state=0).fit(x_fit, y_fit)
+    y_pred, threshold = modelling.predict_with_threshold(pipeline, x_test, x_threshold, y_threshold, "f1")
+
+    npt.assert_equal((len(x_fit), len(x_threshold)), (1200, 300))
+    npt.assert_(x_fit.index.intersection(x_threshold.index).empty)
+    sweep = threshold_sweep(y_threshold, pipeline.predict_proba(x_threshold)[:, 1])
+    npt.assert_equal(threshold, optimal_threshold(sweep, "f1"))
+    npt.assert_array_equal(y_pred, (pipeline.predict_proba(x_test)[:, 1] >= threshold).astype(int))
+    run = mlflow.get_run(mlflow_run.info.run_id)
+    npt.assert_equal(run.data.metrics["decision_threshold"], threshold)
+
+    npt.assert_equal(modelling.hold_out_threshold_data(x_train, y_train, None, 0.2, 0)[2:], (None, None))
+    y_pred, threshold = modelling.predict_with_threshold(pipeline, x_test, None, None, None)
+    npt.assert_array_equal(y_pred, pipeline.predict(x_test))
+    npt.assert_(threshold is None)
+
+
+def test_log_fairness_thresholded_predictions(  # noqa: D103
+    training_data: tuple[pd.DataFrame, pd.Series], mlflow_run: mlflow.ActiveRun
+) -> None:
+    x, y = training_data
+    pipeline = modelling.init_pipeline(x, n_estimators=20, random_state=0).fit(x, y)
+    y_pred = (pipeline.predict_proba(x)[:, 1] >= 0.2).astype(int)
+    disparity = modelling.log_fairness(x, y, y_pred, ["Gender", "Category"], suffix="_mitigated")
+
+    expected = fairness_report(y, y_pred, x[["Gender", "Category"]]).disparities.loc["Gender", "selection_rate"]
+    npt.assert_allclose(disparity, expected)
+    npt.assert_(not np.isclose(disparity, modelling.log_fairness(x, y, pipeline.predict(x), ["Gender"])))
+    run = mlflow.get_run(mlflow_run.info.run_id)
+    npt.assert_allclose(run.data.metrics["disparity_mitigated"], expected)
+    artifacts = {artifact.path for artifact in mlflow.MlflowClient().list_artifacts(run.info.run_id)}
+    npt.assert_equal(artifacts, {"fairness", "fairness_mitigated", "fairness_plot.png", "fairness_plot_mitigated.png"})
+
+
+def test_run_incremental_training(  # noqa: D103
+    training_data: tuple[pd.DataFrame, pd.Series], mlflow_run: mlflow.ActiveRun
+) -> None:
+    x, y = training_data
+    x_train, x_test, y_train, y_test = x.iloc[:1500], x.iloc[1500:], y.iloc[:1500], y.iloc[1500:]
+    is_old = (x_train["CalYear"] == 2009).to_numpy()
+    production = modelling.init_pipeline(x_train, n_estimators=20, random_state=0).fit(x_train[is_old], y_train[is_old])
+    train_full = partial(modelling.train_pipeline, x_train, y_train, "binary", -1, 20, 0.1, -1, 0)
+
+    client = mlflow.MlflowClient()
+
+    def run(production_model: object, max_roc_auc_drop: float, split_mode: str = "hash") -> Pipeline:
+        production_run = client.create_run(mlflow_run.info.experiment_id)
+        client.log_param(production_run.info.run_id, "split_mode", split_mode)
+        client.log_param(production_run.info.run_id, "split_train_size", 0.75)
+        with (
+            mock.patch.object(
+                modelling, "get_latest_model_version", return_value=mock.Mock(run_id=production_run.info.run_id)
+            ),
+            mock.patch.object(modelling, "load_model_version", return_value=production_model),
+        ):
+            return modelling.run_incremental_training(
+                train_full,
+                x_train,
+                y_train,
+                x_test,
+                y_test,
+                "model",
+                "Production",
+                2010,
+                10,
+                True,
+                max_roc_auc_drop,
+                train_size=0.8,
+            )
+
+    incremental = run(ThresholdedModel(production, 0.4), max_roc_auc_drop=1.0)
+    npt.assert_equal(incremental.named_steps["model"].booster_.num_trees(), 30)
+    npt.assert_equal(production.named_steps["model"].booster_.num_trees(), 20)
+    run_data = mlflow.get_run(mlflow_run.info.run_id).data
+    npt.assert_equal(run_data.tags["training_mode_selected"], "incremental")
+    npt.assert_equal(run_data.metrics["incremental_train_size"], (~is_old).sum())
+    npt.assert_("roc_auc_delta" in run_data.metrics)
+
+    full = run(production, max_roc_auc_drop=-1.0)
+    npt.assert_equal(full.named_steps["model"].booster_.num_trees(), 20)
+    npt.assert_equal(mlflow.get_run(mlflow_run.info.run_id).data.tags["training_mode_selected"], "full")
+
+    fallback = run(ThresholdedModel(MixtureClassifier([production], np.array([1.0])), 0.5), max_roc_auc_drop=1.0)
+    npt.assert_equal(fallback.named_steps["model"].booster_.num_trees(), 20)
+    fallback_reason = mlflow.get_run(mlflow_run.info.run_id).data.tags["incremental_fallback"]
+    npt.assert_equal(fallback_reason, "cannot continue training a MixtureClassifier")
+
+    fallback = run(production, max_roc_auc_drop=1.0, split_mode="random")
+    npt.assert_equal(fallback.named_steps["model"].booster_.num_trees(), 20)
+    fallback_reason = mlflow.get_run(mlflow_run.info.run_id).data.tags["incremental_fallback"]
+    npt.assert_equal(fallback_reason, "production model was trained with a 'random' split")
+
+
+def test_valueerror_inference_pipeline_reason_codes() -> None:  # noqa: D103
+    with (
+        mock.patch.object(modelling, "get_latest_model_version") as get_latest_model_version,
+        pytest.raises(ValueError, match="output path is required"),
+    ):
+        modelling.inference_pipeline("inference.csv", "model", "Production", reason_codes=3)
+    get_latest_model_version.assert_not_called()
+
+
+def test_run_cross_validation(  # noqa: D103
+    training_data: tuple[pd.DataFrame, pd.Series], mlflow_run: mlflow.ActiveRun, tmp_path: str
+) -> None:
+    x, y = training_data
+    pipeline = modelling.init_pipeline(x, n_estimators=10, random_state=0).fit(x, y)
+
+    modelling.run_cross_validation(pipeline, x, y, "stratified", 3, 0, n_workers=2)
+
+    run_data = mlflow.get_run(mlflow_run.info.run_id).data
+    npt.assert_equal(run_data.params["cv_n_splits"], "3")
+    npt.assert_(0.5 < run_data.metrics["cv_roc_auc_mean"] <= 1)
+    path = mlflow.artifacts.download_artifacts(
+        run_id=mlflow_run.info.run_id, artifact_path="cross_validation", dst_path=str(tmp_path)
+    )
+    oof = pd.read_parquet(os.path.join(path, "oof_predictions.parquet"))
+    npt.assert_array_equal(oof["PolNum"], x["PolNum"])
+    npt.assert_array_equal(np.sort(oof["fold"].unique()), [0, 1, 2])
+    npt.assert_(oof["oof_prediction"].between(0, 1).all())
@@ -0,0 +1,86 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import numpy as np
+import numpy.testing as npt
+import pandas as pd
+from lightgbm import LGBMClassifier
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from lib.cross_validation import calculate_fold_metrics
+from lib.data_preprocessing import split_data
+from lib.out_of_core import (
+    ParquetSequence,
+    evaluate_out_of_core,
+    scan_parquet,
+    split_parquet,
+    train_out_of_core,
+)
+
+
+def write_training_data(path: str) -> tuple[pd.DataFrame, pd.Series]:  # noqa: D103
+    rng = np.random.default_rng(0)
+    x = pd.DataFrame(
+        {
+            "Gender": pd.Categorical(rng.choice(["Male", "Female"], 1000)),
+            "Region": rng.choice(["A", "B", "C"], 1000),
+            "Age": rng.integers(18, 80, 1000),
+        }
+    )
+    y = ((x["Age"] > 40) ^ (x["Gender"] == "Male")).astype(int).rename("target")
+    x.assign(target=y).to_parquet(path, row_group_size=300, index=False)
+    return x, y
+
+
+def test_scan_parquet(tmp_path: str) -> None:  # noqa: D103
+    path = os.path.join(tmp_path, "data.parquet")
+    x, y = write_training_data(path)
+    categories, target = scan_parquet(path, "target", ["Gender", "Region"])
+    npt.assert_equal(categories, {"Gender": ["Female", "Male"], "Region": ["A", "B", "C"]})
+    npt.assert_array_equal(target, y)
+
+
+def test_parquet_sequence(tmp_path: str) -> None:  # noqa: D103
+    path = os.path.join(tmp_path, "data.parquet")
+    x, _ = write_training_data(path)
+    preprocessor = ColumnTransformer([("cat", OneHotEncoder(), ["Gender", "Region"])], remainder="passthrough").fit(x)
+    expected = preprocessor.transform(x)
+    sequence = ParquetSequence(path, ["Gender", "Region", "Age"], preprocessor)
+    npt.assert_equal(len(sequence), 1000)
+    npt.assert_array_equal(sequence[250:650], expected[250:650])
+    npt.assert_array_equal(sequence[999], expected[999])
+
+
+def test_train_out_of_core(tmp_path: str) -> None:  # noqa: D103
+    path = os.path.join(tmp_path, "data.parquet")
+    x, y = write_training_data(path)
+    preprocessor = ColumnTransformer([("cat", OneHotEncoder(), ["Gender", "Region"])], remainder="passthrough")
+    model = LGBMClassifier(n_estimators=10, verbose=-1, random_state=0)
+    reference = Pipeline([("preprocessor", preprocessor), ("model", model)]).fit(x, y)
+
+    pipeline = train_out_of_core(path, "target", LGBMClassifier(n_estimators=10, verbose=-1, random_state=0))
+
+    npt.assert_allclose(pipeline.predict_proba(x), reference.predict_proba(x))
+
+
+def test_split_parquet(tmp_path: str) -> None:  # noqa: D103
+    path = os.path.join(tmp_path, "data.parquet")
+    x, y = write_training_data(path)
+    x = x.assign(PolNum=np.arange(1000))
+    x.assign(target=y).to_parquet(path, row_group_size=300, index=False)
+    train_path, test_path = os.path.join(tmp_path, "train.parquet"), os.path.join(tmp_path, "test.parquet")
+
+    n_train, n_test = split_parquet(path, train_path, test_path, 0.8)
+
+    x_train, x_test, _, y_test = split_data(x, y, 0.8, 0, mode="hash")
+    npt.assert_equal((n_train, n_test), (len(x_train), len(x_test)))
+    npt.assert_array_equal(pd.read_parquet(train_path)["PolNum"], x_train["PolNum"])
+    npt.assert_array_equal(pd.read_parquet(test_path)["PolNum"], x_test["PolNum"])
+
+    pipeline = train_out_of_core(train_path, "target", LGBMClassifier(n_estimators=10, verbose=-1, random_state=0))
+    metrics = evaluate_out_of_core(pipeline, test_path, "target")
+    npt.assert_equal(metrics, calculate_fold_metrics(y_test.to_numpy(), pipeline.predict_proba(x_test)[:, 1]))
@@ -0,0 +1,146 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import numpy as np
+import numpy.testing as npt
+import pandas as pd
+import pandas.testing as pdt
+from lightgbm import LGBMClassifier
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.dummy import DummyClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from lib.model_evaluation import MixtureClassifier
+from lib.model_registry import ThresholdedModel
+from lib.scoring import ReasonCodeExplainer, ShardedPredictor, score_file, top_k_contributions
+
+
+class AgeModel:  # noqa: D101
+    def predict(self, data: pd.DataFrame) -> np.ndarray:  # noqa: D102
+        return (data["Age"] > 40).astype(int).to_numpy()
+
+
+def load_age_model() -> AgeModel:  # noqa: D103
+    return AgeModel()
+
+
+@pytest.fixture
+def csv_path(tmp_path: str) -> str:  # noqa: D103
+    path = os.path.join(tmp_path, "pricing.csv")
+    pd.DataFrame({"PolNum": np.arange(10) + 200114978, "Age": np.arange(35, 45)}).to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("extension, read", [(".parquet", pd.read_parquet), (".csv", pd.read_csv)])
+def test_score_file(csv_path: str, tmp_path: str, extension: str, read: callable) -> None:  # noqa: D103
+    output_path = os.path.join(tmp_path, "predictions" + extension)
+    n_rows, n_positive = score_file(AgeModel(), csv_path, output_path, chunksize=3)
+    pdt.assert_series_equal(pd.Series([n_rows, n_positive]), pd.Series([10, 4]))
+    pdt.assert_frame_equal(
+        read(output_path),
+        pd.DataFrame({"PolNum": np.arange(10) + 200114978, "prediction": [0] * 6 + [1] * 4}),
+    )
+
+
+def test_valueerror_score_file(csv_path: str, tmp_path: str) -> None:  # noqa: D103
+    with pytest.raises(ValueError):
+        score_file(AgeModel(), csv_path, os.path.join(tmp_path, "predictions.json"))
+    with pytest.raises(ValueError, match="output path is required"):
+        score_file(AgeModel(), csv_path, explain_fn=lambda chunk: chunk[["Age"]])
+
+
+def test_sharded_predictor() -> None:  # noqa: D103
+    data = pd.DataFrame(
+        {
+            "Age": np.arange(18, 118),
+            "Gender": pd.Categorical(["Male", "Female"] * 50),
+            "SubGroup2": ["L46", "L112", "L7", "L8"] * 25,
+        }
+    )
+    with ShardedPredictor(load_age_model, n_workers=2, shard_size=7) as predictor:
+        npt.assert_array_equal(predictor.predict(data), AgeModel().predict(data))
+
+
+def test_top_k_contributions() -> None:  # noqa: D103
+    contributions = np.array([[0.1, -0.5, 0.3, 0.0], [2.0, 0.0, -1.0, 1.5]])
+    indices, values = top_k_contributions(contributions, 2)
+    npt.assert_array_equal(indices, [[1, 2], [0, 3]])
+    npt.assert_array_equal(values, [[-0.5, 0.3], [2.0, 1.5]])
+
+
+@pytest.fixture
+def fitted_pipeline() -> tuple[Pipeline, pd.DataFrame]:  # noqa: D103
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({"Gender": rng.choice(["Male", "Female"], 500), "Age": rng.integers(18, 80, 500)})
+    target = ((data["Age"] > 40) ^ (data["Gender"] == "Male")).astype(int)
+    preprocessor = ColumnTransformer([("cat", OneHotEncoder(), ["Gender"])], remainder="passthrough")
+    pipeline = Pipeline([("preprocessor", preprocessor), ("model", LGBMClassifier(n_estimators=10, verbose=-1))])
+    return pipeline.fit(data, target), data
+
+
+def test_reason_code_explainer(fitted_pipeline: tuple[Pipeline, pd.DataFrame]) -> None:  # noqa: D103
+    pipeline, data = fitted_pipeline
+    preprocessor = pipeline.named_steps["preprocessor"]
+
+    reason_codes = ReasonCodeExplainer(pipeline, top_k=2, batch_size=128)(data)
+
+    contributions = pipeline.named_steps["model"].booster_.predict(preprocessor.transform(data), pred_contrib=True)
+    expected_indices, expected_values = top_k_contributions(contributions[:, :-1], 2)
+    feature_names = preprocessor.get_feature_names_out()
+    npt.assert_array_equal(reason_codes.columns, ["reason_1", "reason_1_shap", "reason_2", "reason_2_shap"])
+    npt.assert_array_equal(reason_codes["reason_1"], feature_names[expected_indices[:, 0]])
+    npt.assert_allclose(reason_codes["reason_2_shap"], expected_values[:, 1], rtol=1e-6)
+
+
+def test_path_reason_codes(fitted_pipeline: tuple[Pipeline, pd.DataFrame]) -> None:  # noqa: D103
+    pipeline, data = fitted_pipeline
+    booster = pipeline.named_steps["model"].booster_
+    x_transformed = pipeline.named_steps["preprocessor"].transform(data)
+    root_values = sum(tree["tree_structure"]["internal_value"] for tree in booster.dump_model()["tree_info"])
+
+    contributions = ReasonCodeExplainer(pipeline, method="path").contributions(x_transformed)
+
+    npt.assert_allclose(contributions.sum(axis=1) + root_values, booster.predict(x_transformed, raw_score=True))
+
+
+def test_path_reason_codes_stumps(fitted_pipeline: tuple[Pipeline, pd.DataFrame]) -> None:  # noqa: D103
+    pipeline, data = fitted_pipeline
+    pipeline = clone(pipeline).set_params(model__min_child_samples=400).fit(data, data["Age"] > 40)
+    booster = pipeline.named_steps["model"].booster_
+    npt.assert_array_equal([tree["num_leaves"] for tree in booster.dump_model()["tree_info"]], 1)
+
+    explainer = ReasonCodeExplainer(pipeline, method="path")
+    contributions = explainer.contributions(pipeline.named_steps["preprocessor"].transform(data))
+
+    npt.assert_array_equal(contributions, 0.0)
+    npt.assert_equal(len(explainer(data)), len(data))
+
+
+@pytest.mark.parametrize("method", ["treeshap", "path"])
+def test_mixture_reason_codes(fitted_pipeline: tuple[Pipeline, pd.DataFrame], method: str) -> None:  # noqa: D103
+    pipeline, data = fitted_pipeline
+    other = clone(pipeline).set_params(model__n_estimators=5).fit(data, data["Age"] > 30)
+    mixture = MixtureClassifier([pipeline, other], np.array([0.25, 0.75]))
+    single = [ReasonCodeExplainer(predictor, method=method).explain(data) for predictor in (pipeline, other)]
+
+    explainer = ReasonCodeExplainer(ThresholdedModel(mixture, 0.5), top_k=2, method=method)
+    reason_codes = explainer(data)
+
+    contributions = 0.25 * single[0] + 0.75 * single[1]
+    npt.assert_allclose(explainer.explain(data), contributions)
+    expected_indices, expected_values = top_k_contributions(contributions, 2)
+    npt.assert_array_equal(reason_codes["reason_1"], explainer.feature_names[expected_indices[:, 0]])
+    npt.assert_allclose(reason_codes["reason_2_shap"], expected_values[:, 1], rtol=1e-6)
+
+
+def test_valueerror_reason_code_explainer(fitted_pipeline: tuple[Pipeline, pd.DataFrame]) -> None:  # noqa: D103
+    with pytest.raises(ValueError):
+        ReasonCodeExplainer(fitted_pipeline[0], method="lime")
+    with pytest.raises(ValueError, match="Cannot explain a DummyClassifier"):
+        ReasonCodeExplainer(MixtureClassifier([DummyClassifier()], np.array([1.0])))
@@ -0,0 +1,53 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import numpy as np
+import numpy.testing as npt
+import pandas as pd
+
+from lib.serving import MicroBatcher
+
+
+def test_micro_batcher() -> None:  # noqa: D103
+    batch_sizes = []
+
+    def predict(data: pd.DataFrame) -> np.ndarray:
+        batch_sizes.append(len(data))
+        return data["Age"].to_numpy() * 2
+
+    batcher = MicroBatcher(predict, max_batch_size=64, max_wait_ms=50)
+    requests = [pd.DataFrame({"Age": np.arange(start, start + 3)}) for start in range(0, 60, 3)]
+    with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+        predictions = list(executor.map(batcher.submit, requests))
+    for request, prediction in zip(requests, predictions, strict=True):
+        npt.assert_array_equal(prediction, request["Age"].to_numpy() * 2)
+    npt.assert_array_less(len(batch_sizes), len(requests))
+    npt.assert_equal(sum(batch_sizes), 60)
+
+
+def test_micro_batcher_error() -> None:  # noqa: D103
+    def predict(data: pd.DataFrame) -> np.ndarray:
+        raise ValueError(f"Unexpected columns {list(data.columns)}")
+
+    batcher = MicroBatcher(predict)
+    with pytest.raises(ValueError):
+        batcher.submit(pd.DataFrame({"Age": [1]}))
+
+
+def test_micro_batcher_isolates_failing_request() -> None:  # noqa: D103
+    def predict(data: pd.DataFrame) -> np.ndarray:
+        return data["a"].astype(float).to_numpy() * 2
+
+    batcher = MicroBatcher(predict, max_batch_size=64, max_wait_ms=200)
+    requests = [pd.DataFrame({"a": [1, 2]}), pd.DataFrame({"a": ["not a number"]}), pd.DataFrame({"a": [3]})]
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(batcher.submit, data) for data in requests]
+    npt.assert_array_equal(futures[0].result(), [2.0, 4.0])
+    with pytest.raises(ValueError, match="could not convert"):
+        futures[1].result()
+    npt.assert_array_equal(futures[2].result(), [6.0])
@@ -0,0 +1,38 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import numpy as np
+import numpy.testing as npt
+
+from lib.shap_artifacts import load_shap_summary, load_shap_values, save_shap_values
+
+FEATURE_NAMES = ["cat__Gender_Male", "remainder__Age", "remainder__Value"]
+
+
+def test_save_and_load_shap_values(tmp_path: str) -> None:  # noqa: D103
+    shap_values = np.array([[0.1, -2.0, 0.5], [-0.3, 1.0, 0.5], [0.2, 3.0, -0.5], [0.0, -1.0, 0.5]])
+
+    values_path, _ = save_shap_values(shap_values, FEATURE_NAMES, tmp_path)
+    loaded = load_shap_values(tmp_path)
+    loaded_columns = load_shap_values(values_path, columns=["remainder__Age"])
+
+    npt.assert_array_equal(loaded.columns, FEATURE_NAMES)
+    npt.assert_array_equal(loaded.dtypes, np.float32)
+    npt.assert_allclose(loaded.to_numpy(), shap_values, rtol=1e-6)
+    npt.assert_array_equal(loaded_columns.columns, ["remainder__Age"])
+    npt.assert_allclose(loaded_columns["remainder__Age"], shap_values[:, 1])
+    npt.assert_(not loaded["remainder__Age"].to_numpy().flags.writeable)
+
+
+def test_shap_summary(tmp_path: str) -> None:  # noqa: D103
+    shap_values = np.array([[0.1, -2.0, 0.5], [-0.3, 1.0, 0.5], [0.2, 3.0, -0.5], [0.0, -1.0, 0.5]])
+
+    save_shap_values(shap_values, FEATURE_NAMES, tmp_path)
+    summary = load_shap_summary(tmp_path)
+
+    npt.assert_equal(summary["n_rows"], 4)
+    npt.assert_array_equal(list(summary["features"]), ["remainder__Age", "remainder__Value", "cat__Gender_Male"])
+    npt.assert_allclose(summary["features"]["remainder__Age"]["mean_abs"], 1.75)
+    npt.assert_allclose(summary["features"]["remainder__Value"]["quantiles"]["0.5"], 0.5)
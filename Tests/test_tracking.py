@@ -0,0 +1,59 @@
+import os
+import sys
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import lightgbm as lgb
+import mlflow
+import numpy as np
+import numpy.testing as npt
+
+from lib.tracking import MAX_METRICS_PER_BATCH, MlflowMetricsLogger
+
+
+def test_mlflow_metrics_logger(tmp_path: str) -> None:  # noqa: D103
+    mlflow.set_tracking_uri(f"file://{tmp_path}")
+    mlflow.set_experiment("test_tracking")
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(300, 3))
+    y = (x[:, 0] > 0).astype(int)
+    train_set = lgb.Dataset(x[:200], label=y[:200])
+    valid_set = lgb.Dataset(x[200:], label=y[200:], reference=train_set)
+    params = {"objective": "binary", "metric": ["binary_logloss", "auc"], "verbose": -1}
+
+    with mlflow.start_run() as run:
+        metrics_logger = MlflowMetricsLogger(run.info.run_id, batch_size=4)
+        with mock.patch.object(
+            metrics_logger._client, "log_batch", wraps=metrics_logger._client.log_batch
+        ) as log_batch:
+            lgb.train(params, train_set, 10, valid_sets=[valid_set], valid_names=["valid"], callbacks=[metrics_logger])
+            metrics_logger.flush()
+
+    history = mlflow.MlflowClient().get_metric_history(run.info.run_id, "valid_auc")
+    npt.assert_equal(log_batch.call_count, 3)
+    npt.assert_array_equal([metric.step for metric in history], np.arange(10))
+    npt.assert_equal(len(mlflow.MlflowClient().get_metric_history(run.info.run_id, "valid_binary_logloss")), 10)
+
+
+def test_mlflow_metrics_logger_chunks(tmp_path: str) -> None:  # noqa: D103
+    mlflow.set_tracking_uri(f"file://{tmp_path}")
+    mlflow.set_experiment("test_tracking_chunks")
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(300, 3))
+    y = (x[:, 0] > 0).astype(int)
+    train_set = lgb.Dataset(x[:200], label=y[:200])
+    valid_set = lgb.Dataset(x[200:], label=y[200:], reference=train_set)
+    params = {"objective": "binary", "metric": ["binary_logloss", "auc"], "verbose": -1}
+
+    with mlflow.start_run() as run:
+        metrics_logger = MlflowMetricsLogger(run.info.run_id, batch_size=1000)
+        with mock.patch.object(
+            metrics_logger._client, "log_batch", wraps=metrics_logger._client.log_batch
+        ) as log_batch:
+            lgb.train(params, train_set, 600, valid_sets=[valid_set], valid_names=["valid"], callbacks=[metrics_logger])
+            metrics_logger.flush()
+
+    batch_sizes = [len(call.kwargs["metrics"]) for call in log_batch.call_args_list]
+    npt.assert_array_equal(batch_sizes, [MAX_METRICS_PER_BATCH, 200])
+    npt.assert_equal(len(mlflow.MlflowClient().get_metric_history(run.info.run_id, "valid_auc")), 600)
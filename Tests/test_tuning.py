@@ -0,0 +1,69 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import numpy as np
+import numpy.testing as npt
+
+from lib import tuning
+from lib.feature_store import write_feature_store
+from lib.tuning import best_trial, binning_key, halving_budgets, sample_candidates, successive_halving
+
+
+@pytest.mark.parametrize(
+    "min_resource, max_resource, reduction_factor, expected",
+    [(10, 270, 3, [10, 30, 90, 270]), (10, 100, 3, [10, 30, 90, 100]), (50, 50, 2, [50])],
+)
+def test_halving_budgets(  # noqa: D103
+    min_resource: int, max_resource: int, reduction_factor: int, expected: list[int]
+) -> None:
+    npt.assert_array_equal(halving_budgets(min_resource, max_resource, reduction_factor), expected)
+
+
+def test_sample_candidates() -> None:  # noqa: D103
+    search_space = {"learning_rate": [0.01, 0.1], "max_depth": [3, 5, 10]}
+    npt.assert_equal(len(sample_candidates(search_space, "grid", 0)), 6)
+    npt.assert_equal(len(sample_candidates(search_space, "random", 4)), 4)
+    with pytest.raises(ValueError):
+        sample_candidates(search_space, "bayesian", 4)
+    with pytest.raises(ValueError, match="num_trees"):
+        sample_candidates({**search_space, "num_trees": [100, 200]}, "grid", 0)
+
+
+def test_successive_halving(tmp_path: str) -> None:  # noqa: D103
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(600, 3))
+    y = (x[:, 0] + 0.5 * rng.normal(size=600) > 0).astype(int)
+    candidates = [{"learning_rate": 1e-6}, {"learning_rate": 0.1}, {"learning_rate": 1e-5}]
+    base_params = {"objective": "binary", "verbose": -1, "min_data_in_leaf": 5}
+
+    matrices = {"x_train": x[:400], "y_train": y[:400], "x_valid": x[400:], "y_valid": y[400:]}
+    feature_store = write_feature_store(os.path.join(tmp_path, "features"), matrices)
+
+    trials = successive_halving(candidates, feature_store, base_params, 5, 15, 3, n_workers=2)
+
+    npt.assert_array_equal([trial.pruned_at for trial in trials], [5, None, 5])
+    npt.assert_array_equal(list(trials[1].scores), [5, 15])
+    npt.assert_equal(best_trial(trials).params, {"learning_rate": 0.1})
+
+
+def test_binned_train_sets(tmp_path: str, capfd: pytest.CaptureFixture) -> None:  # noqa: D103
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(600, 3))
+    y = (x[:, 0] > 0).astype(int)
+    matrices = {"x_train": x[:400], "y_train": y[:400], "x_valid": x[400:], "y_valid": y[400:]}
+    feature_store = write_feature_store(os.path.join(tmp_path, "features"), matrices)
+    base_params = {"objective": "binary", "verbose": -1, "max_bin": 255}
+    candidates = [{"max_bin": 15}, {"learning_rate": 0.05}, {"max_bin": 15, "learning_rate": 0.2}, {"max_bin": 63}]
+
+    tuning._init_search_worker(feature_store, base_params)
+    scores = [tuning._evaluate_candidate(params, 5)[0] for params in candidates]
+
+    train_sets = tuning._worker_data[-1]
+    npt.assert_equal(binning_key({"max_bin": 15, "learning_rate": 0.2}), (("max_bin", 15),))
+    npt.assert_equal(sorted(key for (key,) in train_sets), [("max_bin", 15), ("max_bin", 63), ("max_bin", 255)])
+    npt.assert_("Cannot change" not in "".join(capfd.readouterr()))
+    npt.assert_(all(0.5 < score <= 1 for score in scores))
@@ -0,0 +1,117 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from loguru import logger
+from scipy import sparse
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+
+from lib.feature_store import FeatureStore, write_feature_store
+
+CV_STRATEGIES = ("stratified", "time")
+
+
+def make_folds(
+    x: pd.DataFrame,
+    y: pd.Series,
+    strategy: str = "stratified",
+    n_splits: int = 5,
+    random_state: int = 0,
+    time_column: str = "CalYear",
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Build the train and validation row positions of cross-validation folds.
+
+    Args:
+        x (pd.DataFrame): The features.
+        y (pd.Series): The target.
+        strategy (str): One of "stratified" (shuffled folds preserving the target rate) or "time" (each of the last
+            `n_splits` values of `time_column` is validated on, training on the rows of earlier values).
+        n_splits (int): The number of folds.
+        random_state (int): Seed of the shuffling in "stratified" strategy.
+        time_column (str): The column ordering rows in time in "time" strategy.
+
+    Returns:
+        list: The (train positions, validation positions) of each fold.
+
+    Raises:
+        ValueError: If the strategy is unknown, or if there are not enough time periods for the folds.
+    """
+    if strategy not in CV_STRATEGIES:
+        raise ValueError(f"Unknown cross-validation strategy '{strategy}', expected one of {CV_STRATEGIES}")
+    if strategy == "stratified":
+        return list(StratifiedKFold(n_splits, shuffle=True, random_state=random_state).split(x, y))
+    periods = np.sort(x[time_column].unique())
+    if len(periods) <= n_splits:
+        raise ValueError(f"{len(periods)} values of {time_column} cannot make {n_splits} time folds")
+    time_values = x[time_column].to_numpy()
+    return [
+        (np.flatnonzero(time_values < period), np.flatnonzero(time_values == period)) for period in periods[-n_splits:]
+    ]
+
+
+def calculate_fold_metrics(y_true: np.ndarray, y_proba: np.ndarray) -> dict[str, float]:
+    """Calculate the evaluation metrics of a fold from predicted probabilities."""
+    y_pred = (y_proba > 0.5).astype(int)
+    return {
+        "accuracy": float(accuracy_score(y_true, y_pred)),
+        "precision": float(precision_score(y_true, y_pred, zero_division=0)),
+        "recall": float(recall_score(y_true, y_pred, zero_division=0)),
+        "f1": float(f1_score(y_true, y_pred, zero_division=0)),
+        "roc_auc": float(roc_auc_score(y_true, y_proba)),
+    }
+
+
+_worker_data = None
+
+
+def _init_cv_worker(feature_store: FeatureStore, params: dict) -> None:
+    global _worker_data
+    _worker_data = (feature_store.load("x"), feature_store.load("y"), params)
+
+
+def _train_fold(train_rows: np.ndarray, valid_rows: np.ndarray) -> tuple[dict[str, float], np.ndarray]:
+    x, y, params = _worker_data
+    booster = lgb.train(params, lgb.Dataset(x[train_rows], label=y[train_rows], params=params))
+    y_proba = booster.predict(x[valid_rows])
+    return calculate_fold_metrics(y[valid_rows], y_proba), y_proba
+
+
+def cross_validate(
+    x_transformed: np.ndarray | sparse.csr_matrix,
+    y: pd.Series,
+    folds: list[tuple[np.ndarray, np.ndarray]],
+    params: dict,
+    n_workers: int | None = None,
+) -> tuple[pd.DataFrame, np.ndarray]:
+    """Train and evaluate a LightGBM model on each fold, folds being trained concurrently over a process pool.
+
+    The preprocessed feature matrix is written to a temporary `FeatureStore` once, every worker memory-mapping it
+    and reading its folds from it.
+
+    Args:
+        x_transformed (np.ndarray | sparse.csr_matrix): The preprocessed features.
+        y (pd.Series): The target.
+        folds (list): The (train positions, validation positions) of each fold, see `make_folds`.
+        params (dict): The LightGBM training parameters.
+        n_workers (int | None): The number of worker processes, defaults to the number of CPUs.
+
+    Returns:
+        tuple: A tuple containing the metrics of each fold and the out-of-fold predicted probabilities, NaN for
+        rows never validated on.
+    """
+    y = np.asarray(y)
+    n_workers = min(n_workers or os.cpu_count() or 1, len(folds))
+    with tempfile.TemporaryDirectory() as store_dir:
+        feature_store = write_feature_store(os.path.join(store_dir, "features"), {"x": x_transformed, "y": y})
+        with ProcessPoolExecutor(n_workers, initializer=_init_cv_worker, initargs=(feature_store, params)) as executor:
+            results = list(executor.map(_train_fold, *zip(*folds, strict=True)))
+    oof_predictions = np.full(len(y), np.nan)
+    for (_, valid_rows), (_, y_proba) in zip(folds, results, strict=True):
+        oof_predictions[valid_rows] = y_proba
+    fold_metrics = pd.DataFrame([metrics for metrics, _ in results])
+    logger.info(f"Cross-validated {len(folds)} folds:\n{fold_metrics.agg(['mean', 'std']).T}")
+    return fold_metrics, oof_predictions
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+from loguru import logger
+
+from lib.data_loading import read_data
+from lib.data_preprocessing import preprocess_data
+from lib.data_schema import validate_schemas
+
+DEFAULT_CACHE_DIR = "./data/cache"
+CACHE_FORMAT_VERSION = 1
+_HASH_BLOCK_SIZE = 1 << 20
+EXHAUSTIVE_VALIDATION_MODES = ("full", "parallel")
+
+
+def fingerprint_data(path: str, columns_to_drop: list, target_col_name: str) -> str:
+    """Compute a fingerprint of a data file and of the parameters used to preprocess it.
+
+    Args:
+        path (str): The file path to the CSV file.
+        columns_to_drop (list): The list of columns to drop, not including the target column.
+        target_col_name (str): The name of the target column.
+
+    Returns:
+        str: The hexadecimal fingerprint.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while block := f.read(_HASH_BLOCK_SIZE):
+            digest.update(block)
+    params = {
+        "columns_to_drop": list(columns_to_drop),
+        "target_col_name": target_col_name,
+        "format_version": CACHE_FORMAT_VERSION,
+    }
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def load_cached_data(fingerprint: str, target_col_name: str, cache_dir: str = DEFAULT_CACHE_DIR) -> tuple | None:
+    """Load validated features and target from the cache.
+
+    Args:
+        fingerprint (str): The fingerprint of the data, as returned by `fingerprint_data`.
+        target_col_name (str): The name of the target column.
+        cache_dir (str): The cache directory.
+
+    Returns:
+        tuple | None: A tuple containing the features (x), the target (y) and the cache metadata, or None on a miss.
+    """
+    data_path = os.path.join(cache_dir, f"{fingerprint}.parquet")
+    metadata_path = os.path.join(cache_dir, f"{fingerprint}.json")
+    if not (os.path.exists(data_path) and os.path.exists(metadata_path)):
+        return None
+    with open(metadata_path) as f:
+        metadata = json.load(f)
+    df = pd.read_parquet(data_path)
+    x = df.drop(columns=[target_col_name])
+    y = df[target_col_name]
+    logger.info(f"Loaded cached data {fingerprint}.")
+    return x, y, metadata
+
+
+def save_cached_data(
+    x: pd.DataFrame, y: pd.Series, fingerprint: str, metadata: dict, cache_dir: str = DEFAULT_CACHE_DIR
+) -> None:
+    """Save validated features and target to the cache.
+
+    Files are written under a temporary name and moved into place, so an interrupted write is never read as a hit.
+
+    Args:
+        x (pd.DataFrame): The validated features.
+        y (pd.Series): The validated target.
+        fingerprint (str): The fingerprint of the data, as returned by `fingerprint_data`.
+        metadata (dict): Additional information to store alongside the data.
+        cache_dir (str): The cache directory.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    data_path = os.path.join(cache_dir, f"{fingerprint}.parquet")
+    metadata_path = os.path.join(cache_dir, f"{fingerprint}.json")
+    x.assign(**{y.name: y}).to_parquet(data_path + ".tmp", index=False)
+    os.replace(data_path + ".tmp", data_path)
+    with open(metadata_path + ".tmp", "w") as f:
+        json.dump(metadata, f)
+    os.replace(metadata_path + ".tmp", metadata_path)
+    logger.info(f"Cached data {fingerprint}.")
+
+
+def load_preprocessed_data(
+    path: str,
+    columns_to_drop: list,
+    target_col_name: str,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    validation_mode: str = "full",
+) -> tuple[pd.DataFrame, pd.Series, str, dict]:
+    """Read, preprocess and validate data, going through the cache.
+
+    Args:
+        path (str): The file path to the CSV file.
+        columns_to_drop (list): The list of columns to drop, not including the target column.
+        target_col_name (str): The name of the target column.
+        cache_dir (str): The cache directory.
+        validation_mode (str): The mode used to validate data on a cache miss, see `validate_schemas`.
+
+    Cached data is only reused when it was validated on every row (see `EXHAUSTIVE_VALIDATION_MODES`) or in the
+    requested mode, so data cached after a sampled validation is validated again when a full one is requested.
+
+    Returns:
+        tuple: A tuple containing the validated features (x), the validated target (y), the data fingerprint and
+        the cache metadata (with the raw `dataset_size` and the `validation_mode`).
+    """
+    fingerprint = fingerprint_data(path, columns_to_drop, target_col_name)
+    cached = load_cached_data(fingerprint, target_col_name, cache_dir)
+    if cached is not None:
+        x, y, metadata = cached
+        cached_mode = metadata.get("validation_mode")
+        if cached_mode in EXHAUSTIVE_VALIDATION_MODES or cached_mode == validation_mode:
+            return x, y, fingerprint, metadata
+        logger.info(f"Cached data {fingerprint} was validated in {cached_mode} mode, validating it again.")
+    data = read_data(path)
+    metadata = {"dataset_size": len(data), "validation_mode": validation_mode}
+    x, y = preprocess_data(data, columns_to_drop, target_col_name)
+    validated_x, validated_y = validate_schemas(x, y, mode=validation_mode)
+    save_cached_data(validated_x, validated_y, fingerprint, metadata, cache_dir)
+    return validated_x, validated_y, fingerprint, metadata
@@ -1,5 +1,12 @@
+from collections.abc import Iterator
+
 import pandas as pd
 from loguru import logger
+from pandas.api.types import is_integer_dtype, union_categoricals
+
+from lib.data_schema import INPUT_SCHEMA
+
+DEFAULT_CHUNKSIZE = 100_000
 
 
 def download_data() -> None:
@@ -8,16 +15,80 @@ def download_data() -> None:
     pass
 
 
-def read_data(path: str) -> pd.DataFrame:
+def get_input_dtypes() -> tuple[dict, list]:
+    """Derive read dtypes from INPUT_SCHEMA.
+
+    String columns of the schema are read as categoricals. Integer columns are left to the parser, as the raw
+    extracts may contain inconsistent values, and are downcast once parsed.
+
+    Returns:
+        tuple: A tuple containing the dtypes to pass to the CSV parser and the list of integer columns to downcast.
+    """
+    dtypes = {}
+    integer_columns = []
+    for name, column in INPUT_SCHEMA.columns.items():
+        if str(column.dtype) == "str":
+            dtypes[name] = "category"
+        elif is_integer_dtype(column.dtype.type):
+            integer_columns.append(name)
+    return dtypes, integer_columns
+
+
+def stream_data(path: str, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    """Stream data from a CSV file as typed DataFrame chunks.
+
+    Args:
+        path (str): The file path to the CSV file.
+        chunksize (int): The number of rows per chunk.
+
+    Yields:
+        pd.DataFrame: The next chunk of rows, with categorical columns and downcast integer columns.
+    """
+    dtypes, integer_columns = get_input_dtypes()
+    with pd.read_csv(path, dtype=dtypes, chunksize=chunksize) as reader:
+        for chunk in reader:
+            for column in integer_columns:
+                if column in chunk.columns and is_integer_dtype(chunk[column]):
+                    chunk[column] = pd.to_numeric(chunk[column], downcast="integer")
+            yield chunk
+
+
+def concat_chunks(chunks: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate typed chunks into one DataFrame, keeping categorical columns categorical.
+
+    Args:
+        chunks (list[pd.DataFrame]): The chunks to concatenate, as yielded by `stream_data`.
+
+    Returns:
+        pd.DataFrame: The concatenated DataFrame.
+    """
+    if len(chunks) == 1:
+        return chunks[0]
+    categorical_columns = [name for name, dtype in chunks[0].dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+    unified = {
+        column: union_categoricals([chunk[column] for chunk in chunks], ignore_order=True).categories
+        for column in categorical_columns
+    }
+    for chunk in chunks:
+        for column, categories in unified.items():
+            chunk[column] = chunk[column].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def read_data(path: str, chunksize: int = DEFAULT_CHUNKSIZE) -> pd.DataFrame:
     """Read data from a CSV file into a DataFrame.
 
+    The file is parsed chunk by chunk with the dtypes derived from INPUT_SCHEMA, so the untyped
+    int64/object frame is never materialized.
+
     Args:
         path (str): The file path to the CSV file.
+        chunksize (int): The number of rows parsed at once.
 
     Returns:
         pd.DataFrame: The DataFrame containing the data from the CSV file.
     """
-    df = pd.read_csv(path)
+    df = concat_chunks(list(stream_data(path, chunksize)))
     logger.info("Successfully read data.")
-    logger.info("Dataframe contains {df.shape[0]} rows and {df.shape[1]} columns")
+    logger.info(f"Dataframe contains {df.shape[0]} rows and {df.shape[1]} columns")
     return df
@@ -1,7 +1,11 @@
+import numpy as np
 import pandas as pd
 from loguru import logger
 from sklearn.model_selection import train_test_split
 
+SPLIT_MODES = ("random", "hash")
+DEFAULT_SPLIT_KEY = ("PolNum",)
+
 
 def create_target(df: pd.DataFrame, target_col_name: str) -> pd.DataFrame:
     """Create a target column in the DataFrame based on 'Numtppd' column.
@@ -22,20 +26,68 @@ def create_target(df: pd.DataFrame, target_col_name: str) -> pd.DataFrame:
     if "Numtppd" not in df.columns:
         logger.error("Column 'Numtppd' not found in DataFrame.")
         raise KeyError("Column 'Numtppd' not found in DataFrame")
-    df[target_col_name] = df["Numtppd"].apply(lambda x: 1 if x != 0 else 0)
+    df[target_col_name] = (df["Numtppd"] != 0).astype(int)
     logger.info("Successfully created Target Column.")
     return df
 
 
-def most_common_dtype(column: pd.DataFrame) -> type:
-    """Return the most common data type in a column."""
-    return column.apply(type).mode()[0]
+def classify_value_types(column: pd.Series) -> tuple[np.ndarray, list[type]]:
+    """Classify the Python type of every value of a column in bulk.
+
+    Columns backed by a numeric NumPy dtype hold a single type and are classified without touching the values.
+    Categorical columns are classified through their categories, missing values getting no type.
+
+    Args:
+        column (pd.Series): The column to classify.
+
+    Returns:
+        tuple: A tuple containing the type code of every value (-1 for values without a type) and the list of
+        types indexed by code, in order of first appearance.
+    """
+    if column.dtype.kind in "biufc":
+        return np.zeros(len(column), dtype=np.intp), [type(column.dtype.type(0).item())]
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        category_codes, types = pd.factorize(np.array([type(value) for value in column.cat.categories], dtype=object))
+        codes = np.where(column.cat.codes.to_numpy() >= 0, category_codes[column.cat.codes.to_numpy()], -1)
+        return codes, list(types)
+    values = column.to_numpy(dtype=object)
+    codes, types = pd.factorize(np.fromiter(map(type, values), dtype=object, count=len(values)))
+    return codes, list(types)
+
+
+def filter_uncommon_datatype(df: pd.DataFrame) -> tuple[pd.DataFrame, dict[str, int]]:
+    """Filter rows holding an uncommon data type in any column, in a single pass.
+
+    Columns are processed in order, the most common type of each column being computed on the rows kept by the
+    previous columns, with ties going to the type seen first. Rows are only sliced once, at the end.
+
+    Args:
+        df (pd.DataFrame): The input DataFrame.
+
+    Returns:
+        tuple: A tuple containing the filtered DataFrame and the number of rows rejected by each column.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    rejected = {}
+    for column in df.columns:
+        codes, types = classify_value_types(df[column])
+        kept_codes = codes[mask]
+        counts = np.bincount(kept_codes[kept_codes >= 0], minlength=len(types))
+        if counts.any():
+            candidates = np.flatnonzero(counts == counts.max())
+            first_seen = [np.argmax(kept_codes == code) for code in candidates]
+            column_mask = codes == candidates[np.argmin(first_seen)]
+        else:
+            column_mask = np.zeros(len(df), dtype=bool)
+        rejected[column] = int(np.count_nonzero(mask & ~column_mask))
+        mask &= column_mask
+    return df[mask], rejected
 
 
 def remove_uncommon_datatype(df: pd.DataFrame) -> pd.DataFrame:
     """Remove uncommon data types from DataFrame.
 
-    This function removes uncommon data types from the DataFrame.
+    This function removes the rows holding a value whose type is not the most common one of its column.
 
     Args:
         df (pd.DataFrame): The input DataFrame.
@@ -43,10 +95,10 @@ def remove_uncommon_datatype(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: The DataFrame with uncommon data types removed.
     """
-    # Function to filter rows with inconsistent data types in the entire DataFrame
-    for column in df.columns:
-        common_dtype = most_common_dtype(df[column])
-        df = df[df[column].apply(type) == common_dtype]
+    df, rejected = filter_uncommon_datatype(df)
+    for column, count in rejected.items():
+        if count:
+            logger.info(f"Removed {count} rows with an uncommon datatype in column '{column}'.")
     return df
 
 
@@ -99,27 +151,61 @@ def preprocess_data(df: pd.DataFrame, columns_to_drop: list, target_col_name: st
     return x, y
 
 
+def hash_split_mask(x: pd.DataFrame, train_size: float, key_columns: tuple[str, ...] = DEFAULT_SPLIT_KEY) -> np.ndarray:
+    """Assign rows to the training set by hashing their key.
+
+    The hash of a key only depends on its values, not on the other rows nor on the integer width it was read with,
+    so chunks of a stream can be assigned one at a time and rows keep their assignment across reruns and data
+    refreshes. All the rows sharing a key are assigned to the same set.
+
+    Args:
+        x (pd.DataFrame): The input features, holding the key columns.
+        train_size (float): The expected proportion of keys assigned to the training set.
+        key_columns (tuple[str, ...]): The columns identifying a row, e.g. ("PolNum", "CalYear") to assign each year
+            of a policy on its own rather than every year of a policy to the same set.
+
+    Returns:
+        np.ndarray: Whether each row is assigned to the training set.
+    """
+    hashes = pd.util.hash_pandas_object(x[list(key_columns)], index=False).to_numpy()
+    return (hashes >> np.uint64(11)) * 2.0**-53 < train_size
+
+
 def split_data(
     x: pd.DataFrame,
     y: pd.DataFrame,
     train_size: float,
     random_state: int,
+    mode: str = "random",
+    key_columns: tuple[str, ...] = DEFAULT_SPLIT_KEY,
 ) -> tuple[pd.DataFrame, pd.Series, pd.DataFrame, pd.Series]:
     """Split the input DataFrame into training and testing sets based on the provided ratio.
 
     This function splits the input features (x) and the corresponding target values (y) into training and testing sets
-    according to the specified train_size and random_state parameters.
+    according to the specified train_size and random_state parameters. In "hash" mode, rows are assigned by hashing
+    their key columns instead of shuffling, see `hash_split_mask`, random_state being unused.
 
     Args:
         x (pd.DataFrame): The input features.
         y (pd.DataFrame): The target values,
         train_size (float, optional): The proportion of the dataset to include in the train split.
         random_state (int, optional): Controls the shuffling applied to the data before applying the split.
+        mode (str): One of "random" or "hash".
+        key_columns (tuple[str, ...]): The columns hashed in "hash" mode.
 
     Returns:
         tuple: A tuple containing the training features (x_train), testing features (x_test),
         training target values (y_train), and testing target values (y_test).
+
+    Raises:
+        ValueError: If the split mode is unknown.
     """
-    x_train, x_test, y_train, y_test = train_test_split(x, y, train_size=train_size, random_state=random_state)
+    if mode not in SPLIT_MODES:
+        raise ValueError(f"Unknown split mode '{mode}', expected one of {SPLIT_MODES}")
+    if mode == "random":
+        x_train, x_test, y_train, y_test = train_test_split(x, y, train_size=train_size, random_state=random_state)
+    else:
+        is_train = hash_split_mask(x, train_size, key_columns)
+        x_train, x_test, y_train, y_test = x[is_train], x[~is_train], y[is_train], y[~is_train]
     logger.info("Successfully separated train and test data")
     return x_train, x_test, y_train, y_test
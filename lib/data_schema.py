@@ -1,15 +1,20 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 from loguru import logger
 from pandera import Check, Column, DataFrameSchema, SeriesSchema
+from pandera.errors import SchemaErrors
 
 INPUT_SCHEMA = DataFrameSchema(
     {
         "PolNum": Column(int),
         "CalYear": Column(int),
-        "Gender": Column(str, Check.isnin(["Male", "Female"])),
+        "Gender": Column(str, Check.isin(["Male", "Female"])),
         "Type": Column(str, Check.isin(["C", "E", "D", "B", "A", "F"])),
-        "Category": Column(str, Check.isnin(["Large", "Medium", "Small"])),
-        "Age": Column(int, Check.greater_thanor_equal_to(0)),
+        "Category": Column(str, Check.isin(["Large", "Medium", "Small"])),
+        "Age": Column(int, Check.greater_than_or_equal_to(0)),
         "Group1": Column(int),
         "Bonus": Column(int),
         "Poldur": Column(int, Check.greater_than_or_equal_to(0)),
@@ -31,11 +36,144 @@ TARGET_SCHEMA = SeriesSchema(
     name="target",
 )
 
+VALIDATION_MODES = ("full", "parallel", "sampled")
+
+
+def get_dtype_schema(schema: DataFrameSchema) -> DataFrameSchema:
+    """Return a copy of the schema without its element-wise checks, only checking columns and dtypes."""
+    return schema.update_columns({name: {"checks": []} for name in schema.columns})
+
+
+def run_column_checks(x: pd.DataFrame) -> tuple[pd.DataFrame, dict[str, float]]:
+    """Run the element-wise checks of INPUT_SCHEMA on an already coerced DataFrame, one column at a time.
+
+    Args:
+        x (pd.DataFrame): The coerced input DataFrame.
+
+    Returns:
+        tuple: A tuple containing the failure cases and the time spent on each column's checks, in seconds.
+    """
+    failure_cases = []
+    timings = {}
+    for name, column in INPUT_SCHEMA.columns.items():
+        if not column.checks:
+            continue
+        start = time.perf_counter()
+        try:
+            column.validate(x, lazy=True)
+        except SchemaErrors as e:
+            failure_cases.append(e.failure_cases)
+        timings[name] = time.perf_counter() - start
+    failure_cases = pd.concat(failure_cases, ignore_index=True) if failure_cases else pd.DataFrame()
+    return failure_cases, timings
+
+
+def _raise_failures(x: pd.DataFrame, failure_cases: pd.DataFrame) -> None:
+    """Raise the pandera SchemaErrors of INPUT_SCHEMA for the rows listed in the failure cases."""
+    failing_index = failure_cases["index"].dropna().unique()
+    logger.error(f"INPUT_SCHEMA validation failed on {len(failing_index)} rows.")
+    INPUT_SCHEMA.validate(x.loc[failing_index], lazy=True)
+
+
+def _log_timings(timings: dict[str, float]) -> None:
+    """Log the time spent on each check."""
+    for name, duration in timings.items():
+        logger.info(f"INPUT_SCHEMA check '{name}' took {duration:.3f}s.")
+
+
+def validate_input_parallel(x: pd.DataFrame, n_workers: int | None = None) -> pd.DataFrame:
+    """Validate input data against INPUT_SCHEMA, running the element-wise checks over chunks in worker processes.
+
+    Columns and dtypes are checked and coerced on the whole DataFrame in the main process.
+
+    Args:
+        x (pd.DataFrame): The input DataFrame.
+        n_workers (int | None): The number of worker processes, defaults to the number of CPUs.
+
+    Returns:
+        pd.DataFrame: The validated DataFrame.
+
+    Raises:
+        SchemaErrors: If any check fails, listing the failures of every chunk.
+    """
+    start = time.perf_counter()
+    validated_x = get_dtype_schema(INPUT_SCHEMA).validate(x)
+    timings = {"dtypes": time.perf_counter() - start}
+    n_workers = n_workers or os.cpu_count() or 1
+    chunk_size = max(1, -(-len(validated_x) // n_workers))
+    chunks = [validated_x.iloc[offset : offset + chunk_size] for offset in range(0, len(validated_x), chunk_size)]
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        results = list(executor.map(run_column_checks, chunks))
+    for _, chunk_timings in results:
+        for name, duration in chunk_timings.items():
+            timings[name] = timings.get(name, 0.0) + duration
+    _log_timings(timings)
+    failure_cases = [chunk_failure_cases for chunk_failure_cases, _ in results if len(chunk_failure_cases)]
+    if failure_cases:
+        _raise_failures(x, pd.concat(failure_cases, ignore_index=True))
+    return validated_x
+
+
+def validate_input_sampled(x: pd.DataFrame, sample_fraction: float, random_state: int = 0) -> pd.DataFrame:
+    """Validate input data against INPUT_SCHEMA, running the element-wise checks on a sample of rows only.
+
+    Columns and dtypes are always checked and coerced on the whole DataFrame.
+
+    Args:
+        x (pd.DataFrame): The input DataFrame.
+        sample_fraction (float): The fraction of rows to run the element-wise checks on.
+        random_state (int): Seed of the row sampling.
+
+    Returns:
+        pd.DataFrame: The validated DataFrame.
+
+    Raises:
+        SchemaErrors: If any check fails on the sampled rows.
+    """
+    start = time.perf_counter()
+    validated_x = get_dtype_schema(INPUT_SCHEMA).validate(x)
+    timings = {"dtypes": time.perf_counter() - start}
+    sample = validated_x.sample(frac=sample_fraction, random_state=random_state)
+    failure_cases, check_timings = run_column_checks(sample)
+    _log_timings({**timings, **check_timings})
+    if len(failure_cases):
+        _raise_failures(x, failure_cases)
+    return validated_x
+
+
+def validate_schemas(
+    x: pd.DataFrame,
+    y: pd.Series,
+    mode: str = "full",
+    sample_fraction: float = 0.1,
+    n_workers: int | None = None,
+) -> tuple:
+    """Validate input and target dataframes againts their respective schemas.
+
+    Args:
+        x (pd.DataFrame): The input DataFrame.
+        y (pd.Series): The target Series.
+        mode (str): One of "full" (every check on every row), "parallel" (element-wise checks over chunks in worker
+            processes) or "sampled" (element-wise checks on `sample_fraction` of the rows).
+        sample_fraction (float): The fraction of rows checked in "sampled" mode.
+        n_workers (int | None): The number of worker processes in "parallel" mode.
+
+    Returns:
+        tuple: A tuple containing the validated input and target.
 
-def validate_schemas(x: pd.DataFrame, y: pd.Series) -> tuple:
-    """Validate input and target dataframes againts their respective schemas."""
-    validated_x = INPUT_SCHEMA.validate(x)
-    logger.info("Successfully validated INPUT_SCHEMA.")
+    Raises:
+        ValueError: If the validation mode is unknown.
+    """
+    if mode not in VALIDATION_MODES:
+        raise ValueError(f"Unknown validation mode '{mode}', expected one of {VALIDATION_MODES}")
+    start = time.perf_counter()
+    if mode == "parallel":
+        validated_x = validate_input_parallel(x, n_workers)
+    elif mode == "sampled":
+        validated_x = validate_input_sampled(x, sample_fraction)
+    else:
+        validated_x = INPUT_SCHEMA.validate(x)
+    logger.info(f"Successfully validated INPUT_SCHEMA in {mode} mode ({time.perf_counter() - start:.3f}s).")
     validated_y = TARGET_SCHEMA.validate(y)
     logger.info("Successfully validated TARGET_SCHEMA.")
     return validated_x, validated_y
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from lightgbm import LGBMClassifier
+from loguru import logger
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import LabelEncoder
+
+DEFAULT_DATASET_CACHE_DIR = "./data/cache/datasets"
+BINNING_PARAMS = (
+    "max_bin",
+    "max_bin_by_feature",
+    "min_data_in_bin",
+    "bin_construct_sample_cnt",
+    "subsample_for_bin",
+    "min_data_in_leaf",
+    "min_child_samples",
+    "feature_pre_filter",
+    "use_missing",
+    "zero_as_missing",
+    "categorical_feature",
+    "categorical_column",
+    "linear_tree",
+    "data_random_seed",
+    "seed",
+    "random_state",
+)
+
+
+def fingerprint_dataset(x: pd.DataFrame, y: pd.Series, feature_names: list[str], params: dict) -> str:
+    """Compute a fingerprint of training rows, of the features they are preprocessed into and of binning params.
+
+    Args:
+        x (pd.DataFrame): The training features, before preprocessing.
+        y (pd.Series): The training target.
+        feature_names (list[str]): The names of the preprocessed features.
+        params (dict): The LightGBM parameters, only those affecting binning being used.
+
+    Returns:
+        str: The hexadecimal fingerprint.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(pd.util.hash_pandas_object(x, index=False).to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(y, index=False).to_numpy().tobytes())
+    metadata = {
+        "dtypes": x.dtypes.astype(str).tolist(),
+        "feature_names": [str(name) for name in feature_names],
+        "params": {name: params[name] for name in BINNING_PARAMS if name in params},
+        "lightgbm_version": lgb.__version__,
+    }
+    digest.update(json.dumps(metadata, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def load_binned_dataset(
+    x: pd.DataFrame,
+    y: pd.Series,
+    preprocessor: ColumnTransformer,
+    params: dict,
+    cache_dir: str = DEFAULT_DATASET_CACHE_DIR,
+) -> lgb.Dataset:
+    """Return the constructed LightGBM Dataset of training rows, loading it from its binary file when cached.
+
+    On a miss, rows are preprocessed and binned, and the Dataset is saved under a temporary name and moved into
+    place, so an interrupted write is never read as a hit.
+
+    Args:
+        x (pd.DataFrame): The training features, before preprocessing.
+        y (pd.Series): The training target.
+        preprocessor (ColumnTransformer): The fitted preprocessor.
+        params (dict): The LightGBM parameters.
+        cache_dir (str): The cache directory.
+
+    Returns:
+        lgb.Dataset: The constructed Dataset, labelled with y.
+    """
+    fingerprint = fingerprint_dataset(x, y, preprocessor.get_feature_names_out(), params)
+    path = os.path.join(cache_dir, f"{fingerprint}.bin")
+    if os.path.exists(path):
+        logger.info(f"Loaded cached LightGBM Dataset {fingerprint}.")
+        return lgb.Dataset(path, params=params).construct()
+    dataset = lgb.Dataset(preprocessor.transform(x), label=np.asarray(y), params=params, free_raw_data=False)
+    dataset.construct()
+    os.makedirs(cache_dir, exist_ok=True)
+    dataset.save_binary(path + ".tmp")
+    os.replace(path + ".tmp", path)
+    logger.info(f"Cached LightGBM Dataset {fingerprint}.")
+    return dataset
+
+
+def fit_classifier_on_dataset(
+    model: LGBMClassifier,
+    dataset: lgb.Dataset,
+    params: dict,
+    valid_set: lgb.Dataset | None = None,
+    callbacks: list | None = None,
+    init_model: lgb.Booster | None = None,
+) -> LGBMClassifier:
+    """Fit an LGBMClassifier on a constructed binary classification Dataset, as its own `fit` would on raw data.
+
+    The scikit-learn API of LightGBM always builds its Dataset from the data given to `fit`, so the booster is
+    trained with `lgb.train` and set as the fitted state of the classifier. When an early stopping callback stops
+    training, the trees grown after the best iteration are dropped, so inference only evaluates the needed trees.
+
+    Args:
+        model (LGBMClassifier): The classifier to fit.
+        dataset (lgb.Dataset): The constructed Dataset, labelled with 0 and 1.
+        params (dict): The LightGBM parameters of the classifier.
+        valid_set (lgb.Dataset | None): The validation Dataset evaluated at each iteration, named "valid".
+        callbacks (list | None): The callbacks of `lgb.train`.
+        init_model (lgb.Booster | None): A booster to continue boosting from, its trees being kept in the model.
+
+    Returns:
+        LGBMClassifier: The fitted classifier.
+    """
+    valid_sets = [] if valid_set is None else [valid_set]
+    valid_names = ["valid"][: len(valid_sets)]
+    booster = lgb.train(
+        params, dataset, valid_sets=valid_sets, valid_names=valid_names, callbacks=callbacks, init_model=init_model
+    )
+    if booster.best_iteration > 0:
+        model._best_iteration = booster.best_iteration
+        model._best_score = booster.best_score
+        booster = lgb.Booster(model_str=booster.model_to_string(num_iteration=booster.best_iteration))
+    model._Booster = booster
+    model._n_features = booster.num_feature()
+    model.n_features_in_ = booster.num_feature()
+    model._le = LabelEncoder().fit(dataset.get_label().astype(int))
+    model._classes = model._le.classes_
+    model._n_classes = len(model._classes)
+    model._objective = params["objective"]
+    model.fitted_ = True
+    return model
@@ -0,0 +1,141 @@
+import json
+import os
+import shutil
+
+import numpy as np
+from loguru import logger
+from scipy import sparse
+
+DEFAULT_FEATURE_STORE_DIR = "./data/cache/features"
+FEATURE_STORE_FORMAT_VERSION = 1
+_MANIFEST_NAME = "manifest.json"
+
+
+def _save_array(directory: str, file_name: str, array: np.ndarray) -> dict:
+    np.save(os.path.join(directory, file_name), np.ascontiguousarray(array), allow_pickle=False)
+    return {"file": file_name, "dtype": array.dtype.str, "shape": list(array.shape)}
+
+
+def write_feature_store(
+    directory: str,
+    matrices: dict[str, np.ndarray | sparse.spmatrix],
+    feature_names: list[str] | None = None,
+    metadata: dict | None = None,
+) -> "FeatureStore":
+    """Materialize matrices as NumPy files with a manifest, to be memory-mapped by `FeatureStore`.
+
+    Dense matrices are saved as one file, CSR matrices as one file per component. Files are written in a temporary
+    directory moved into place once complete, so an interrupted write is never read as a store.
+
+    Args:
+        directory (str): The store directory, replaced if it exists.
+        matrices (dict): The dense or sparse matrices and vectors to store, by name.
+        feature_names (list[str] | None): The names of the matrix columns.
+        metadata (dict | None): Additional information to store in the manifest.
+
+    Returns:
+        FeatureStore: The store.
+    """
+    tmp_directory = directory.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp_directory, ignore_errors=True)
+    os.makedirs(tmp_directory)
+    manifest = {
+        "format_version": FEATURE_STORE_FORMAT_VERSION,
+        "feature_names": None if feature_names is None else [str(name) for name in feature_names],
+        "metadata": metadata or {},
+        "matrices": {},
+    }
+    for name, matrix in matrices.items():
+        if sparse.issparse(matrix):
+            matrix = sparse.csr_matrix(matrix)
+            components = {"data": matrix.data, "indices": matrix.indices, "indptr": matrix.indptr}
+            manifest["matrices"][name] = {
+                "sparse": True,
+                "shape": list(matrix.shape),
+                "arrays": {key: _save_array(tmp_directory, f"{name}.{key}.npy", a) for key, a in components.items()},
+            }
+        else:
+            array = np.asarray(matrix)
+            manifest["matrices"][name] = {
+                "sparse": False,
+                "shape": list(array.shape),
+                "arrays": {"data": _save_array(tmp_directory, f"{name}.npy", array)},
+            }
+    with open(os.path.join(tmp_directory, _MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_directory, directory)
+    logger.info(f"Wrote feature store {directory} with {', '.join(matrices)}.")
+    return FeatureStore(directory)
+
+
+class FeatureStore:
+    """Read-only access to matrices materialized with `write_feature_store`.
+
+    Matrices are memory-mapped rather than read, so every process attaching to the same store shares the pages of
+    the OS cache instead of holding its own copy. Only the directory is pickled when passing a store to a worker.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """Attach to a store.
+
+        Args:
+            directory (str): The store directory.
+
+        Raises:
+            ValueError: If the store was written with another format version.
+        """
+        self.directory = directory
+        with open(os.path.join(directory, _MANIFEST_NAME)) as f:
+            self.manifest = json.load(f)
+        if self.manifest["format_version"] != FEATURE_STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported feature store format version {self.manifest['format_version']}")
+
+    def __reduce__(self) -> tuple:  # noqa: D105
+        return FeatureStore, (self.directory,)
+
+    @property
+    def names(self) -> list[str]:
+        """The names of the stored matrices."""
+        return list(self.manifest["matrices"])
+
+    @property
+    def feature_names(self) -> list[str] | None:
+        """The names of the matrix columns."""
+        return self.manifest["feature_names"]
+
+    @property
+    def metadata(self) -> dict:
+        """The additional information stored with the matrices."""
+        return self.manifest["metadata"]
+
+    def load(self, name: str) -> np.ndarray | sparse.csr_matrix:
+        """Memory-map a stored matrix, read-only and without copying it.
+
+        Args:
+            name (str): The name of the matrix.
+
+        Returns:
+            np.ndarray | sparse.csr_matrix: The read-only matrix.
+        """
+        spec = self.manifest["matrices"][name]
+        arrays = {
+            key: np.load(os.path.join(self.directory, array_spec["file"]), mmap_mode="r", allow_pickle=False)
+            for key, array_spec in spec["arrays"].items()
+        }
+        if spec["sparse"]:
+            return sparse.csr_matrix(
+                (arrays["data"], arrays["indices"], arrays["indptr"]), shape=tuple(spec["shape"]), copy=False
+            )
+        return arrays["data"]
+
+
+def open_feature_store(directory: str) -> FeatureStore | None:
+    """Attach to a store, returning None when it does not exist or must be rebuilt, being of another format version."""
+    try:
+        return FeatureStore(directory)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        logger.warning(f"Cannot attach to feature store {directory}, rebuilding it: {e}")
+        return None
@@ -0,0 +1,130 @@
+import copy
+from typing import Any
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from lightgbm import LGBMClassifier
+from loguru import logger
+from sklearn.pipeline import Pipeline
+
+from lib.cross_validation import calculate_fold_metrics
+from lib.dataset_cache import fit_classifier_on_dataset
+from lib.model_evaluation import get_booster_params
+
+TRAINING_MODES = ("full", "incremental")
+
+
+def resolve_split_mode(training_mode: str, split_mode: str) -> str:
+    """Return the train/test split mode of a training mode, forcing "hash" in "incremental" mode.
+
+    Incremental training is compared with a full retrain on the test set, whose rows must not have been trained on by
+    the production model. Only a hash split keeps rows on the same side of the split as the data is refreshed, so
+    a random split would bias the comparison toward the warm-started model. The production model must have been
+    trained on a hash split as well, see `split_leakage_reason`.
+
+    Raises:
+        ValueError: If the training mode is unknown.
+    """
+    if training_mode not in TRAINING_MODES:
+        raise ValueError(f"Unknown training mode '{training_mode}', expected one of {TRAINING_MODES}")
+    if training_mode == "incremental" and split_mode != "hash":
+        logger.warning(f"Incremental training requires a hash split, ignoring split mode '{split_mode}'.")
+        return "hash"
+    return split_mode
+
+
+def split_leakage_reason(production_params: dict[str, str], train_size: float) -> str | None:
+    """Return why a hash split test set may hold rows the production model was trained on, or None if it cannot.
+
+    A hash split sends a row to the test set when its hash falls above `train_size`, so the test set is a subset of
+    the production test set only if the production run also split by hash with a `train_size` no larger.
+
+    Args:
+        production_params (dict[str, str]): The logged MLflow parameters of the production model run.
+        train_size (float): The proportion of the dataset to include in the train split.
+
+    Returns:
+        str | None: The reason the test set may leak, or None if the production model never trained on it.
+    """
+    production_split_mode = production_params.get("split_mode")
+    if production_split_mode != "hash":
+        return f"production model was trained with a '{production_split_mode}' split"
+    production_train_size = production_params.get("split_train_size")
+    if production_train_size is None or float(production_train_size) > train_size:
+        return f"production model was trained on a hash split of train size {production_train_size}"
+    return None
+
+
+def select_new_data(
+    x: pd.DataFrame, y: pd.Series, since: int | None = None, time_column: str = "CalYear"
+) -> tuple[pd.DataFrame, pd.Series]:
+    """Select the rows of the periods the production model was not trained on.
+
+    Args:
+        x (pd.DataFrame): The features.
+        y (pd.Series): The target.
+        since (int | None): The first new value of `time_column`, defaults to its last value.
+        time_column (str): The column ordering rows in time.
+
+    Returns:
+        tuple: A tuple containing the new features and target.
+    """
+    if since is None:
+        since = x[time_column].max()
+    is_new = (x[time_column] >= since).to_numpy()
+    logger.info(f"Selected {is_new.sum()} new rows from {time_column} {since}.")
+    return x[is_new], y[is_new]
+
+
+def can_continue_training(model: Any) -> bool:  # noqa: ANN401
+    """Return whether boosting can be continued from a model, being a pipeline with a LightGBM classifier."""
+    return isinstance(model, Pipeline) and isinstance(model.named_steps.get("model"), LGBMClassifier)
+
+
+def continue_training(pipeline: Pipeline, x_new: pd.DataFrame, y_new: pd.Series, n_estimators: int) -> Pipeline:
+    """Continue boosting a fitted pipeline on new data.
+
+    The fitted preprocessor is kept as is, so the new trees share the feature space of the existing ones, and
+    `n_estimators` trees are added to the booster with its training parameters.
+
+    Args:
+        pipeline (Pipeline): The fitted pipeline, with a LightGBM classifier as "model" step.
+        x_new (pd.DataFrame): The new features.
+        y_new (pd.Series): The new target.
+        n_estimators (int): The number of trees to add.
+
+    Returns:
+        Pipeline: A new fitted pipeline, the given one being left unchanged.
+
+    Raises:
+        ValueError: If the pipeline does not end with a LightGBM classifier.
+    """
+    if not can_continue_training(pipeline):
+        raise ValueError(f"Cannot continue training a {type(pipeline).__name__}, expected a LightGBM pipeline")
+    pipeline = copy.deepcopy(pipeline)
+    preprocessor = pipeline.named_steps["preprocessor"]
+    model = pipeline.named_steps["model"]
+    init_model = model.booster_
+    params = {**get_booster_params(model), "n_estimators": n_estimators}
+    dataset = lgb.Dataset(preprocessor.transform(x_new), label=np.asarray(y_new), params=params)
+    fit_classifier_on_dataset(model, dataset, params, init_model=init_model)
+    logger.info(f"Continued training from {init_model.num_trees()} to {model.booster_.num_trees()} trees.")
+    return pipeline
+
+
+def compare_retrains(
+    incremental: Pipeline, full: Pipeline, x_test: pd.DataFrame, y_test: pd.Series
+) -> dict[str, float]:
+    """Compare an incrementally trained pipeline with a full retrain on the same holdout.
+
+    Returns:
+        dict: The metrics of each pipeline, prefixed with "incremental_" and "full_", and the difference of each
+        metric, incremental minus full, suffixed with "_delta".
+    """
+    incremental_metrics = calculate_fold_metrics(np.asarray(y_test), incremental.predict_proba(x_test)[:, 1])
+    full_metrics = calculate_fold_metrics(np.asarray(y_test), full.predict_proba(x_test)[:, 1])
+    report = {f"incremental_{k}": v for k, v in incremental_metrics.items()}
+    report.update({f"full_{k}": v for k, v in full_metrics.items()})
+    report.update({f"{k}_delta": incremental_metrics[k] - full_metrics[k] for k in incremental_metrics})
+    return report
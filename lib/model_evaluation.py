@@ -1,58 +1,224 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from itertools import combinations
 from typing import Any
 
+import lightgbm as lgb
 import matplotlib.pyplot as plt
 import mlflow
 import numpy as np
 import pandas as pd
 import shap
-from fairlearn.metrics import MetricFrame, count, selection_rate
 from fairlearn.reductions import EqualizedOdds, ExponentiatedGradient
+from lightgbm import LGBMClassifier
 from loguru import logger
-from shap import TreeExplainer
+from scipy import sparse
 from shap.plots._force import AdditiveForceArrayVisualizer
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.compose import ColumnTransformer
 from sklearn.metrics import (
     ConfusionMatrixDisplay,
     accuracy_score,
-    f1_score,
-    precision_score,
-    recall_score,
-    roc_auc_score,
 )
 from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+from sklearn.utils import check_random_state
 
-from lib.modelling import init_pipeline
+from lib.dataset_cache import load_binned_dataset
 
+CONFUSION_METRICS = ("accuracy", "precision", "recall", "f1", "roc_auc")
 
-def calculate_metrics(y_pred: pd.DataFrame, y_test: pd.DataFrame) -> dict[str, Any]:
+
+def confusion_counts(y_true: np.ndarray, y_pred: np.ndarray) -> np.ndarray:
+    """Count the true negatives, false positives, false negatives and true positives of binary labels in one pass."""
+    cells = 2 * np.asarray(y_true, dtype=np.int64) + np.asarray(y_pred, dtype=np.int64)
+    return np.bincount(cells, minlength=4)
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.divide(numerator, denominator, out=np.zeros(np.shape(numerator)), where=denominator != 0)
+
+
+def metrics_from_counts(counts: np.ndarray) -> dict[str, np.ndarray]:
+    """Derive the evaluation metrics from confusion counts.
+
+    The ROC AUC of hard labels is the mean of their true positive and true negative rates. Undefined ratios are 0,
+    as with `zero_division=0` in scikit-learn.
+
+    Args:
+        counts (np.ndarray): The (tn, fp, fn, tp) counts along the last axis, e.g. one row per bootstrap resample.
+
+    Returns:
+        dict: The accuracy, precision, recall, f1 and ROC AUC, with the shape of the counts without the last axis.
+    """
+    tn, fp, fn, tp = np.moveaxis(np.asarray(counts, dtype=np.float64), -1, 0)
+    recall = _safe_divide(tp, tp + fn)
+    return {
+        "accuracy": _safe_divide(tp + tn, tn + fp + fn + tp),
+        "precision": _safe_divide(tp, tp + fp),
+        "recall": recall,
+        "f1": _safe_divide(2 * tp, 2 * tp + fp + fn),
+        "roc_auc": (recall + _safe_divide(tn, tn + fp)) / 2,
+    }
+
+
+def bootstrap_metric_intervals(
+    counts: np.ndarray, n_resamples: int = 2000, confidence: float = 0.95, random_state: int = 0
+) -> dict[str, tuple[float, float]]:
+    """Compute percentile bootstrap confidence intervals of the evaluation metrics.
+
+    Metrics only depend on the confusion counts, so resampling rows with replacement amounts to drawing the counts
+    of a resample from a multinomial distribution over the four cells, all resamples being drawn at once.
+
+    Args:
+        counts (np.ndarray): The (tn, fp, fn, tp) counts.
+        n_resamples (int): The number of bootstrap resamples.
+        confidence (float): The confidence level of the intervals.
+        random_state (int): Seed of the resampling.
+
+    Returns:
+        dict: The (lower, upper) bounds of each metric.
+    """
+    n = int(counts.sum())
+    resampled = np.random.default_rng(random_state).multinomial(n, counts / n, size=n_resamples)
+    alpha = (1 - confidence) / 2
+    return {
+        name: tuple(float(bound) for bound in np.quantile(values, [alpha, 1 - alpha]))
+        for name, values in metrics_from_counts(resampled).items()
+    }
+
+
+def calculate_metrics(
+    y_pred: pd.DataFrame,
+    y_test: pd.DataFrame,
+    plot_confusion_matrix: bool = False,
+    n_resamples: int = 2000,
+    confidence: float = 0.95,
+) -> dict[str, Any]:
     """Calculate evaluation metrics for the given predictions and true labels.
 
+    Confusion counts are computed once, every metric and its bootstrap confidence interval being derived from them.
+
     Agrs:
         y_pred (pd.DataFrame): Predicted labels.
         y_test (pd.DataFrame): True Labels.
+        plot_confusion_matrix (bool): Whether to render the confusion matrix, as "cm".
+        n_resamples (int): The number of bootstrap resamples, no interval being computed with 0.
+        confidence (float): The confidence level of the intervals.
 
     Returns:
-        dict: A dictionary containing accuracy, precision, recall, and F1 score.
-    """
-    metrics = {
-        "accuracy": round(float(accuracy_score(y_test, y_pred)), 2),
-        "precision": round(float(precision_score(y_test, y_pred)), 2),
-        "recall": round(float(recall_score(y_test, y_pred)), 2),
-        "f1": round(float(f1_score(y_test, y_pred)), 2),
-        "roc_auc": round(float(roc_auc_score(y_test, y_pred)), 2),
-        "cm": ConfusionMatrixDisplay.from_predictions(y_test, y_pred),
-    }
+        dict: A dictionary containing accuracy, precision, recall, F1 score and ROC AUC, the bounds of their
+        intervals suffixed with "_lower" and "_upper", and the confusion matrix display when plotted.
+    """
+    counts = confusion_counts(y_test, y_pred)
+    metrics = {name: round(float(value), 2) for name, value in metrics_from_counts(counts).items()}
+    if n_resamples > 0:
+        for name, (lower, upper) in bootstrap_metric_intervals(counts, n_resamples, confidence).items():
+            metrics[f"{name}_lower"] = round(lower, 2)
+            metrics[f"{name}_upper"] = round(upper, 2)
+    if plot_confusion_matrix:
+        metrics["cm"] = ConfusionMatrixDisplay(counts.reshape(2, 2), display_labels=[0, 1]).plot()
+        plt.close(metrics["cm"].figure_)
     logger.info("Successfully calculated evaluation metrics.")
     return metrics
 
 
+def threshold_sweep(y_true: np.ndarray, y_proba: np.ndarray) -> pd.DataFrame:
+    """Evaluate every distinct decision threshold of predicted probabilities, sorting them once.
+
+    Rows are predicted positive when their probability is at least the threshold, so the confusion counts of all
+    thresholds are read off cumulative sums of the labels sorted by decreasing probability.
+
+    Args:
+        y_true (np.ndarray): The true labels.
+        y_proba (np.ndarray): The predicted probabilities of the positive class.
+
+    Returns:
+        pd.DataFrame: The thresholds in decreasing order, with their confusion counts, metrics (see
+        `metrics_from_counts`) and selection rate.
+    """
+    order = np.argsort(-np.asarray(y_proba), kind="stable")
+    y_proba = np.asarray(y_proba)[order]
+    y_true = np.asarray(y_true, dtype=np.int64)[order]
+    last_of_threshold = np.r_[np.flatnonzero(np.diff(y_proba)), len(y_proba) - 1]
+    tp = np.cumsum(y_true)[last_of_threshold]
+    fp = last_of_threshold + 1 - tp
+    n_positive = tp[-1]
+    n_negative = len(y_true) - n_positive
+    counts = np.stack([n_negative - fp, fp, n_positive - tp, tp], axis=1)
+    sweep = pd.DataFrame(counts, columns=["tn", "fp", "fn", "tp"])
+    sweep.insert(0, "threshold", y_proba[last_of_threshold])
+    sweep = sweep.assign(**metrics_from_counts(counts), selection_rate=(tp + fp) / len(y_true))
+    return sweep
+
+
+def optimal_threshold(sweep: pd.DataFrame, metric: str = "f1") -> float:
+    """Return the threshold of a sweep maximizing a metric, the highest one on ties.
+
+    Raises:
+        ValueError: If the metric is unknown.
+    """
+    if metric not in CONFUSION_METRICS:
+        raise ValueError(f"Unknown threshold metric '{metric}', expected one of {CONFUSION_METRICS}")
+    return float(sweep["threshold"].iloc[sweep[metric].to_numpy().argmax()])
+
+
+def map_to_original_columns(preprocessor: ColumnTransformer) -> tuple[np.ndarray, np.ndarray]:
+    """Map each transformed feature of a fitted preprocessor to the input column it is derived from.
+
+    One-hot encoded columns map each of their categories to the column, other columns being mapped one to one.
+
+    Returns:
+        tuple: A tuple containing the position of the input column of each transformed feature, and the names of
+        the input columns in that order.
+    """
+    column_names = []
+    column_positions = []
+    for _, transformer, columns in preprocessor.transformers_:
+        if (isinstance(transformer, str) and transformer == "drop") or len(columns) == 0:
+            continue
+        for i, column in enumerate(columns):
+            name = preprocessor.feature_names_in_[column] if isinstance(column, int | np.integer) else column
+            n_features = len(transformer.categories_[i]) if isinstance(transformer, OneHotEncoder) else 1
+            column_positions.extend([len(column_names)] * n_features)
+            column_names.append(name)
+    return np.array(column_positions), np.array(column_names, dtype=object)
+
+
+def aggregate_by_original_columns(values: np.ndarray, column_positions: np.ndarray) -> np.ndarray:
+    """Sum the values of transformed features, along the last axis, over the input column they are derived from."""
+    n_columns = column_positions.max() + 1
+    indicator = sparse.csr_matrix(
+        (np.ones(len(column_positions)), (np.arange(len(column_positions)), column_positions)),
+        shape=(len(column_positions), n_columns),
+    )
+    return np.asarray(values @ indicator, dtype=values.dtype)
+
+
+def encode_original_columns(data: pd.DataFrame) -> np.ndarray:
+    """Return the input columns as a float matrix the SHAP plots can color by, categories as their codes.
+
+    Numeric columns are kept as is, string and categorical columns are replaced by the codes of their categories,
+    missing values being NaN.
+    """
+    encoded = {}
+    for name, column in data.items():
+        if pd.api.types.is_numeric_dtype(column):
+            encoded[name] = column.to_numpy(dtype=np.float64)
+        else:
+            codes = pd.Categorical(column).codes
+            encoded[name] = np.where(codes < 0, np.nan, codes)
+    return np.column_stack(list(encoded.values()))
+
+
 def calculate_feature_importances(pipeline: Pipeline) -> dict:
-    """Calculate and return feature importances from the model"""
+    """Calculate and return feature importances from the model, summed over the features of each input column"""
     preprocessor = pipeline.named_steps["preprocessor"]
     model = pipeline.named_steps["model"]
-    feature_labels = preprocessor.get_feature_names_out()
-    feature_importances = model.feature_importances_
-    feature_importances_dict = dict(zip(feature_labels, feature_importances, strict=False))
+    column_positions, column_names = map_to_original_columns(preprocessor)
+    feature_importances = aggregate_by_original_columns(model.feature_importances_, column_positions)
+    feature_importances_dict = dict(zip(column_names, feature_importances.tolist(), strict=True))
     return feature_importances_dict
 
 
@@ -73,25 +239,78 @@ def plot_feature_importances(feature_importances: dict, top_n: int = 100) -> plt
     return fig
 
 
-def calculate_shap_values(pipeline: Pipeline, x_test: pd.DataFrame) -> tuple:
-    """Calculate and return shap values from the model"""
+def transform_features(pipeline: Pipeline, data: pd.DataFrame) -> tuple:
+    """Transform data with the pipeline preprocessor once, keeping sparse outputs sparse"""
     preprocessor = pipeline.named_steps["preprocessor"]
-    model = pipeline.named_steps["model"]
-    x_transformed = preprocessor.transform(x_test).toarray()
+    x_transformed = preprocessor.transform(data)
+    if sparse.issparse(x_transformed):
+        x_transformed = x_transformed.tocsr()
+    return x_transformed, preprocessor.get_feature_names_out()
+
+
+_worker_explainer = None
+
+
+def _init_shap_worker(model: Any) -> None:  # noqa: ANN401
+    global _worker_explainer
+    _worker_explainer = shap.TreeExplainer(model)
+
+
+def _explain_chunk(explainer: shap.TreeExplainer, x_chunk: np.ndarray | sparse.csr_matrix) -> np.ndarray:
+    shap_values = explainer.shap_values(x_chunk)
+    if sparse.issparse(shap_values):
+        shap_values = shap_values.toarray()
+    return np.asarray(shap_values, dtype=np.float32)
+
+
+def _explain_worker_chunk(x_chunk: np.ndarray | sparse.csr_matrix) -> np.ndarray:
+    return _explain_chunk(_worker_explainer, x_chunk)
+
+
+def calculate_shap_values(
+    model: Any,  # noqa: ANN401
+    x_transformed: np.ndarray | sparse.csr_matrix,
+    n_workers: int = 1,
+    chunk_size: int = 10_000,
+) -> tuple[np.ndarray, float]:
+    """Calculate shap values of the transformed features chunk by chunk, without densifying the whole matrix.
+
+    Args:
+        model (Any): The fitted tree model.
+        x_transformed (np.ndarray | sparse.csr_matrix): The features, as returned by `transform_features`.
+        n_workers (int): The number of processes explaining chunks in parallel.
+        chunk_size (int): The number of rows explained at once.
+
+    Returns:
+        tuple: A tuple containing the float32 shap values and the expected value of the explainer.
+    """
     explainer = shap.TreeExplainer(model)
-    shap_values = explainer.shap_values(x_transformed)
-    return shap_values, explainer
+    chunks = [x_transformed[start : start + chunk_size] for start in range(0, x_transformed.shape[0], chunk_size)]
+    if n_workers > 1:
+        with ProcessPoolExecutor(n_workers, initializer=_init_shap_worker, initargs=(model,)) as executor:
+            shap_chunks = list(executor.map(_explain_worker_chunk, chunks))
+    else:
+        shap_chunks = [_explain_chunk(explainer, chunk) for chunk in chunks]
+    return np.concatenate(shap_chunks), explainer.expected_value
 
 
 def plot_shap_summary_plot(
-    pipeline: Pipeline, shap_values: np.ndarray, x_test: pd.DataFrame, plot_type: str
+    shap_values: np.ndarray,
+    x_transformed: np.ndarray | sparse.csr_matrix,
+    feature_names: np.ndarray,
+    plot_type: str,
+    sample_size: int | None = None,
+    random_state: int = 0,
 ) -> plt.gcf:
-    """Generate and return a SHAP summary plot"""
-    preprocessor = pipeline.named_steps["preprocessor"]
-    x_transformed = preprocessor.transform(x_test).toarray()
-    feature_names = preprocessor.get_feature_names_out()
+    """Generate and return a SHAP summary plot, on a sample of sample_size rows when given"""
+    rows = np.arange(shap_values.shape[0])
+    if sample_size is not None and sample_size < len(rows):
+        rows = np.sort(np.random.default_rng(random_state).choice(rows, size=sample_size, replace=False))
+    x_rows = x_transformed[rows]
+    if sparse.issparse(x_rows):
+        x_rows = x_rows.toarray()
     plt.figure(figsize=(10, 6))
-    shap.summary_plot(shap_values, x_transformed, plot_type=plot_type, feature_names=feature_names, show=False)
+    shap.summary_plot(shap_values[rows], x_rows, plot_type=plot_type, feature_names=feature_names, show=False)
     summary_plot = plt.gcf()
     plt.tight_layout()
     plt.close()
@@ -99,20 +318,19 @@ def plot_shap_summary_plot(
 
 
 def plot_force_plot(
-    pipeline: Pipeline,
-    explainer: TreeExplainer,
+    expected_value: float,
     shap_values: np.ndarray,
-    x_test: pd.DataFrame,
+    x_transformed: np.ndarray | sparse.csr_matrix,
+    feature_names: np.ndarray,
     prediction_id: int = 0,
 ) -> AdditiveForceArrayVisualizer:
     """Generate and return a SHAP force plot for a single prediction"""
-    preprocessor = pipeline.named_steps["preprocessor"]
-    x_transformed = preprocessor.transform(x_test).toarray()
-    feature_names = preprocessor.get_feature_names_out()
+    x_row = x_transformed[prediction_id]
+    x_row = x_row.toarray().ravel() if sparse.issparse(x_row) else x_row
     shap.force_plot(
-        explainer.expected_value,
+        expected_value,
         shap_values[prediction_id],
-        x_transformed[prediction_id],
+        x_row,
         feature_names=feature_names,
         matplotlib=True,
         show=False,
@@ -129,28 +347,178 @@ class ExplainabilityResults:
     feature_importances: dict
     feature_importances_plot: plt.Figure
     shap_values: np.ndarray
+    feature_names: np.ndarray
     shap_summary_plot: plt.Figure
     shap_force_plot: plt.Figure
 
 
-def run_explainer(pipeline: Pipeline, data: pd.DataFrame) -> ExplainabilityResults:
-    """Run the explainer on the given pipeline and data, returning various interpretability outputs"""
+def run_explainer(
+    pipeline: Pipeline,
+    data: pd.DataFrame,
+    n_workers: int = 1,
+    chunk_size: int = 10_000,
+    summary_sample_size: int | None = None,
+) -> ExplainabilityResults:
+    """Run the explainer on the given pipeline and data, returning various interpretability outputs
+
+    Data is transformed once and shap values are computed once, all plots being built from that single result.
+    Shap values and feature importances are summed over the features derived from each input column, so one-hot
+    and natively encoded categorical columns are both explained by column, and plotted against the input column
+    values, see `encode_original_columns`.
+    """
     feature_importances = calculate_feature_importances(pipeline)
     feature_importances_plot = plot_feature_importances(feature_importances, 31)
-    shap_values, explainer = calculate_shap_values(pipeline, data)
-    shap_summary_plot = plot_shap_summary_plot(pipeline, shap_values, data, "bar")
-    shap_force_plot = plot_force_plot(pipeline, explainer, shap_values, data)
+    x_transformed, _ = transform_features(pipeline, data)
+    shap_values, expected_value = calculate_shap_values(
+        pipeline.named_steps["model"], x_transformed, n_workers, chunk_size
+    )
+    column_positions, feature_names = map_to_original_columns(pipeline.named_steps["preprocessor"])
+    shap_values = aggregate_by_original_columns(shap_values, column_positions)
+    x_original = encode_original_columns(data[feature_names])
+    shap_summary_plot = plot_shap_summary_plot(
+        shap_values, x_original, feature_names, "bar", sample_size=summary_sample_size
+    )
+    shap_force_plot = plot_force_plot(expected_value, shap_values, x_original, feature_names)
     return ExplainabilityResults(
         feature_importances=feature_importances,
         feature_importances_plot=feature_importances_plot,
         shap_values=shap_values,
+        feature_names=feature_names,
         shap_summary_plot=shap_summary_plot,
         shap_force_plot=shap_force_plot,
     )
 
 
+FAIRNESS_METRICS = ("selection_rate", *CONFUSION_METRICS)
+
+
+@dataclass
+class FairnessReport:
+    """The metrics of the groups of sensitive features and their intersections, and the disparities between them.
+
+    Attributes:
+        by_group (pd.DataFrame): One row per group, with the sensitive features it belongs to ("features"), its
+            values ("group"), its size ("count"), its confusion counts and its metrics.
+        disparities (pd.DataFrame): One row per sensitive features, with the difference between the highest and
+            lowest value of each metric among their groups.
+    """
+
+    by_group: pd.DataFrame
+    disparities: pd.DataFrame
+
+
+def group_metrics(counts: np.ndarray) -> dict[str, np.ndarray]:
+    """Derive the selection rate and the evaluation metrics from confusion counts, see `metrics_from_counts`."""
+    counts = np.asarray(counts, dtype=np.float64)
+    return {
+        "selection_rate": _safe_divide(counts[..., 1] + counts[..., 3], counts.sum(axis=-1)),
+        **metrics_from_counts(counts),
+    }
+
+
+def _add_intervals(frame: pd.DataFrame, resampled: dict[str, np.ndarray], confidence: float) -> pd.DataFrame:
+    alpha = (1 - confidence) / 2
+    bounds = {}
+    for name, values in resampled.items():
+        bounds[f"{name}_lower"], bounds[f"{name}_upper"] = np.quantile(values, [alpha, 1 - alpha], axis=-1)
+    return frame.assign(**bounds)
+
+
+def fairness_report(
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    sensitive_features: pd.DataFrame,
+    intersections: bool = True,
+    n_resamples: int = 0,
+    confidence: float = 0.95,
+    random_state: int = 0,
+) -> FairnessReport:
+    """Evaluate predictions within the groups of sensitive features and of their intersections.
+
+    Rows are grouped once by every sensitive feature together, and the confusion counts of these intersection cells
+    are counted in one pass. The counts of the groups of any subset of features are sums of the counts of their
+    cells, and every metric and disparity is derived from counts, so no metric is evaluated per group on rows.
+
+    Bootstrap resamples draw rows with replacement within each cell, keeping group sizes fixed, which amounts to
+    drawing the counts of each cell from a multinomial distribution over the four confusion cells.
+
+    Args:
+        y_true (np.ndarray): The true labels.
+        y_pred (np.ndarray): The predicted labels.
+        sensitive_features (pd.DataFrame): The sensitive features, aligned with the labels.
+        intersections (bool): Whether to evaluate the intersections of every combination of sensitive features, or
+            only each of them.
+        n_resamples (int): The number of bootstrap resamples, no interval being computed with 0.
+        confidence (float): The confidence level of the intervals.
+        random_state (int): Seed of the resampling.
+
+    Returns:
+        FairnessReport: The metrics of the groups and the disparities of the features, with the bounds of their
+        intervals suffixed with "_lower" and "_upper" when bootstrapped.
+    """
+    columns = list(sensitive_features.columns)
+    cell_grouping = sensitive_features.groupby(columns, observed=True, dropna=False)
+    cell_codes = cell_grouping.ngroup().to_numpy()
+    cell_keys = cell_grouping.size().index.to_frame(index=False)
+    n_cells = len(cell_keys)
+    confusion_cells = 2 * np.asarray(y_true, dtype=np.int64) + np.asarray(y_pred, dtype=np.int64)
+    cell_counts = np.bincount(4 * cell_codes + confusion_cells, minlength=4 * n_cells).reshape(n_cells, 4)
+
+    sizes = range(1, len(columns) + 1) if intersections else [1]
+    feature_sets = [list(subset) for size in sizes for subset in combinations(columns, size)]
+    group_codes = []
+    groups = []
+    first_groups = []
+    for features in feature_sets:
+        grouping = cell_keys.groupby(features, observed=True, dropna=False)
+        first_groups.append(len(groups))
+        group_codes.append(len(groups) + grouping.ngroup().to_numpy())
+        keys = grouping.size().index
+        groups.extend((" & ".join(features), " & ".join(map(str, np.atleast_1d(key)))) for key in keys)
+    first_groups = np.array(first_groups)
+    cell_positions = np.tile(np.arange(n_cells), len(feature_sets))
+    membership = sparse.csr_matrix(
+        (np.ones(len(cell_positions)), (np.concatenate(group_codes), cell_positions)), shape=(len(groups), n_cells)
+    )
+
+    counts = (membership @ cell_counts).astype(np.int64)
+    metrics = group_metrics(counts)
+    by_group = pd.DataFrame(groups, columns=["features", "group"]).assign(count=counts.sum(axis=1))
+    by_group[["tn", "fp", "fn", "tp"]] = counts
+    by_group = by_group.assign(**metrics)
+    disparities = pd.DataFrame(
+        {
+            name: np.maximum.reduceat(values, first_groups) - np.minimum.reduceat(values, first_groups)
+            for name, values in metrics.items()
+        },
+        index=pd.Index(by_group["features"].unique(), name="features"),
+    )
+
+    if n_resamples > 0:
+        cell_sizes = cell_counts.sum(axis=1)
+        resampled = np.random.default_rng(random_state).multinomial(
+            cell_sizes, cell_counts / cell_sizes[:, None], size=(n_resamples, n_cells)
+        )
+        resampled_counts = (membership @ resampled.transpose(1, 0, 2).reshape(n_cells, -1)).reshape(
+            len(groups), n_resamples, 4
+        )
+        resampled_metrics = group_metrics(resampled_counts)
+        by_group = _add_intervals(by_group, resampled_metrics, confidence)
+        resampled_disparities = {
+            name: np.maximum.reduceat(values, first_groups) - np.minimum.reduceat(values, first_groups)
+            for name, values in resampled_metrics.items()
+        }
+        disparities = _add_intervals(disparities, resampled_disparities, confidence)
+    return FairnessReport(by_group, disparities)
+
+
 def run_bias_detector(
-    x_test: pd.DataFrame, y_test: pd.DataFrame, y_test_pred: pd.DataFrame, sensitive_column: str
+    x_test: pd.DataFrame,
+    y_test: pd.DataFrame,
+    y_test_pred: pd.DataFrame,
+    sensitive_column: str | list[str],
+    intersections: bool = True,
+    n_resamples: int = 2000,
 ) -> dict:
     """Run fairness detector to evaluate model fairness.
 
@@ -158,49 +526,308 @@ def run_bias_detector(
         x_test (pd.DataFrane): Test features.
         y_test (pd.DataFrame): True labels.
         y_test_pred (pd.DataFrame): Predicted labels.
-        sensitive_column (str): Sensitive column.
+        sensitive_column (str | list[str]): Sensitive column, or columns.
+        intersections (bool): Whether to also evaluate the intersections of the sensitive columns.
+        n_resamples (int): The number of bootstrap resamples of the intervals, see `fairness_report`.
 
     Returns:
-        dict: A dictionary containing the fairness plot.
-    """
-    metrics = {
-        "precision": precision_score,
-        "accuracy": accuracy_score,
-        "recall": recall_score,
-        "F1 score": f1_score,
-        "count": count,
-        "selection_rate": selection_rate,
-    }
-    metric_frame = MetricFrame(
-        metrics=metrics,
-        y_true=y_test,
-        y_pred=y_test_pred,
-        sensitive_features=x_test[sensitive_column],
+        dict: A dictionary containing the fairness plot, the selection rate disparity of the first sensitive column
+        and the fairness report.
+    """
+    sensitive_columns = [sensitive_column] if isinstance(sensitive_column, str) else list(sensitive_column)
+    report = fairness_report(
+        y_test, y_test_pred, x_test[sensitive_columns], intersections=intersections, n_resamples=n_resamples
     )
-    fig = metric_frame.by_group.plot.bar(
+    by_group = report.by_group.set_index(["features", "group"])
+    fig = by_group[["precision", "accuracy", "recall", "f1", "count", "selection_rate"]].plot.bar(
         subplots=True,
         layout=(3, 2),
         legend=False,
         figsize=(12, 12),
         sharey=True,
     )
-    disparities = metric_frame.by_group["selection_rate"]
-    disparity = disparities.max() - disparities.min()
-    return {"fairness_plot": fig[0][0], "disparity": disparity}
+    disparity = float(report.disparities.loc[sensitive_columns[0], "selection_rate"])
+    return {"fairness_plot": fig[0][0], "disparity": disparity, "report": report}
+
+
+MITIGATION_MODES = ("pipeline", "binned")
+ROW_ID_COLUMN = "__row_id__"
+_SKLEARN_ONLY_PARAMS = ("class_weight", "importance_type")
 
 
-def train_mitigator(x_train: pd.DataFrame, y_train: pd.DataFrame, sensitive_features: list) -> ExponentiatedGradient:
-    """Initialize and return an ExponentiatedGraidtent mitigator with EqualizedOdds as constraints."""
-    pipeline = init_pipeline(x_train)
+def get_booster_params(model: LGBMClassifier) -> dict:
+    """Translate the parameters of an LGBMClassifier into LightGBM training parameters."""
+    params = {k: v for k, v in model.get_params().items() if k not in _SKLEARN_ONLY_PARAMS and v is not None}
+    params["objective"] = params.get("objective", "binary")
+    return params
+
+
+@dataclass
+class BinnedData:
+    """Training rows preprocessed and binned into a LightGBM Dataset once, shared by every fit of a mitigation.
+
+    Copies of the estimators holding it share the same instance instead of copying the data.
+    """
+
+    preprocessor: ColumnTransformer
+    x_transformed: np.ndarray | sparse.csr_matrix | None
+    dataset: lgb.Dataset | None
+
+    def __deepcopy__(self, memo: dict) -> "BinnedData":  # noqa: D105
+        return self
+
+    def release(self) -> None:
+        """Free the training data once fitting is done, keeping only what prediction needs."""
+        self.x_transformed = None
+        self.dataset = None
+
+
+class BinnedLGBMClassifier(ClassifierMixin, BaseEstimator):
+    """LightGBM classifier fitted on the shared binned Dataset of a mitigation.
+
+    At fit time, X is a frame of training row ids (see `ROW_ID_COLUMN`) and only the labels and weights, which change
+    from one fit to the next, are reset on the Dataset. At predict time, X is either such a frame or raw data.
+    """
+
+    def __init__(self, binned_data: BinnedData | None = None, params: dict | None = None) -> None:
+        """Initialize the classifier.
+
+        Args:
+            binned_data (BinnedData | None): The shared preprocessed and binned training data.
+            params (dict | None): The LightGBM training parameters.
+        """
+        self.binned_data = binned_data
+        self.params = params
+
+    def fit(self, x: pd.DataFrame, y: pd.Series, sample_weight: pd.Series | None = None) -> "BinnedLGBMClassifier":
+        """Fit a booster on the training rows of the shared Dataset with the given labels and weights."""
+        start = time.perf_counter()
+        dataset = self.binned_data.dataset
+        rows = x[ROW_ID_COLUMN].to_numpy()
+        if not np.array_equal(rows, np.arange(dataset.num_data())):
+            dataset = dataset.subset(rows).construct()
+        dataset.set_label(np.asarray(y))
+        # set_weight skips None and unit weights on a constructed Dataset, which would keep those of the previous fit.
+        dataset.set_field("weight", None)
+        dataset.set_weight(None if sample_weight is None else np.asarray(sample_weight))
+        self.booster_ = lgb.train(self.params, dataset)
+        self.classes_ = np.array([0, 1])
+        logger.debug(f"Fitted mitigation predictor in {time.perf_counter() - start:.3f}s.")
+        return self
+
+    def predict(self, x: pd.DataFrame) -> np.ndarray:
+        """Predict labels of training row ids, computed once for all training rows, or of raw data."""
+        if list(x.columns) == [ROW_ID_COLUMN]:
+            if getattr(self, "train_predictions_", None) is None:
+                self.train_predictions_ = self.predict_transformed(self.binned_data.x_transformed)
+            return self.train_predictions_[x[ROW_ID_COLUMN].to_numpy()]
+        return self.predict_transformed(self.binned_data.preprocessor.transform(x))
+
+    def predict_transformed(self, x_transformed: np.ndarray | sparse.csr_matrix) -> np.ndarray:
+        """Predict labels of already preprocessed rows."""
+        return (self.booster_.predict(x_transformed) > 0.5).astype(np.int8)
+
+
+def train_mitigator(
+    pipeline: Pipeline,
+    x_train: pd.DataFrame,
+    y_train: pd.DataFrame,
+    sensitive_features: list,
+    mode: str = "binned",
+    n_jobs: int | None = None,
+    dataset_cache_dir: str | None = None,
+) -> ExponentiatedGradient:
+    """Initialize and return an ExponentiatedGraidtent mitigator with EqualizedOdds as constraints.
+
+    Args:
+        pipeline (Pipeline): The fitted pipeline, whose preprocessor and model parameters are reused.
+        x_train (pd.DataFrame): The training features.
+        y_train (pd.DataFrame): The training target.
+        sensitive_features (list): The sensitive feature columns.
+        mode (str): One of "pipeline" (a copy of the whole pipeline is refitted on every iteration) or "binned"
+            (features are preprocessed and binned once, every iteration only refitting the booster).
+        n_jobs (int | None): The number of threads of each LightGBM fit in "binned" mode, defaults to all cores.
+        dataset_cache_dir (str | None): The directory of cached LightGBM Datasets to reuse in "binned" mode.
+
+    Returns:
+        ExponentiatedGradient: The fitted mitigator, with the duration of each iteration's fit in
+        `oracle_execution_times_`.
+
+    Raises:
+        ValueError: If the mitigation mode is unknown.
+    """
+    if mode not in MITIGATION_MODES:
+        raise ValueError(f"Unknown mitigation mode '{mode}', expected one of {MITIGATION_MODES}")
+    start = time.perf_counter()
+    if mode == "pipeline":
+        estimator = clone(pipeline)
+        x_fit = x_train
+        sample_weight_name = "model__sample_weight"
+    else:
+        preprocessor = pipeline.named_steps["preprocessor"]
+        params = {**get_booster_params(pipeline.named_steps["model"]), "num_threads": n_jobs or 0}
+        x_transformed = preprocessor.transform(x_train)
+        if dataset_cache_dir is None:
+            dataset = lgb.Dataset(x_transformed, label=np.asarray(y_train), params=params, free_raw_data=False)
+            dataset.construct()
+        else:
+            dataset = load_binned_dataset(x_train, y_train, preprocessor, params, dataset_cache_dir)
+        binned_data = BinnedData(preprocessor, x_transformed, dataset)
+        estimator = BinnedLGBMClassifier(binned_data, params)
+        x_fit = pd.DataFrame({ROW_ID_COLUMN: np.arange(len(x_train))})
+        sample_weight_name = "sample_weight"
+        logger.info(f"Preprocessed and binned mitigation data in {time.perf_counter() - start:.3f}s.")
     mitigator = ExponentiatedGradient(
-        estimator=pipeline,
+        estimator=estimator,
         constraints=EqualizedOdds(difference_bound=0.01),
-        sample_weight_name="model__sample_weight",
+        sample_weight_name=sample_weight_name,
+    )
+    mitigator = mitigator.fit(x_fit, y_train, sensitive_features=x_train[sensitive_features])
+    if mode == "binned":
+        binned_data.release()
+        for predictor in mitigator.predictors_:
+            predictor.train_predictions_ = None
+    oracle_times = mitigator.oracle_execution_times_
+    logger.info(
+        f"Trained mitigator in {time.perf_counter() - start:.3f}s ({mode} mode): {len(oracle_times)} fits, "
+        f"{sum(oracle_times) / max(len(oracle_times), 1):.3f}s per fit."
     )
-    mitigator = mitigator.fit(x_train, y_train, sensitive_features=x_train[sensitive_features])
     return mitigator
 
 
+class MixtureClassifier:
+    """Randomized classifier predicting with one of its predictors, drawn according to their weights.
+
+    This is the prediction rule of a fitted ExponentiatedGradient, restricted to the predictors it kept.
+    """
+
+    def __init__(self, predictors: list, weights: np.ndarray) -> None:
+        """Initialize the mixture.
+
+        Args:
+            predictors (list): The fitted predictors.
+            weights (np.ndarray): The probability of each predictor, summing to one.
+        """
+        self.predictors = predictors
+        self.weights = np.asarray(weights, dtype=np.float64)
+
+    def predict_proba(self, x: pd.DataFrame) -> np.ndarray:
+        """Return the probability of each class, being the weighted share of predictors predicting it.
+
+        When every predictor is fitted on the same binned data, rows are preprocessed once for all of them.
+        """
+        binned_data = {id(getattr(predictor, "binned_data", None)) for predictor in self.predictors}
+        if len(binned_data) == 1 and isinstance(self.predictors[0], BinnedLGBMClassifier):
+            x_transformed = self.predictors[0].binned_data.preprocessor.transform(x)
+            predictions = [predictor.predict_transformed(x_transformed) for predictor in self.predictors]
+        else:
+            predictions = [predictor.predict(x) for predictor in self.predictors]
+        positive = np.dot(self.weights, predictions)
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, x: pd.DataFrame, random_state: int | np.random.RandomState | None = None) -> np.ndarray:
+        """Draw a prediction for each row from the mixture, the same way ExponentiatedGradient does."""
+        positive = self.predict_proba(x)[:, 1]
+        return (positive >= check_random_state(random_state).rand(len(positive))) * 1
+
+
+def prune_mitigator(mitigator: ExponentiatedGradient, weight_tol: float = 1e-3) -> MixtureClassifier:
+    """Drop the predictors of a fitted mitigator weighing no more than `weight_tol`, renormalizing the others."""
+    weights = mitigator.weights_[mitigator.weights_ > weight_tol]
+    predictors = [mitigator.predictors_[index] for index in weights.index]
+    logger.info(f"Kept {len(predictors)} of {len(mitigator.predictors_)} mitigation predictors.")
+    return MixtureClassifier(predictors, weights.to_numpy() / weights.sum())
+
+
+def distill_mixture(mixture: MixtureClassifier, pipeline: Pipeline, x_train: pd.DataFrame) -> Pipeline:
+    """Fit a copy of the pipeline to the positive probabilities of a mixture on the training rows.
+
+    Each row is presented once as positive and once as negative, weighted by the mixture probabilities, which
+    minimizes the cross-entropy to them.
+    """
+    positive = mixture.predict_proba(x_train)[:, 1]
+    is_positive, is_negative = positive > 0, positive < 1
+    x_distill = pd.concat([x_train[is_positive], x_train[is_negative]], ignore_index=True)
+    y_distill = np.concatenate([np.ones(is_positive.sum(), dtype=int), np.zeros(is_negative.sum(), dtype=int)])
+    weights = np.concatenate([positive[is_positive], 1 - positive[is_negative]])
+    return clone(pipeline).fit(x_distill, y_distill, model__sample_weight=weights)
+
+
+def selection_rate_disparity(y_pred: np.ndarray, sensitive_features: pd.Series) -> float:
+    """Return the difference between the highest and lowest selection rates of the sensitive groups."""
+    selection_rates = pd.Series(np.asarray(y_pred)).groupby(sensitive_features.to_numpy()).mean()
+    return float(selection_rates.max() - selection_rates.min())
+
+
+def compare_models(
+    reference: Any,  # noqa: ANN401
+    candidate: Any,  # noqa: ANN401
+    x_test: pd.DataFrame,
+    y_test: pd.Series,
+    sensitive_column: str,
+) -> dict[str, float]:
+    """Compare the accuracy, disparity and prediction latency of a candidate model with a reference one.
+
+    Args:
+        reference (Any): The reference model.
+        candidate (Any): The candidate model.
+        x_test (pd.DataFrame): Test features.
+        y_test (pd.Series): True labels.
+        sensitive_column (str): Sensitive column.
+
+    Returns:
+        dict: The accuracy and disparity deltas (candidate minus reference) and the latency gain (reference
+        prediction time over candidate prediction time).
+    """
+    results = {}
+    for name, model in (("reference", reference), ("candidate", candidate)):
+        start = time.perf_counter()
+        y_pred = model.predict(x_test)
+        results[name] = {
+            "latency": time.perf_counter() - start,
+            "accuracy": accuracy_score(y_test, y_pred),
+            "disparity": selection_rate_disparity(y_pred, x_test[sensitive_column]),
+        }
+    return {
+        "accuracy_delta": results["candidate"]["accuracy"] - results["reference"]["accuracy"],
+        "disparity_delta": results["candidate"]["disparity"] - results["reference"]["disparity"],
+        "latency_gain": results["reference"]["latency"] / max(results["candidate"]["latency"], 1e-9),
+    }
+
+
+def collapse_mitigator(
+    mitigator: ExponentiatedGradient,
+    pipeline: Pipeline,
+    x_train: pd.DataFrame,
+    x_test: pd.DataFrame,
+    y_test: pd.Series,
+    sensitive_column: str,
+    weight_tol: float = 1e-3,
+    distill: bool = False,
+) -> tuple[Any, dict[str, float]]:
+    """Collapse a fitted mitigator into a cheaper predictor, and report how it compares to the mitigator.
+
+    Args:
+        mitigator (ExponentiatedGradient): The fitted mitigator.
+        pipeline (Pipeline): The unmitigated pipeline, a copy of which is fitted when distilling.
+        x_train (pd.DataFrame): Training features, used when distilling.
+        x_test (pd.DataFrame): Test features.
+        y_test (pd.Series): True labels.
+        sensitive_column (str): Sensitive column.
+        weight_tol (float): The weight up to which predictors are pruned.
+        distill (bool): Whether to distill the pruned mixture into a single pipeline.
+
+    Returns:
+        tuple: A tuple containing the collapsed model and its comparison with the mitigator, see `compare_models`.
+    """
+    model = prune_mitigator(mitigator, weight_tol)
+    if distill:
+        model = distill_mixture(model, pipeline, x_train)
+    report = compare_models(mitigator, model, x_test, y_test, sensitive_column)
+    logger.info("\n\t".join([f"{k}: {v}" for k, v in report.items()]))
+    return model, report
+
+
 def get_model_metric(model_name: str, model_stage: str, metric: str) -> float:
     """Get metric of a production model from model registry."""
     client = mlflow.MlflowClient()
@@ -222,10 +849,22 @@ def get_model_metric(model_name: str, model_stage: str, metric: str) -> float:
     return metric_value
 
 
-def check_is_model_better(model_name: str, model_stage: str, current_metric: float, metric_name: str) -> bool:
-    """Check if current model better from the current one in production."""
+def check_is_model_better(
+    model_name: str,
+    model_stage: str,
+    current_metric: float,
+    metric_name: str,
+    current_interval: tuple[float, float] | None = None,
+) -> bool:
+    """Check if current model better from the current one in production.
+
+    The current model is better when its metric is at least the production one. With the confidence interval of the
+    current metric, it is only better when the lower bound of the interval is at least the production metric, that
+    is when it is significantly better, so a worse model with a wide interval is never promoted.
+    """
     prod_metric = get_model_metric(model_name, model_stage, metric_name)
-    if current_metric >= prod_metric:
+    current_bound = current_metric if current_interval is None else current_interval[0]
+    if current_bound >= prod_metric:
         logger.info("Current model is better than production one")
         return True
     logger.info("Production model is better than current one")
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any
+
+import mlflow
+import numpy as np
+from loguru import logger
+from mlflow.entities.model_registry import ModelVersion
+
+DEFAULT_MODEL_CACHE_DIR = "./data/cache/models"
+DEFAULT_MODEL_CACHE_SIZE = 2 * 1024**3
+DECISION_THRESHOLD_TAG = "decision_threshold"
+_MANIFEST_NAME = "manifest.json"
+_HASH_BLOCK_SIZE = 1 << 20
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while block := f.read(_HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _hash_files(directory: str) -> dict[str, str]:
+    hashes = {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            hashes[os.path.relpath(path, directory)] = _hash_file(path)
+    return hashes
+
+
+class ModelArtifactCache:
+    """Local on-disk cache of model artifacts, keyed by registered model name and version.
+
+    Entries are checked against the source and hashes recorded when they were downloaded before being used, so a
+    version whose registry source changed (e.g. after the registry was recreated) is downloaded again, and the least
+    recently used entries are evicted once the cache grows over its size limit.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_MODEL_CACHE_DIR, max_bytes: int = DEFAULT_MODEL_CACHE_SIZE) -> None:
+        """Initialize the cache.
+
+        Args:
+            cache_dir (str): The cache directory.
+            max_bytes (int): The maximum total size of the cached artifacts.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _entry_dir(self, model_name: str, version: str) -> str:
+        return os.path.join(self.cache_dir, model_name, str(version))
+
+    def _read_manifest(self, entry_dir: str) -> dict | None:
+        manifest_path = os.path.join(entry_dir, _MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path) as f:
+            return json.load(f)
+
+    def _is_valid(self, entry_dir: str, manifest: dict) -> bool:
+        return _hash_files(os.path.join(entry_dir, "artifacts")) == manifest["files"]
+
+    def get(self, model_version: ModelVersion) -> str:
+        """Return the local path of a model version's artifacts, downloading them on a miss.
+
+        Args:
+            model_version (ModelVersion): The registered model version.
+
+        Returns:
+            str: The local path of the model artifacts.
+        """
+        entry_dir = self._entry_dir(model_version.name, model_version.version)
+        manifest = self._read_manifest(entry_dir)
+        if manifest is not None and manifest["source"] != model_version.source:
+            logger.warning(f"Stale cache entry for {model_version.name} version {model_version.version}.")
+        elif manifest is not None and self._is_valid(entry_dir, manifest):
+            os.utime(os.path.join(entry_dir, _MANIFEST_NAME))
+            logger.info(f"Model {model_version.name} version {model_version.version} found in local cache.")
+            return os.path.join(entry_dir, "artifacts")
+        elif manifest is not None:
+            logger.warning(f"Corrupted cache entry for {model_version.name} version {model_version.version}.")
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        self._download(model_version, entry_dir)
+        self._evict(keep=entry_dir)
+        return os.path.join(entry_dir, "artifacts")
+
+    def _download(self, model_version: ModelVersion, entry_dir: str) -> None:
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(entry_dir))
+        try:
+            artifacts_dir = os.path.join(tmp_dir, "artifacts")
+            download_dir = os.path.join(tmp_dir, "download")
+            local_path = mlflow.artifacts.download_artifacts(artifact_uri=model_version.source, dst_path=download_dir)
+            os.replace(local_path, artifacts_dir)
+            shutil.rmtree(download_dir)
+            files = _hash_files(artifacts_dir)
+            size = sum(os.path.getsize(os.path.join(artifacts_dir, path)) for path in files)
+            manifest = {"source": model_version.source, "files": files, "size": size}
+            with open(os.path.join(tmp_dir, _MANIFEST_NAME), "w") as f:
+                json.dump(manifest, f)
+            os.replace(tmp_dir, entry_dir)
+            logger.info(f"Cached model {model_version.name} version {model_version.version} ({size} bytes).")
+        except OSError:
+            if self._read_manifest(entry_dir) is None:
+                raise
+            logger.info(f"Model {model_version.name} version {model_version.version} cached by another process.")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _evict(self, keep: str) -> None:
+        entries = []
+        for model_name in os.listdir(self.cache_dir):
+            model_dir = os.path.join(self.cache_dir, model_name)
+            for version in os.listdir(model_dir) if os.path.isdir(model_dir) else []:
+                entry_dir = os.path.join(model_dir, version)
+                manifest = self._read_manifest(entry_dir)
+                if manifest is not None:
+                    last_used = os.path.getmtime(os.path.join(entry_dir, _MANIFEST_NAME))
+                    entries.append((last_used, entry_dir, manifest["size"]))
+        total_size = sum(size for _, _, size in entries)
+        for _, entry_dir, size in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            if entry_dir != keep:
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                total_size -= size
+                logger.info(f"Evicted {entry_dir} from model cache.")
+
+
+def get_latest_model_version(model_name: str, model_stage: str) -> ModelVersion:
+    """Get the latest version of a registered model in a given stage.
+
+    Args:
+        model_name (str): The name of the registered model.
+        model_stage (str): The stage of the model version to get.
+
+    Returns:
+        ModelVersion: The latest model version in the stage.
+    """
+    client = mlflow.MlflowClient()
+    latest_versions = client.get_latest_versions(name=model_name, stages=[model_stage])
+    latest_versions_sorted = sorted(latest_versions, key=lambda mv: int(mv.version), reverse=True)
+    return latest_versions_sorted[0]
+
+
+class ThresholdedModel:
+    """Classifier predicting the positive class when its probability reaches a decision threshold.
+
+    Other attributes, such as the steps of a pipeline, are those of the wrapped model.
+    """
+
+    def __init__(self, model: Any, threshold: float) -> None:  # noqa: ANN401
+        """Initialize the classifier.
+
+        Args:
+            model (Any): The fitted model, with a `predict_proba` method.
+            threshold (float): The decision threshold.
+        """
+        self.model = model
+        self.threshold = threshold
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401, D105
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def predict_proba(self, x: Any) -> np.ndarray:  # noqa: ANN401
+        """Predict the class probabilities with the wrapped model."""
+        return self.model.predict_proba(x)
+
+    def predict(self, x: Any) -> np.ndarray:  # noqa: ANN401
+        """Predict the classes at the decision threshold."""
+        return (self.predict_proba(x)[:, 1] >= self.threshold).astype(np.int64)
+
+
+def load_model_version(model_version: ModelVersion, cache: ModelArtifactCache | None = None) -> Any:  # noqa: ANN401
+    """Load the model of a registered model version, through the local artifact cache when given.
+
+    When the version is tagged with a decision threshold, the model is wrapped to predict at that threshold.
+    """
+    model_uri = cache.get(model_version) if cache is not None else model_version.source
+    model = mlflow.lightgbm.load_model(model_uri)
+    threshold = (model_version.tags or {}).get(DECISION_THRESHOLD_TAG)
+    if threshold is not None:
+        model = ThresholdedModel(model, float(threshold))
+    logger.info(f"Loaded model {model_version.name} version {model_version.version}.")
+    return model
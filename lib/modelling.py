@@ -1,18 +1,69 @@
 import argparse
+import os
+import tempfile
+import time
+from collections.abc import Callable
+from contextlib import nullcontext
 from datetime import datetime
+from functools import partial
+from typing import Any
 
 import fire
+import lightgbm as lgb
 import mlflow
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from lightgbm import LGBMClassifier
 from loguru import logger
 from mlflow.models.signature import infer_signature
-
-from lib.data_loading import read_data
-from lib.data_preprocessing import preprocess_data, split_data
-from lib.data_schema import validate_schemas
-from lib.evaluation import calculate_metrics, check_is_model_better, run_bias_detector, run_explainer, train_mitigator
-from lib.model_card import create_model_card
-from lib.modelling import train_pipeline
-from lib.utils import load_config
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder
+
+from lib.benchmarking import benchmark_pipeline
+from lib.cross_validation import cross_validate, make_folds
+from lib.data_cache import DEFAULT_CACHE_DIR, load_preprocessed_data
+from lib.data_loading import DEFAULT_CHUNKSIZE
+from lib.data_preprocessing import split_data
+from lib.dataset_cache import DEFAULT_DATASET_CACHE_DIR, fit_classifier_on_dataset, load_binned_dataset
+from lib.feature_store import DEFAULT_FEATURE_STORE_DIR, open_feature_store, write_feature_store
+from lib.incremental_training import (
+    can_continue_training,
+    compare_retrains,
+    continue_training,
+    resolve_split_mode,
+    select_new_data,
+    split_leakage_reason,
+)
+from lib.model_evaluation import (
+    FairnessReport,
+    calculate_metrics,
+    check_is_model_better,
+    collapse_mitigator,
+    get_booster_params,
+    optimal_threshold,
+    run_bias_detector,
+    run_explainer,
+    threshold_sweep,
+    train_mitigator,
+)
+from lib.model_registry import (
+    DECISION_THRESHOLD_TAG,
+    DEFAULT_MODEL_CACHE_DIR,
+    ModelArtifactCache,
+    ThresholdedModel,
+    get_latest_model_version,
+    load_model_version,
+)
+from lib.out_of_core import evaluate_out_of_core, split_parquet, train_out_of_core
+from lib.scoring import ReasonCodeExplainer, ShardedPredictor, score_file
+from lib.serving import serve
+from lib.shap_artifacts import save_shap_values
+from lib.tracking import MlflowMetricsLogger
+from lib.tuning import best_trial, sample_candidates, successive_halving
+
+CATEGORICAL_ENCODINGS = ("onehot", "native")
 
 
 def parse_args() -> dict:  # noqa: D103
@@ -39,6 +90,319 @@ def parse_args() -> dict:  # noqa: D103
     return params
 
 
+def init_preprocessor(x: pd.DataFrame, categorical_encoding: str = "onehot") -> ColumnTransformer:
+    """Initialize the preprocessor, encoding the categorical columns of x first and passing the others through.
+
+    Categorical columns are one-hot encoded with "onehot" encoding, and encoded as integer codes with "native"
+    encoding, unknown and missing values being encoded as -1, which LightGBM treats as missing.
+
+    Raises:
+        ValueError: If the categorical encoding is unknown.
+    """
+    if categorical_encoding not in CATEGORICAL_ENCODINGS:
+        raise ValueError(
+            f"Unknown categorical encoding '{categorical_encoding}', expected one of {CATEGORICAL_ENCODINGS}"
+        )
+    categorical_columns = x.select_dtypes(include=["object", "category"]).columns.tolist()
+    if categorical_encoding == "onehot":
+        encoder = OneHotEncoder(handle_unknown="ignore")
+    else:
+        encoder = OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1, encoded_missing_value=-1)
+    return ColumnTransformer(transformers=[("cat", encoder, categorical_columns)], remainder="passthrough")
+
+
+def init_model(
+    model_objective: str = "binary",
+    verbose: int = -1,
+    n_estimators: int = 100,
+    learning_rate: float = 0.1,
+    max_depth: int = -1,
+    random_state: int | None = None,
+) -> LGBMClassifier:
+    """Initialize the LightGBM classifier."""
+    return LGBMClassifier(
+        objective=model_objective,
+        n_estimators=n_estimators,
+        learning_rate=learning_rate,
+        max_depth=max_depth,
+        random_state=random_state,
+        verbose=verbose,
+    )
+
+
+def init_pipeline(
+    x: pd.DataFrame,
+    model_objective: str = "binary",
+    verbose: int = -1,
+    n_estimators: int = 100,
+    learning_rate: float = 0.1,
+    max_depth: int = -1,
+    random_state: int | None = None,
+    categorical_encoding: str = "onehot",
+) -> Pipeline:
+    """Initialize the preprocessing and LightGBM pipeline.
+
+    With "native" categorical encoding, the integer codes of categorical columns are declared to LightGBM as
+    categorical features, which it splits on by grouping categories instead of one column per category.
+    """
+    preprocessor = init_preprocessor(x, categorical_encoding)
+    model = init_model(model_objective, verbose, n_estimators, learning_rate, max_depth, random_state)
+    if categorical_encoding == "native":
+        model.set_params(categorical_column=list(range(len(preprocessor.transformers[0][2]))))
+    return Pipeline(steps=[("preprocessor", preprocessor), ("model", model)])
+
+
+def train_pipeline(
+    x_train: pd.DataFrame,
+    y_train: pd.Series,
+    model_objective: str,
+    verbose: int,
+    n_estimators: int,
+    learning_rate: float,
+    max_depth: int,
+    random_state: int,
+    dataset_cache_dir: str | None = None,
+    early_stopping_rounds: int | None = None,
+    validation_size: float = 0.1,
+    categorical_encoding: str = "onehot",
+) -> Pipeline:
+    """Initialize the pipeline and fit it to the training data.
+
+    The categorical columns are encoded with `categorical_encoding`, see `init_pipeline`.
+
+    With `dataset_cache_dir`, the binned LightGBM Dataset of the training data is reused from the cache when the same
+    data was already binned with the same parameters, skipping its construction.
+
+    With `early_stopping_rounds`, `validation_size` of the training data is held out and evaluated at each iteration,
+    training stopping once its metric did not improve for that many rounds and the model keeping the trees up to the
+    best iteration. The evaluation metrics are logged in batches to the active MLflow run, if any.
+    """
+    pipeline = init_pipeline(
+        x_train,
+        model_objective,
+        verbose,
+        n_estimators,
+        learning_rate,
+        max_depth,
+        random_state,
+        categorical_encoding,
+    )
+    if dataset_cache_dir is None and early_stopping_rounds is None:
+        pipeline.fit(x_train, y_train)
+        logger.info("Successfully trained pipeline.")
+        return pipeline
+    x_fit, y_fit = x_train, y_train
+    if early_stopping_rounds is not None:
+        x_fit, x_valid, y_fit, y_valid = split_data(x_train, y_train, 1 - validation_size, random_state)
+    preprocessor = pipeline.named_steps["preprocessor"].fit(x_fit)
+    model = pipeline.named_steps["model"]
+    params = get_booster_params(model)
+    if dataset_cache_dir is None:
+        dataset = lgb.Dataset(preprocessor.transform(x_fit), label=np.asarray(y_fit), params=params)
+    else:
+        dataset = load_binned_dataset(x_fit, y_fit, preprocessor, params, dataset_cache_dir)
+    if early_stopping_rounds is None:
+        fit_classifier_on_dataset(model, dataset, params)
+    else:
+        valid_set = lgb.Dataset(preprocessor.transform(x_valid), label=np.asarray(y_valid), reference=dataset)
+        callbacks = [lgb.early_stopping(early_stopping_rounds, verbose=False)]
+        metrics_logger = None
+        if mlflow.active_run() is not None:
+            metrics_logger = MlflowMetricsLogger(mlflow.active_run().info.run_id)
+            callbacks.append(metrics_logger)
+        fit_classifier_on_dataset(model, dataset, params, valid_set, callbacks)
+        if metrics_logger is not None:
+            metrics_logger.flush()
+        logger.info(f"Early stopped at best iteration {model.best_iteration_} of {n_estimators}.")
+    logger.info("Successfully trained pipeline.")
+    return pipeline
+
+
+def run_cross_validation(
+    pipeline: Pipeline,
+    x_train: pd.DataFrame,
+    y_train: pd.Series,
+    cv_strategy: str,
+    n_splits: int,
+    random_state: int,
+    n_workers: int | None = None,
+) -> None:
+    """Cross-validate the pipeline configuration on the training data, logging to the active MLflow run.
+
+    The mean and standard deviation of each metric over the folds are logged as metrics, and the out-of-fold
+    predicted probabilities as a Parquet artifact, with the PolNum and fold of each row.
+    """
+    preprocessor = pipeline.named_steps["preprocessor"]
+    params = get_booster_params(pipeline.named_steps["model"])
+    folds = make_folds(x_train, y_train, cv_strategy, n_splits, random_state)
+    fold_metrics, oof_predictions = cross_validate(preprocessor.transform(x_train), y_train, folds, params, n_workers)
+    mlflow.log_param("cv_strategy", cv_strategy)
+    mlflow.log_param("cv_n_splits", len(folds))
+    mlflow.log_metrics({f"cv_{k}_mean": v for k, v in fold_metrics.mean().items()})
+    mlflow.log_metrics({f"cv_{k}_std": v for k, v in fold_metrics.std().items()})
+    fold = np.full(len(x_train), -1)
+    for i, (_, valid_rows) in enumerate(folds):
+        fold[valid_rows] = i
+    oof = pd.DataFrame(
+        {
+            "PolNum": x_train["PolNum"].to_numpy(),
+            "target": np.asarray(y_train),
+            "fold": fold,
+            "oof_prediction": oof_predictions,
+        }
+    )
+    with tempfile.TemporaryDirectory() as oof_dir:
+        oof.to_parquet(os.path.join(oof_dir, "oof_predictions.parquet"), index=False)
+        mlflow.log_artifacts(oof_dir, "cross_validation")
+
+
+def log_fairness_report(report: FairnessReport, artifact_path: str) -> None:
+    """Log the group metrics and disparities of a fairness report as Parquet artifacts of the active MLflow run."""
+    with tempfile.TemporaryDirectory() as report_dir:
+        report.by_group.to_parquet(os.path.join(report_dir, "by_group.parquet"), index=False)
+        report.disparities.to_parquet(os.path.join(report_dir, "disparities.parquet"))
+        mlflow.log_artifacts(report_dir, artifact_path)
+
+
+def log_fairness(
+    x_test: pd.DataFrame,
+    y_test: pd.Series,
+    y_pred: np.ndarray,
+    sensitive_features: list[str],
+    suffix: str = "",
+) -> float:
+    """Run the bias detector on test predictions and log its disparity, plot and report to the active MLflow run.
+
+    Args:
+        x_test (pd.DataFrame): The test features.
+        y_test (pd.Series): The test target.
+        y_pred (np.ndarray): The test predictions, at the decision threshold of the deployed model.
+        sensitive_features (list[str]): The sensitive feature columns.
+        suffix (str): The suffix of the logged metric, figure and artifact names.
+
+    Returns:
+        float: The disparity of the first sensitive feature.
+    """
+    fairness_results = run_bias_detector(x_test, y_test, y_pred, sensitive_features)
+    mlflow.log_metric(f"disparity{suffix}", fairness_results["disparity"])
+    mlflow.log_figure(fairness_results["fairness_plot"].figure, f"fairness_plot{suffix}.png")
+    log_fairness_report(fairness_results["report"], f"fairness{suffix}")
+    return fairness_results["disparity"]
+
+
+def hold_out_threshold_data(
+    x_train: pd.DataFrame,
+    y_train: pd.Series,
+    threshold_metric: str | None,
+    validation_size: float,
+    random_state: int,
+) -> tuple[pd.DataFrame, pd.Series, pd.DataFrame | None, pd.Series | None]:
+    """Hold out `validation_size` of the training data to choose the decision threshold on, when one is swept.
+
+    The threshold is then chosen on rows the model is not trained on, and the test metrics stay unbiased by it.
+
+    Returns:
+        tuple: A tuple containing the remaining training features and target, and the held out features and target,
+        None when no threshold is swept.
+    """
+    if threshold_metric is None:
+        return x_train, y_train, None, None
+    x_fit, x_threshold, y_fit, y_threshold = split_data(x_train, y_train, 1 - validation_size, random_state)
+    mlflow.log_metric("threshold_size", len(x_threshold))
+    return x_fit, y_fit, x_threshold, y_threshold
+
+
+def predict_with_threshold(
+    model: Any,  # noqa: ANN401
+    x_test: pd.DataFrame,
+    x_threshold: pd.DataFrame | None,
+    y_threshold: pd.Series | None,
+    threshold_metric: str | None,
+) -> tuple[np.ndarray, float | None]:
+    """Predict test labels, at the decision threshold maximizing a metric when one is given.
+
+    The thresholds are swept on the predicted probabilities of held out training rows, see
+    `hold_out_threshold_data`, the sweep being logged to the active MLflow run. The chosen threshold is only
+    applied to the test set.
+
+    Args:
+        model (Any): The fitted classifier.
+        x_test (pd.DataFrame): The test features.
+        x_threshold (pd.DataFrame | None): The held out features the threshold is chosen on.
+        y_threshold (pd.Series | None): The held out target the threshold is chosen on.
+        threshold_metric (str | None): The metric to maximize, see `optimal_threshold`, or None to predict at the
+            default threshold of the model.
+
+    Returns:
+        tuple: A tuple containing the predicted labels and the decision threshold, None if not swept.
+    """
+    if threshold_metric is None:
+        return model.predict(x_test), None
+    sweep = threshold_sweep(y_threshold, model.predict_proba(x_threshold)[:, 1])
+    decision_threshold = optimal_threshold(sweep, threshold_metric)
+    logger.info(f"Decision threshold maximizing {threshold_metric}: {decision_threshold:.4f}")
+    mlflow.log_param("threshold_metric", threshold_metric)
+    mlflow.log_metric("decision_threshold", decision_threshold)
+    with tempfile.TemporaryDirectory() as sweep_dir:
+        sweep.to_parquet(os.path.join(sweep_dir, "threshold_sweep.parquet"), index=False)
+        mlflow.log_artifacts(sweep_dir, "threshold_sweep")
+    return (model.predict_proba(x_test)[:, 1] >= decision_threshold).astype(int), decision_threshold
+
+
+def run_incremental_training(
+    train_full: Callable[[], Pipeline],
+    x_train: pd.DataFrame,
+    y_train: pd.Series,
+    x_test: pd.DataFrame,
+    y_test: pd.Series,
+    model_name: str,
+    model_stage: str,
+    new_data_since: int | None,
+    n_estimators: int,
+    compare_full_retrain: bool,
+    max_roc_auc_drop: float,
+    train_size: float,
+) -> Pipeline:
+    """Continue training the production model on the new training data, logging to the active MLflow run.
+
+    When boosting cannot be continued from the production model, such as a fairness-mitigated mixture, or when the
+    production model may have been trained on rows of the hash split test set of `train_size`, the model is
+    retrained in full with `train_full` instead, tagging the run with the reason. With `compare_full_retrain`, a full
+    retrain from `train_full` is evaluated on the same holdout, and kept instead
+    of the incremental model when the ROC AUC of the latter is more than `max_roc_auc_drop` lower.
+    """
+    start = time.perf_counter()
+    model_version = get_latest_model_version(model_name, model_stage)
+    production_model = load_model_version(model_version)
+    if isinstance(production_model, ThresholdedModel):
+        production_model = production_model.model
+    fallback_reason = split_leakage_reason(mlflow.get_run(model_version.run_id).data.params, train_size)
+    if not can_continue_training(production_model):
+        fallback_reason = f"cannot continue training a {type(production_model).__name__}"
+    if fallback_reason is not None:
+        logger.warning(f"Retraining in full, {fallback_reason}.")
+        mlflow.set_tag("training_mode_selected", "full")
+        mlflow.set_tag("incremental_fallback", fallback_reason)
+        return train_full()
+    x_new, y_new = select_new_data(x_train, y_train, new_data_since)
+    pipeline = continue_training(production_model, x_new, y_new, n_estimators)
+    mlflow.log_metric("incremental_fit_time", time.perf_counter() - start)
+    mlflow.log_metric("incremental_train_size", len(x_new))
+    if not compare_full_retrain:
+        return pipeline
+    start = time.perf_counter()
+    full_pipeline = train_full()
+    mlflow.log_metric("full_fit_time", time.perf_counter() - start)
+    retrain_report = compare_retrains(pipeline, full_pipeline, x_test, y_test)
+    mlflow.log_metrics(retrain_report)
+    if retrain_report["roc_auc_delta"] < -max_roc_auc_drop:
+        logger.info("Full retrain outperforms incremental training, keeping the full retrain.")
+        mlflow.set_tag("training_mode_selected", "full")
+        return full_pipeline
+    mlflow.set_tag("training_mode_selected", "incremental")
+    return pipeline
+
+
 def training_pipeline(  # noqa: D103
     data_path: str,
     n_estimators: int,
@@ -56,6 +420,25 @@ def training_pipeline(  # noqa: D103
     model_stage: str,
     model_card_config: dict,
     sensitive_feature: str,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    validation_mode: str = "full",
+    mitigation_mode: str = "binned",
+    distill_mitigator: bool = False,
+    dataset_cache_dir: str | None = DEFAULT_DATASET_CACHE_DIR,
+    cv_strategy: str | None = None,
+    n_splits: int = 5,
+    n_workers: int | None = None,
+    early_stopping_rounds: int | None = None,
+    validation_size: float = 0.1,
+    training_mode: str = "full",
+    new_data_since: int | None = None,
+    incremental_n_estimators: int = 50,
+    compare_full_retrain: bool = True,
+    max_roc_auc_drop: float = 0.005,
+    categorical_encoding: str = "onehot",
+    split_mode: str = "random",
+    threshold_metric: str | None = None,
+    fairness_features: list[str] | None = None,
 ) -> None:
     mlflow.set_experiment(experiment_name)
 
@@ -63,7 +446,6 @@ def training_pipeline(  # noqa: D103
         description="Training pipeline of a LightGBM model for binary classification", run_name=run_name
     ) as run:
         mlflow.set_tag("model_type", "LightGBM")
-        mlflow.set_tag("data_version", "v1")
 
         logger.info(f"Data path: {data_path}")
         logger.info(f"Number of estimators: {n_estimators}")
@@ -75,65 +457,118 @@ def training_pipeline(  # noqa: D103
         mlflow.log_param("learning_rate", learning_rate)
         mlflow.log_param("max_depth", max_depth)
 
-        data = read_data(data_path)
-        mlflow.log_metric("dataset_size", len(data))
-
-        x, y = preprocess_data(data, columns_to_drop, target_col_name)
-        mlflow.log_metric("num_features", x.shape[1])
-
-        validated_x, validated_y = validate_schemas(x, y)
-
-        x_train, x_test, y_train, y_test = split_data(validated_x, validated_y, train_size, random_state)
+        validated_x, validated_y, data_version, data_metadata = load_preprocessed_data(
+            data_path, columns_to_drop, target_col_name, cache_dir, validation_mode
+        )
+        mlflow.set_tag("data_version", data_version)
+        mlflow.log_metric("dataset_size", data_metadata["dataset_size"])
+        mlflow.log_metric("num_features", validated_x.shape[1])
+
+        split_mode = resolve_split_mode(training_mode, split_mode)
+        x_train, x_test, y_train, y_test = split_data(validated_x, validated_y, train_size, random_state, split_mode)
+        x_train, y_train, x_threshold, y_threshold = hold_out_threshold_data(
+            x_train, y_train, threshold_metric, validation_size, random_state
+        )
+        mlflow.log_params({"split_mode": split_mode, "split_train_size": train_size})
         mlflow.log_metric("train_size", len(x_train))
         mlflow.log_metric("test_size", len(x_test))
 
-        pipeline = train_pipeline(
-            x_train, y_train, model_objective, verbose, n_estimators, learning_rate, max_depth, random_state
+        train_full = partial(
+            train_pipeline,
+            x_train,
+            y_train,
+            model_objective,
+            verbose,
+            n_estimators,
+            learning_rate,
+            max_depth,
+            random_state,
+            dataset_cache_dir,
+            early_stopping_rounds,
+            validation_size,
+            categorical_encoding,
         )
+        mlflow.log_param("training_mode", training_mode)
+        mlflow.log_param("categorical_encoding", categorical_encoding)
+        if training_mode == "incremental":
+            pipeline = run_incremental_training(
+                train_full,
+                x_train,
+                y_train,
+                x_test,
+                y_test,
+                model_name,
+                model_stage,
+                new_data_since,
+                incremental_n_estimators,
+                compare_full_retrain,
+                max_roc_auc_drop,
+                train_size,
+            )
+        else:
+            pipeline = train_full()
+        if early_stopping_rounds is not None and pipeline.named_steps["model"].best_iteration_ is not None:
+            mlflow.log_param("early_stopping_rounds", early_stopping_rounds)
+            mlflow.log_metric("best_iteration", pipeline.named_steps["model"].best_iteration_)
 
-        y_pred = pipeline.predict(x_test)
-        fairness_results = run_bias_detector(x_test, y_test, y_pred, sensitive_feature)
-        mlflow.log_metric("disparity", fairness_results["disparity"])
-        mlflow.log_figure(fairness_results["fairness_plot"].figure, "fairness_plot.png")
-        if fairness_results["disparity"] > 0.01:
-            mitigator = train_mitigator(x_train, y_train, sensitive_feature)
-            y_pred_mitigated = mitigator.predict(x_test)
-            fairness_results_mitigated = run_bias_detector(x_test, y_test, y_pred_mitigated, sensitive_feature)
-            mlflow.log_metric("disparity_mitigated", fairness_results_mitigated["disparity"])
-            mlflow.log_figure(fairness_results_mitigated["fairness_plot"].figure, "fairness_plot_mitigated.png")
-
-        y_pred = mitigator.predict(x_test)
+        if cv_strategy is not None:
+            run_cross_validation(pipeline, x_train, y_train, cv_strategy, n_splits, random_state, n_workers)
+
+        sensitive_features = [sensitive_feature, *(fairness_features or [])]
+        y_pred, decision_threshold = predict_with_threshold(
+            pipeline, x_test, x_threshold, y_threshold, threshold_metric
+        )
+        disparity = log_fairness(x_test, y_test, y_pred, sensitive_features)
+        model = pipeline
+        if disparity > 0.01:
+            mitigator = train_mitigator(
+                pipeline, x_train, y_train, sensitive_feature, mitigation_mode, dataset_cache_dir=dataset_cache_dir
+            )
+            for step, duration in enumerate(mitigator.oracle_execution_times_):
+                mlflow.log_metric("mitigation_fit_time", duration, step=step)
+            model, collapse_report = collapse_mitigator(
+                mitigator, pipeline, x_train, x_test, y_test, sensitive_feature, distill=distill_mitigator
+            )
+            mlflow.log_metrics({f"collapse_{k}": v for k, v in collapse_report.items()})
+            y_pred, decision_threshold = predict_with_threshold(
+                model, x_test, x_threshold, y_threshold, threshold_metric
+            )
+            log_fairness(x_test, y_test, y_pred, sensitive_features, suffix="_mitigated")
         logger.info("Successfully calculated predictions")
-        metrics = calculate_metrics(y_pred, y_test)
+        metrics = calculate_metrics(y_pred, y_test, plot_confusion_matrix=True)
+        mlflow.log_figure(metrics.pop("cm").figure_, "testing_confusion_matrix.png")
         logger.info("\n\t".join([f"{k}: {v}" for k, v in metrics.items()]))
-        cm_figure = metrics.pop("cm", None).figure_
-        if cm_figure:
-            mlflow.log_figure(cm_figure, "testing_confusion_matrix.png")
         for k, v in metrics.items():
             mlflow.log_metric(k, v)
 
         explanation = run_explainer(pipeline, x_test)
         mlflow.log_params({"importance_" + k: v for k, v in explanation.feature_importances.items()})
-        mlflow.log_dict({"shap_values": explanation.shap_values.tolist()}, "shap_values.json")
+        with tempfile.TemporaryDirectory() as shap_dir:
+            save_shap_values(explanation.shap_values, explanation.feature_names, shap_dir)
+            mlflow.log_artifacts(shap_dir, "shap")
         mlflow.log_figure(explanation.shap_summary_plot, "shap_summary_plot.png")
         mlflow.log_figure(explanation.shap_force_plot, "shap_force_plot.png")
         mlflow.log_figure(explanation.feature_importances_plot, "feature_importances_plot.png")
 
         signature = infer_signature(x_test, y_pred)
-        mlflow.lightgbm.log_model(mitigator, "lightgbm_model", signature=signature)
+        mlflow.lightgbm.log_model(model, "lightgbm_model", signature=signature)
 
         model_uri = f"runs:/{run.info.run_id}/lightgbm_model"
-        registered_model = mlflow.register_model(model_uri, model_name)
+        version_tags = None if decision_threshold is None else {DECISION_THRESHOLD_TAG: str(decision_threshold)}
+        registered_model = mlflow.register_model(model_uri, model_name, tags=version_tags)
         logger.info(f"Model registered with name: {registered_model.name}, version: {registered_model.version}")
 
         client = mlflow.tracking.MlflowClient()
+        accuracy_interval = (metrics["accuracy_lower"], metrics["accuracy_upper"])
         if metrics["roc_auc"] >= 0.5 and check_is_model_better(
-            model_name, model_stage, metrics["accuracy"], "accuracy"
+            model_name, model_stage, metrics["accuracy"], "accuracy", accuracy_interval
         ):
             client.transition_model_version_stage(registered_model.name, registered_model.version, stage=model_stage)
             client.set_model_version_tag(
                 name=registered_model.name, version=registered_model.version, key="validated_ROC_AUC", value=True
             )
+            from lib.model_card import create_model_card
+
             model_card_md = create_model_card(registered_model.name, model_card_config)
             with open("./lib/model_card/model_cards/model_card_prod.md", "w") as f:
                 f.write(model_card_md)
@@ -144,32 +579,252 @@ def training_pipeline(  # noqa: D103
             )
 
 
-def inference_pipeline(
+def out_of_core_training_pipeline(
     data_path: str,
+    n_estimators: int,
+    learning_rate: float,
+    max_depth: int,
+    experiment_name: str,
+    run_name: str,
+    target_col_name: str,
+    random_state: int,
+    model_objective: str,
+    verbose: int,
     model_name: str,
-    model_stage: str,
+    train_size: float | None = None,
 ) -> None:
-    """Run the inference pipeline on the provided data path."""
-    data = read_data(data_path)
+    """Train and register a pipeline on a Parquet file of preprocessed data larger than memory.
+
+    The Parquet file holds the validated features and target, as written by the data cache, and is read row group
+    by row group, see `train_out_of_core`. With `train_size`, the file is first split by hashing PolNum, see
+    `split_parquet`, the pipeline being trained on the training rows and evaluated on the others.
+    """
+    mlflow.set_experiment(experiment_name)
+    with mlflow.start_run(description="Out-of-core training of a LightGBM model", run_name=run_name) as run:
+        mlflow.set_tag("model_type", "LightGBM")
+        mlflow.log_params(
+            {
+                "data_path": data_path,
+                "n_estimators": n_estimators,
+                "learning_rate": learning_rate,
+                "max_depth": max_depth,
+                "training_mode": "out_of_core",
+            }
+        )
+        model = init_model(model_objective, verbose, n_estimators, learning_rate, max_depth, random_state)
+        with tempfile.TemporaryDirectory() as split_dir:
+            train_path = data_path
+            if train_size is not None:
+                train_path = os.path.join(split_dir, "train.parquet")
+                test_path = os.path.join(split_dir, "test.parquet")
+                _, n_test = split_parquet(data_path, train_path, test_path, train_size)
+                mlflow.log_params({"split_mode": "hash", "split_train_size": train_size})
+                mlflow.log_metric("test_size", n_test)
+            start = time.perf_counter()
+            pipeline = train_out_of_core(train_path, target_col_name, model)
+            mlflow.log_metric("fit_time", time.perf_counter() - start)
+            mlflow.log_metric("train_size", pq.ParquetFile(train_path).metadata.num_rows)
+            if train_size is not None:
+                mlflow.log_metrics(evaluate_out_of_core(pipeline, test_path, target_col_name))
+        mlflow.lightgbm.log_model(pipeline, "lightgbm_model")
+        registered_model = mlflow.register_model(f"runs:/{run.info.run_id}/lightgbm_model", model_name)
+        logger.info(f"Model registered with name: {registered_model.name}, version: {registered_model.version}")
+
 
-    client = mlflow.MlflowClient()
-    latest_production_version = client.get_latest_versions(name=model_name, stages=[model_stage])
-    latest_production_version_sorted = sorted(latest_production_version, key=lambda mv: mv.version, reverse=True)
-    logger.info(f"Loaded model: {latest_production_version_sorted[0]}")
+def search_pipeline(
+    data_path: str,
+    experiment_name: str,
+    run_name: str,
+    columns_to_drop: list,
+    target_col_name: str,
+    train_size: float,
+    random_state: int,
+    model_objective: str,
+    verbose: int,
+    search_space: dict,
+    search_strategy: str = "random",
+    n_candidates: int = 27,
+    min_n_estimators: int = 10,
+    max_n_estimators: int = 270,
+    reduction_factor: int = 3,
+    n_workers: int | None = None,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    validation_mode: str = "full",
+    feature_store_dir: str = DEFAULT_FEATURE_STORE_DIR,
+    split_mode: str = "random",
+) -> dict:
+    """Search LightGBM hyperparameters with successive halving over n_estimators.
+
+    Data is loaded, split and preprocessed once into a feature store under `feature_store_dir`, reused by later
+    searches on the same data and split. Candidates are evaluated on the held out split across a pool of processes,
+    each memory-mapping the store instead of receiving its own copy of the data. Every candidate is logged as a
+    child run of a single parent run, with its validation ROC AUC at each number of estimators it was trained with.
+
+    Returns:
+        dict: The best hyperparameters, including n_estimators.
+    """
+    mlflow.set_experiment(experiment_name)
 
-    model_uri = latest_production_version_sorted[0].source
-    pipeline = mlflow.lightgbm.load_model(model_uri)
+    with mlflow.start_run(description="Hyperparameter search of a LightGBM model", run_name=run_name):
+        mlflow.set_tag("model_type", "LightGBM")
+        mlflow.log_params(
+            {
+                "data_path": data_path,
+                "search_strategy": search_strategy,
+                "n_candidates": n_candidates,
+                "min_n_estimators": min_n_estimators,
+                "max_n_estimators": max_n_estimators,
+                "reduction_factor": reduction_factor,
+                "split_mode": split_mode,
+            }
+        )
+
+        validated_x, validated_y, data_version, _ = load_preprocessed_data(
+            data_path, columns_to_drop, target_col_name, cache_dir, validation_mode
+        )
+        mlflow.set_tag("data_version", data_version)
+        x_train, x_valid, y_train, y_valid = split_data(validated_x, validated_y, train_size, random_state, split_mode)
+        store_dir = os.path.join(feature_store_dir, f"{data_version}_{split_mode}_{train_size}_{random_state}")
+        feature_store = open_feature_store(store_dir)
+        if feature_store is not None:
+            logger.info(f"Attached to feature store {store_dir}.")
+        else:
+            preprocessor = init_preprocessor(x_train).fit(x_train)
+            matrices = {
+                "x_train": preprocessor.transform(x_train),
+                "y_train": y_train.to_numpy(),
+                "x_valid": preprocessor.transform(x_valid),
+                "y_valid": y_valid.to_numpy(),
+            }
+            feature_store = write_feature_store(store_dir, matrices, preprocessor.get_feature_names_out())
+
+        candidates = sample_candidates(search_space, search_strategy, n_candidates, random_state)
+        base_params = {"objective": model_objective, "verbose": verbose, "seed": random_state}
+        trials = successive_halving(
+            candidates,
+            feature_store,
+            base_params,
+            min_n_estimators,
+            max_n_estimators,
+            reduction_factor,
+            n_workers,
+        )
 
-    logger.info("Successfully loaded pipeline")
+        for i, trial in enumerate(trials):
+            with mlflow.start_run(run_name=f"{run_name}-trial-{i}", nested=True):
+                mlflow.log_params(trial.params)
+                if trial.pruned_at is not None:
+                    mlflow.set_tag("pruned_at", trial.pruned_at)
+                for budget, score in trial.scores.items():
+                    mlflow.log_metric("roc_auc", score, step=budget)
+                    mlflow.log_metric("fit_time", trial.durations[budget], step=budget)
 
-    y_pred = pipeline.predict(data)
-    logger.info("Successfully predicted target on inference data")
-    logger.info(f"Predicted {y_pred.shape[0]} data point")
-    logger.info(f"Predicted {y_pred.sum()} data point")
+        best = best_trial(trials)
+        best_params = {**best.params, "n_estimators": max(best.scores)}
+        mlflow.log_params({"best_" + k: v for k, v in best_params.items()})
+        mlflow.log_metric("best_roc_auc", best.scores[max(best.scores)])
+        logger.info(f"Best hyperparameters: {best_params}")
+        return best_params
+
+
+def categorical_encoding_benchmark(
+    data_path: str,
+    n_estimators: int,
+    learning_rate: float,
+    max_depth: int,
+    experiment_name: str,
+    run_name: str,
+    columns_to_drop: list,
+    target_col_name: str,
+    train_size: float,
+    random_state: int,
+    model_objective: str,
+    verbose: int,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    validation_mode: str = "full",
+) -> pd.DataFrame:
+    """Compare the categorical encodings on the same split, each being logged as a child run of a single run.
+
+    Returns:
+        pd.DataFrame: The memory use, run times and test metrics of each encoding, see `benchmark_pipeline`.
+    """
+    mlflow.set_experiment(experiment_name)
+
+    with mlflow.start_run(description="Benchmark of categorical encodings", run_name=run_name):
+        validated_x, validated_y, data_version, _ = load_preprocessed_data(
+            data_path, columns_to_drop, target_col_name, cache_dir, validation_mode
+        )
+        mlflow.set_tag("data_version", data_version)
+        x_train, x_test, y_train, y_test = split_data(validated_x, validated_y, train_size, random_state)
+        results = {}
+        for categorical_encoding in CATEGORICAL_ENCODINGS:
+            pipeline = init_pipeline(
+                x_train,
+                model_objective,
+                verbose,
+                n_estimators,
+                learning_rate,
+                max_depth,
+                random_state,
+                categorical_encoding,
+            )
+            results[categorical_encoding] = benchmark_pipeline(pipeline, x_train, y_train, x_test, y_test)
+            with mlflow.start_run(run_name=f"{run_name}-{categorical_encoding}", nested=True):
+                mlflow.log_param("categorical_encoding", categorical_encoding)
+                mlflow.log_metrics(results[categorical_encoding])
+        results = pd.DataFrame(results)
+        logger.info(f"Categorical encoding benchmark:\n{results}")
+        return results
+
+
+def inference_pipeline(
+    data_path: str,
+    model_name: str,
+    model_stage: str,
+    output_path: str | None = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    n_workers: int = 1,
+    model_cache_dir: str = DEFAULT_MODEL_CACHE_DIR,
+    reason_codes: int = 0,
+    reason_code_method: str = "treeshap",
+) -> None:
+    """Run the inference pipeline on the provided data path.
+
+    Data is scored chunk by chunk, so memory stays bounded whatever the size of the input file. Predictions are
+    written with the PolNum of each row to `output_path` (Parquet or CSV) when given. With more than one worker,
+    each chunk is sharded across a pool of processes each holding its own copy of the model. Model artifacts are
+    loaded from the local cache in `model_cache_dir`, only being downloaded the first time a version is used.
+    With `reason_codes` > 0, the top contributing features of every row are written along with its prediction,
+    computed with `reason_code_method` (see `ReasonCodeExplainer`), which requires an `output_path`.
+
+    Raises:
+        ValueError: If reason codes are requested without an output path.
+    """
+    if reason_codes > 0 and not output_path:
+        raise ValueError("Reason codes are written to the output file, an output path is required")
+    model_version = get_latest_model_version(model_name, model_stage)
+    logger.info(f"Loaded model: {model_version}")
+    artifact_cache = ModelArtifactCache(model_cache_dir)
+    model = load_model_version(model_version, artifact_cache)
+    explain_fn = ReasonCodeExplainer(model, reason_codes, reason_code_method) if reason_codes > 0 else None
+    if n_workers > 1:
+        model_context = ShardedPredictor(partial(load_model_version, model_version, artifact_cache), n_workers)
+    else:
+        model_context = nullcontext(model)
+
+    with model_context as pipeline:
+        logger.info("Successfully loaded pipeline")
+
+        n_rows, n_positive = score_file(pipeline, data_path, output_path, chunksize, explain_fn=explain_fn)
+        logger.info("Successfully predicted target on inference data")
+        logger.info(f"Predicted {n_rows} data point")
+        logger.info(f"Predicted {n_positive} data point")
 
 
 def trigger_pipeline(config_path: str, model_cards_config_path: str, pipeline_type: str) -> None:
-    """Trigger training or inference pipeline code locally."""
+    """Trigger training, out-of-core training, search, benchmark, inference or serving pipeline code locally."""
+    from lib.utils import load_config
+
     config = load_config(config_path)[pipeline_type]
     if pipeline_type == "training":
         model_card_config = load_config(model_cards_config_path)
@@ -180,8 +835,31 @@ def trigger_pipeline(config_path: str, model_cards_config_path: str, pipeline_ty
             model_card_config=model_card_config,
             **config["ml_config"],
         )
+    elif pipeline_type == "out_of_core_training":
+        out_of_core_training_pipeline(
+            data_path="./data/pg15training.parquet",
+            experiment_name="axa-mleng-mlflow",
+            run_name="run123456",
+            **config["ml_config"],
+        )
+    elif pipeline_type == "benchmark":
+        categorical_encoding_benchmark(
+            data_path="./data/pg15training.csv",
+            experiment_name="axa-mleng-mlflow",
+            run_name="benchmark123456",
+            **config["ml_config"],
+        )
     elif pipeline_type == "inference":
         inference_pipeline(data_path="./data/pg15pricing.csv", **config["ml_config"])
+    elif pipeline_type == "search":
+        search_pipeline(
+            data_path="./data/pg15training.csv",
+            experiment_name="axa-mleng-mlflow",
+            run_name="search123456",
+            **config["ml_config"],
+        )
+    elif pipeline_type == "serving":
+        serve(**config["ml_config"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,176 @@
+import lightgbm as lgb
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from lightgbm import LGBMClassifier
+from loguru import logger
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from lib.cross_validation import calculate_fold_metrics
+from lib.data_preprocessing import DEFAULT_SPLIT_KEY, hash_split_mask
+from lib.dataset_cache import fit_classifier_on_dataset
+from lib.model_evaluation import get_booster_params
+
+
+def is_categorical_field(field: pa.Field) -> bool:
+    """Return whether a Parquet column holds categorical values, stored as strings or dictionary encoded."""
+    field_type = field.type.value_type if pa.types.is_dictionary(field.type) else field.type
+    return pa.types.is_string(field_type) or pa.types.is_large_string(field_type)
+
+
+def scan_parquet(path: str, target_col_name: str, categorical_columns: list[str]) -> tuple[dict[str, list], np.ndarray]:
+    """Collect the categories of categorical columns and the target of a Parquet file, one row group at a time.
+
+    Only the categorical columns and the target are read, so the features are never held in memory at once.
+
+    Args:
+        path (str): The Parquet file path.
+        target_col_name (str): The name of the target column.
+        categorical_columns (list[str]): The categorical columns.
+
+    Returns:
+        tuple: A tuple containing the sorted categories of each categorical column and the target.
+    """
+    parquet_file = pq.ParquetFile(path)
+    categories = {column: set() for column in categorical_columns}
+    targets = []
+    for i in range(parquet_file.num_row_groups):
+        chunk = parquet_file.read_row_group(i, columns=[*categorical_columns, target_col_name]).to_pandas()
+        for column in categorical_columns:
+            categories[column].update(chunk[column].dropna().unique())
+        targets.append(chunk[target_col_name].to_numpy())
+    return {column: sorted(values) for column, values in categories.items()}, np.concatenate(targets)
+
+
+class ParquetSequence(lgb.Sequence):
+    """LightGBM Sequence reading the features of a Parquet file row group by row group.
+
+    Each row group is read and preprocessed when first accessed, and kept until another one is, so that the
+    sequential batches and sorted row samples LightGBM reads while constructing a Dataset decode every row group
+    once per pass.
+    """
+
+    def __init__(self, path: str, columns: list[str], preprocessor: ColumnTransformer) -> None:
+        """Initialize the sequence.
+
+        Args:
+            path (str): The Parquet file path.
+            columns (list[str]): The feature columns to read.
+            preprocessor (ColumnTransformer): The fitted preprocessor applied to each row group.
+        """
+        self._file = pq.ParquetFile(path)
+        self.columns = columns
+        self.preprocessor = preprocessor
+        row_group_sizes = [self._file.metadata.row_group(i).num_rows for i in range(self._file.num_row_groups)]
+        self._offsets = np.cumsum([0, *row_group_sizes])
+        self.batch_size = max(row_group_sizes)
+        self._cached_index = None
+        self._cached_rows = None
+
+    def __len__(self) -> int:  # noqa: D105
+        return int(self._offsets[-1])
+
+    def _read_row_group(self, index: int) -> np.ndarray:
+        if index != self._cached_index:
+            chunk = self._file.read_row_group(index, columns=self.columns).to_pandas()
+            rows = self.preprocessor.transform(chunk)
+            self._cached_rows = rows.toarray() if sparse.issparse(rows) else np.asarray(rows, dtype=np.float64)
+            self._cached_index = index
+        return self._cached_rows
+
+    def __getitem__(self, idx: int | slice) -> np.ndarray:  # noqa: D105
+        if isinstance(idx, slice):
+            start, stop, _ = idx.indices(len(self))
+            first, last = np.searchsorted(self._offsets, [start, stop - 1], side="right") - 1
+            parts = [
+                self._read_row_group(i)[max(start - self._offsets[i], 0) : stop - self._offsets[i]]
+                for i in range(first, last + 1)
+            ]
+            return parts[0] if len(parts) == 1 else np.vstack(parts)
+        index = np.searchsorted(self._offsets, idx, side="right") - 1
+        return self._read_row_group(index)[idx - self._offsets[index]]
+
+
+def train_out_of_core(path: str, target_col_name: str, model: LGBMClassifier) -> Pipeline:
+    """Fit a preprocessing and LightGBM pipeline on a Parquet file larger than memory.
+
+    A first pass collects the categories of the categorical columns and the target, from which the one-hot
+    encoding is set. The LightGBM Dataset is then binned from the row groups, each being encoded on its own, so
+    only the binned Dataset, the rows sampled to find bins and one row group are held in memory.
+
+    Args:
+        path (str): The Parquet file of preprocessed features and target.
+        target_col_name (str): The name of the target column.
+        model (LGBMClassifier): The classifier to fit.
+
+    Returns:
+        Pipeline: The fitted pipeline, as returned by `train_pipeline` on the same data.
+    """
+    schema = pq.read_schema(path)
+    columns = [name for name in schema.names if name != target_col_name]
+    categorical_columns = [name for name in columns if is_categorical_field(schema.field(name))]
+    categories, y = scan_parquet(path, target_col_name, categorical_columns)
+    encoder = OneHotEncoder(categories=[categories[column] for column in categorical_columns], handle_unknown="ignore")
+    preprocessor = ColumnTransformer(transformers=[("cat", encoder, categorical_columns)], remainder="passthrough")
+    preprocessor.fit(pq.ParquetFile(path).read_row_group(0, columns=columns).to_pandas())
+    params = get_booster_params(model)
+    dataset = lgb.Dataset(ParquetSequence(path, columns, preprocessor), label=y, params=params)
+    fit_classifier_on_dataset(model, dataset, params)
+    logger.info(f"Trained out of core on {len(y)} rows of {pq.ParquetFile(path).num_row_groups} row groups.")
+    return Pipeline(steps=[("preprocessor", preprocessor), ("model", model)])
+
+
+def split_parquet(
+    path: str,
+    train_path: str,
+    test_path: str,
+    train_size: float,
+    key_columns: tuple[str, ...] = DEFAULT_SPLIT_KEY,
+) -> tuple[int, int]:
+    """Split a Parquet file into training and testing files, one row group at a time.
+
+    Rows are assigned by hashing their key columns, see `hash_split_mask`, so the split is the same as the "hash"
+    mode of `split_data` on the whole file.
+
+    Args:
+        path (str): The Parquet file to split.
+        train_path (str): The training Parquet file to write.
+        test_path (str): The testing Parquet file to write.
+        train_size (float): The expected proportion of keys assigned to the training set.
+        key_columns (tuple[str, ...]): The columns identifying a row.
+
+    Returns:
+        tuple: The number of training and testing rows.
+    """
+    parquet_file = pq.ParquetFile(path)
+    n_rows = [0, 0]
+    schema = parquet_file.schema_arrow
+    with pq.ParquetWriter(train_path, schema) as train_writer, pq.ParquetWriter(test_path, schema) as test_writer:
+        for i in range(parquet_file.num_row_groups):
+            table = parquet_file.read_row_group(i)
+            is_train = hash_split_mask(table.select(list(key_columns)).to_pandas(), train_size, key_columns)
+            train_writer.write_table(table.filter(is_train))
+            test_writer.write_table(table.filter(~is_train))
+            n_rows[0] += int(is_train.sum())
+            n_rows[1] += int((~is_train).sum())
+    logger.info(f"Split {path} into {n_rows[0]} training and {n_rows[1]} testing rows.")
+    return n_rows[0], n_rows[1]
+
+
+def evaluate_out_of_core(pipeline: Pipeline, path: str, target_col_name: str) -> dict[str, float]:
+    """Evaluate a fitted pipeline on a Parquet file, predicting one row group at a time.
+
+    Returns:
+        dict: The evaluation metrics, see `calculate_fold_metrics`.
+    """
+    parquet_file = pq.ParquetFile(path)
+    y_true = []
+    y_proba = []
+    for i in range(parquet_file.num_row_groups):
+        chunk = parquet_file.read_row_group(i).to_pandas()
+        y_true.append(chunk.pop(target_col_name).to_numpy())
+        y_proba.append(pipeline.predict_proba(chunk)[:, 1])
+    return calculate_fold_metrics(np.concatenate(y_true), np.concatenate(y_proba))
@@ -0,0 +1,412 @@
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from multiprocessing.shared_memory import SharedMemory
+from types import TracebackType
+from typing import Any
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from loguru import logger
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+
+from lib.data_loading import DEFAULT_CHUNKSIZE, stream_data
+from lib.model_evaluation import BinnedLGBMClassifier, MixtureClassifier
+from lib.model_registry import ThresholdedModel
+
+
+class PredictionWriter:
+    """Append predictions to a Parquet or CSV file, chunk by chunk."""
+
+    def __init__(self, path: str) -> None:
+        """Initialize the writer, the file format being inferred from the path extension.
+
+        Args:
+            path (str): The path of the output file, ending with ".parquet" or ".csv".
+
+        Raises:
+            ValueError: If the extension is not supported.
+        """
+        self.extension = os.path.splitext(path)[1]
+        if self.extension not in (".parquet", ".csv"):
+            raise ValueError(f"Unsupported prediction file extension '{self.extension}', expected .parquet or .csv")
+        self.path = path
+        self._parquet_writer = None
+        self._csv_header = True
+
+    def write(self, predictions: pd.DataFrame) -> None:
+        """Append a chunk of predictions to the file."""
+        if self.extension == ".csv":
+            predictions.to_csv(self.path, mode="w" if self._csv_header else "a", header=self._csv_header, index=False)
+            self._csv_header = False
+            return
+        table = pa.Table.from_pandas(predictions, preserve_index=False)
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+        self._parquet_writer.write_table(table)
+
+    def close(self) -> None:
+        """Close the file."""
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+    def __enter__(self) -> "PredictionWriter":  # noqa: D105
+        return self
+
+    def __exit__(  # noqa: D105
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        self.close()
+
+
+def share_frame(data: pd.DataFrame) -> tuple[list[SharedMemory], list[dict]]:
+    """Copy the columns of a DataFrame into shared memory blocks.
+
+    Categorical and object columns are stored as integer codes, their categories travelling in the column specs.
+    A chunk is only shared for one `ShardedPredictor.predict` call, so it stays in memory rather than being written
+    to a `FeatureStore` for every chunk scored.
+
+    Args:
+        data (pd.DataFrame): The DataFrame to share.
+
+    Returns:
+        tuple: A tuple containing the shared memory blocks, to close and unlink once done, and the column specs to
+        pass to `attach_frame`.
+    """
+    blocks = []
+    specs = []
+    for name, column in data.items():
+        categories = None
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            values, categories = column.cat.codes.to_numpy(), column.cat.categories
+        elif column.dtype == object:
+            values, categories = pd.factorize(column)
+        else:
+            values = column.to_numpy()
+        block = SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+        blocks.append(block)
+        specs.append({"name": name, "shm_name": block.name, "dtype": values.dtype.str, "categories": categories})
+    return blocks, specs
+
+
+def attach_frame(specs: list[dict], n_rows: int, start: int, stop: int) -> tuple[pd.DataFrame, list[SharedMemory]]:
+    """Rebuild rows of a DataFrame shared with `share_frame`, without copying numeric columns.
+
+    Args:
+        specs (list[dict]): The column specs returned by `share_frame`.
+        n_rows (int): The number of rows of the shared DataFrame.
+        start (int): The first row to rebuild.
+        stop (int): The row after the last row to rebuild.
+
+    Returns:
+        tuple: A tuple containing the rebuilt rows and the attached shared memory blocks, to close once done.
+    """
+    blocks = []
+    columns = {}
+    for spec in specs:
+        block = SharedMemory(name=spec["shm_name"])
+        blocks.append(block)
+        values = np.ndarray((n_rows,), dtype=np.dtype(spec["dtype"]), buffer=block.buf)[start:stop]
+        if spec["categories"] is not None:
+            values = pd.Categorical.from_codes(values, categories=spec["categories"])
+        columns[spec["name"]] = values
+    return pd.DataFrame(columns, copy=False), blocks
+
+
+_worker_model = None
+
+
+def _load_worker_model(load_model: Callable[[], Any]) -> None:
+    global _worker_model
+    _worker_model = load_model()
+
+
+def _predict_shard(specs: list[dict], output_spec: dict, n_rows: int, start: int, stop: int) -> None:
+    data, blocks = attach_frame(specs, n_rows, start, stop)
+    output_block = SharedMemory(name=output_spec["shm_name"])
+    output = np.ndarray((n_rows,), dtype=np.dtype(output_spec["dtype"]), buffer=output_block.buf)
+    output[start:stop] = _worker_model.predict(data)
+    del data, output
+    for block in [*blocks, output_block]:
+        block.close()
+
+
+class ShardedPredictor:
+    """Predict DataFrames over a pool of processes, each holding its own copy of the model.
+
+    Input rows are passed to the workers through shared memory and split into contiguous shards, each worker writing
+    its predictions at the shard offsets of a shared output array, so predictions come back in input order.
+    """
+
+    def __init__(
+        self,
+        load_model: Callable[[], Any],
+        n_workers: int | None = None,
+        shard_size: int = 10_000,
+        output_dtype: np.dtype = np.int64,
+    ) -> None:
+        """Initialize the predictor and start its workers, loading the model once per worker.
+
+        Args:
+            load_model (Callable): A picklable function returning the model, called once in each worker.
+            n_workers (int | None): The number of worker processes, defaults to the number of CPUs.
+            shard_size (int): The number of rows predicted by a worker at once.
+            output_dtype (np.dtype): The dtype of the predictions.
+        """
+        self.shard_size = shard_size
+        self.output_dtype = np.dtype(output_dtype)
+        self._executor = ProcessPoolExecutor(
+            max_workers=n_workers or os.cpu_count(), initializer=_load_worker_model, initargs=(load_model,)
+        )
+
+    def predict(self, data: pd.DataFrame) -> np.ndarray:
+        """Predict the rows of a DataFrame, in order."""
+        n_rows = len(data)
+        blocks, specs = share_frame(data)
+        output_block = SharedMemory(create=True, size=max(n_rows * self.output_dtype.itemsize, 1))
+        output_spec = {"shm_name": output_block.name, "dtype": self.output_dtype.str}
+        try:
+            futures = [
+                self._executor.submit(
+                    _predict_shard, specs, output_spec, n_rows, start, min(start + self.shard_size, n_rows)
+                )
+                for start in range(0, n_rows, self.shard_size)
+            ]
+            for future in futures:
+                future.result()
+            return np.ndarray((n_rows,), dtype=self.output_dtype, buffer=output_block.buf).copy()
+        finally:
+            for block in [*blocks, output_block]:
+                block.close()
+                block.unlink()
+
+    def close(self) -> None:
+        """Shut the workers down."""
+        self._executor.shutdown()
+
+    def __enter__(self) -> "ShardedPredictor":  # noqa: D105
+        return self
+
+    def __exit__(  # noqa: D105
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        self.close()
+
+
+def top_k_contributions(contributions: np.ndarray, top_k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Select the k largest contributions of each row by absolute value, in decreasing order.
+
+    Args:
+        contributions (np.ndarray): The per-feature contributions, one row per prediction.
+        top_k (int): The number of contributions to keep per row.
+
+    Returns:
+        tuple: A tuple containing the feature indices and the values of the selected contributions.
+    """
+    top_k = min(top_k, contributions.shape[1])
+    magnitudes = np.abs(contributions)
+    indices = np.argpartition(-magnitudes, top_k - 1, axis=1)[:, :top_k]
+    order = np.argsort(-np.take_along_axis(magnitudes, indices, axis=1), axis=1, kind="stable")
+    indices = np.take_along_axis(indices, order, axis=1)
+    return indices, np.take_along_axis(contributions, indices, axis=1)
+
+
+def leaf_contribution_table(booster: lgb.Booster) -> tuple[sparse.csr_matrix, np.ndarray]:
+    """Tabulate the path attribution of every leaf of a LightGBM booster.
+
+    The contribution of a split feature along the path to a leaf is the change of the node value it causes, so
+    summing the rows of the leaves a sample falls into gives its per-feature contributions.
+
+    Args:
+        booster (lgb.Booster): The fitted booster.
+
+    Returns:
+        tuple: A tuple containing the (leaves, features) contribution table and the offset of each tree's leaves
+        in it.
+    """
+    rows, columns, values = [], [], []
+    leaf_offsets = []
+    n_leaves = 0
+
+    def walk(node: dict, path: dict[int, float]) -> None:
+        if "left_child" not in node:
+            rows.extend([n_leaves + node.get("leaf_index", 0)] * len(path))
+            columns.extend(path)
+            values.extend(path.values())
+            return
+        for child in (node["left_child"], node["right_child"]):
+            delta = child.get("internal_value", child.get("leaf_value")) - node["internal_value"]
+            walk(child, {**path, node["split_feature"]: path.get(node["split_feature"], 0.0) + delta})
+
+    for tree in booster.dump_model()["tree_info"]:
+        leaf_offsets.append(n_leaves)
+        walk(tree["tree_structure"], {})
+        n_leaves += tree["num_leaves"]
+    table = sparse.csr_matrix((values, (rows, columns)), shape=(n_leaves, booster.num_feature()))
+    return table, np.array(leaf_offsets)
+
+
+REASON_CODE_METHODS = ("treeshap", "path")
+
+
+def explained_components(model: Any) -> list[tuple[ColumnTransformer, lgb.Booster, float]]:  # noqa: ANN401
+    """Return the preprocessor, booster and weight of each LightGBM component of a model.
+
+    A pipeline is one component of weight 1. A mixture, such as a collapsed fairness mitigator, has one component
+    per predictor, each being a pipeline or a `BinnedLGBMClassifier`. A `ThresholdedModel` has the components of the
+    model it wraps.
+
+    Raises:
+        ValueError: If the model, or one of the predictors of a mixture, has no preprocessor and LightGBM booster.
+    """
+    if isinstance(model, ThresholdedModel):
+        model = model.model
+    if isinstance(model, MixtureClassifier):
+        predictors, weights = model.predictors, model.weights
+    else:
+        predictors, weights = [model], [1.0]
+    components = []
+    for predictor, weight in zip(predictors, weights, strict=True):
+        if isinstance(predictor, BinnedLGBMClassifier):
+            components.append((predictor.binned_data.preprocessor, predictor.booster_, float(weight)))
+        elif isinstance(predictor, Pipeline) and {"preprocessor", "model"} <= set(predictor.named_steps):
+            model_step = predictor.named_steps["model"]
+            components.append((predictor.named_steps["preprocessor"], model_step.booster_, float(weight)))
+        else:
+            raise ValueError(
+                f"Cannot explain a {type(predictor).__name__}, expected a pipeline with 'preprocessor' and LightGBM "
+                "'model' steps, or a mixture of them"
+            )
+    return components
+
+
+class ReasonCodeExplainer:
+    """Compute the top-k contributing features of every row of a chunk, as reason codes.
+
+    With the "treeshap" method, contributions are exact SHAP values computed by LightGBM's built-in TreeSHAP.
+    The "path" method approximates them by the path attribution of the leaves each row falls into, looked up in a
+    table built once, which costs little more than a plain prediction.
+
+    A mixture of models, such as a collapsed fairness mitigator, is explained by the weighted sum of the
+    contributions of its components, rows being preprocessed once per distinct preprocessor.
+    """
+
+    def __init__(self, model: Any, top_k: int = 3, method: str = "treeshap", batch_size: int = 10_000) -> None:  # noqa: ANN401
+        """Initialize the explainer.
+
+        Args:
+            model (Any): The fitted model, see `explained_components`.
+            top_k (int): The number of reason codes per row.
+            method (str): One of "treeshap" (exact) or "path" (approximate).
+            batch_size (int): The number of rows explained at once.
+
+        Raises:
+            ValueError: If the method is unknown, if the model cannot be explained, or if the components of a
+                mixture do not preprocess rows into the same features.
+        """
+        if method not in REASON_CODE_METHODS:
+            raise ValueError(f"Unknown reason code method '{method}', expected one of {REASON_CODE_METHODS}")
+        self.components = explained_components(model)
+        self.preprocessor, self.booster, _ = self.components[0]
+        self.feature_names = self.preprocessor.get_feature_names_out()
+        for preprocessor, _, _ in self.components[1:]:
+            if not np.array_equal(preprocessor.get_feature_names_out(), self.feature_names):
+                raise ValueError("The components of the model do not preprocess rows into the same features")
+        self.top_k = min(top_k, len(self.feature_names))
+        self.method = method
+        self.batch_size = batch_size
+        if method == "path":
+            self._leaf_tables = [leaf_contribution_table(booster) for _, booster, _ in self.components]
+
+    def contributions(self, x_transformed: np.ndarray | sparse.csr_matrix, component: int = 0) -> np.ndarray:
+        """Return the dense per-feature contributions of transformed rows to the booster of a component."""
+        booster = self.components[component][1]
+        if self.method == "treeshap":
+            contributions = booster.predict(x_transformed, pred_contrib=True)
+            if sparse.issparse(contributions):
+                contributions = contributions.toarray()
+            return contributions[:, :-1]
+        leaf_table, leaf_offsets = self._leaf_tables[component]
+        leaves = booster.predict(x_transformed, pred_leaf=True) + leaf_offsets
+        n_rows, n_trees = leaves.shape
+        indicator = sparse.csr_matrix(
+            (np.ones(leaves.size), leaves.ravel(), np.arange(0, leaves.size + 1, n_trees)),
+            shape=(n_rows, leaf_table.shape[0]),
+        )
+        return (indicator @ leaf_table).toarray()
+
+    def explain(self, data: pd.DataFrame) -> np.ndarray:
+        """Return the dense per-feature contributions of raw rows, weighted over the components of the model."""
+        transformed = {}
+        contributions = np.zeros((len(data), len(self.feature_names)))
+        for component, (preprocessor, _, weight) in enumerate(self.components):
+            if id(preprocessor) not in transformed:
+                transformed[id(preprocessor)] = preprocessor.transform(data)
+            contributions += weight * self.contributions(transformed[id(preprocessor)], component)
+        return contributions
+
+    def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Return, for each rank i, the `reason_i` feature name and its `reason_i_shap` contribution."""
+        indices = np.empty((len(data), self.top_k), dtype=np.intp)
+        values = np.empty((len(data), self.top_k), dtype=np.float32)
+        for start in range(0, len(data), self.batch_size):
+            batch = data.iloc[start : start + self.batch_size]
+            stop = start + len(batch)
+            indices[start:stop], values[start:stop] = top_k_contributions(self.explain(batch), self.top_k)
+        reason_codes = {}
+        for rank in range(self.top_k):
+            reason_codes[f"reason_{rank + 1}"] = pd.Categorical.from_codes(indices[:, rank], self.feature_names)
+            reason_codes[f"reason_{rank + 1}_shap"] = values[:, rank]
+        return pd.DataFrame(reason_codes, index=data.index)
+
+
+def score_file(
+    model: Any,  # noqa: ANN401
+    input_path: str,
+    output_path: str | None = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    id_column: str = "PolNum",
+    explain_fn: Callable[[pd.DataFrame], pd.DataFrame] | None = None,
+) -> tuple[int, int]:
+    """Predict a CSV file chunk by chunk, holding one chunk in memory at a time.
+
+    Args:
+        model (Any): The fitted model or pipeline.
+        input_path (str): The path of the CSV file to score.
+        output_path (str | None): The Parquet or CSV file to write the predictions to, with the id column.
+        chunksize (int): The number of rows predicted at once.
+        id_column (str): The column identifying rows in the output file.
+        explain_fn (Callable | None): A function returning explanation columns for a chunk, such as
+            a `ReasonCodeExplainer`, written to the output file alongside the predictions.
+
+    Returns:
+        tuple: A tuple containing the number of scored rows and the number of positive predictions.
+
+    Raises:
+        ValueError: If `explain_fn` is given without an `output_path` to write the explanations to.
+    """
+    if explain_fn is not None and not output_path:
+        raise ValueError("Explanations are written to the output file, an output path is required")
+    n_rows = 0
+    n_positive = 0
+    with PredictionWriter(output_path) if output_path else nullcontext() as writer:
+        for chunk in stream_data(input_path, chunksize):
+            y_pred = model.predict(chunk)
+            n_rows += len(y_pred)
+            n_positive += int(np.sum(y_pred))
+            if writer is not None:
+                predictions = pd.DataFrame({id_column: chunk[id_column].to_numpy(dtype=np.int64), "prediction": y_pred})
+                if explain_fn is not None:
+                    predictions = pd.concat([predictions, explain_fn(chunk).reset_index(drop=True)], axis=1)
+                writer.write(predictions)
+            logger.debug(f"Scored {n_rows} rows.")
+    if output_path:
+        logger.info(f"Successfully wrote predictions to {output_path}")
+    return n_rows, n_positive
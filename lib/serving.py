@@ -0,0 +1,235 @@
+import json
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from lib.model_registry import (
+    DEFAULT_MODEL_CACHE_DIR,
+    ModelArtifactCache,
+    get_latest_model_version,
+    load_model_version,
+)
+
+
+class ModelCache:
+    """Keep the latest model version of a stage loaded in memory, hot-swapping it when the stage changes."""
+
+    def __init__(
+        self,
+        model_name: str,
+        model_stage: str,
+        poll_interval: float = 30.0,
+        artifact_cache: ModelArtifactCache | None = None,
+    ) -> None:
+        """Initialize the cache and load the current model version.
+
+        Args:
+            model_name (str): The name of the registered model.
+            model_stage (str): The stage of the model version to serve.
+            poll_interval (float): The number of seconds between two registry polls.
+            artifact_cache (ModelArtifactCache | None): The local cache to load model artifacts through.
+        """
+        self.model_name = model_name
+        self.model_stage = model_stage
+        self.poll_interval = poll_interval
+        self.artifact_cache = artifact_cache
+        self._current = (None, None)
+        self._stop = threading.Event()
+        self._poller = threading.Thread(target=self._poll, daemon=True)
+        self.refresh()
+
+    def get(self) -> tuple[str, Any]:
+        """Return the served model version and the loaded model, as one consistent pair."""
+        return self._current
+
+    def refresh(self) -> bool:
+        """Load the latest model version of the stage if it changed, and swap it in.
+
+        Returns:
+            bool: Whether a new model version was swapped in.
+        """
+        model_version = get_latest_model_version(self.model_name, self.model_stage)
+        if model_version.version == self._current[0]:
+            return False
+        model = load_model_version(model_version, self.artifact_cache)
+        self._current = (model_version.version, model)
+        logger.info(f"Serving {self.model_name} version {model_version.version}.")
+        return True
+
+    def start(self) -> None:
+        """Start polling the registry in a background thread."""
+        self._poller.start()
+
+    def stop(self) -> None:
+        """Stop polling the registry."""
+        self._stop.set()
+
+    def _poll(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to refresh {self.model_name}: {e}")
+
+
+class MicroBatcher:
+    """Group concurrent prediction requests into a single call of a prediction function.
+
+    When the prediction of a batch fails, its requests are predicted one at a time so that a malformed request only
+    fails itself.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[pd.DataFrame], np.ndarray],
+        max_batch_size: int = 1024,
+        max_wait_ms: float = 5.0,
+    ) -> None:
+        """Initialize the batcher and start its worker thread.
+
+        Args:
+            predict_fn (Callable): The function predicting a whole batch.
+            max_batch_size (int): The maximum number of rows in a batch.
+            max_wait_ms (float): The maximum time to wait for more requests once a batch is started.
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._requests = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, data: pd.DataFrame) -> np.ndarray:
+        """Predict the given rows as part of the next batch, blocking until the predictions are available."""
+        future = Future()
+        self._requests.put((data, future))
+        return future.result()
+
+    def _next_batch(self) -> list[tuple[pd.DataFrame, Future]]:
+        batch = [self._requests.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                predictions = np.asarray(self.predict_fn(pd.concat([data for data, _ in batch], ignore_index=True)))
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                else:
+                    logger.warning(f"Batch of {len(batch)} requests failed, predicting them one at a time: {e}")
+                    self._run_each(batch)
+                continue
+            offsets = np.cumsum([0] + [len(data) for data, _ in batch])
+            for (_, future), start, end in zip(batch, offsets[:-1], offsets[1:], strict=True):
+                future.set_result(predictions[start:end])
+
+    def _run_each(self, batch: list[tuple[pd.DataFrame, Future]]) -> None:
+        for data, future in batch:
+            try:
+                future.set_result(np.asarray(self.predict_fn(data)))
+            except Exception as e:
+                future.set_exception(e)
+
+
+def make_request_handler(model_cache: ModelCache, batcher: MicroBatcher) -> type[BaseHTTPRequestHandler]:
+    """Build the HTTP request handler serving predictions.
+
+    `GET /health` returns the served model version, `POST /predict` takes a JSON list of records and returns their
+    predictions.
+    """
+
+    class RequestHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, body: dict) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path != "/health":
+                self._send_json(404, {"error": f"Unknown path {self.path}"})
+                return
+            self._send_json(200, {"model_name": model_cache.model_name, "model_version": model_cache.get()[0]})
+
+        def do_POST(self) -> None:  # noqa: N802
+            if self.path != "/predict":
+                self._send_json(404, {"error": f"Unknown path {self.path}"})
+                return
+            try:
+                records = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                data = pd.DataFrame.from_records(records)
+            except (TypeError, ValueError) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            try:
+                predictions = batcher.submit(data)
+            except Exception as e:
+                logger.error(f"Prediction failed: {e}")
+                self._send_json(500, {"error": str(e)})
+                return
+            self._send_json(200, {"predictions": predictions.tolist()})
+
+        def log_message(self, message_format: str, *args: object) -> None:
+            logger.debug(message_format % args)
+
+    return RequestHandler
+
+
+def serve(
+    model_name: str,
+    model_stage: str,
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    poll_interval: float = 30.0,
+    max_batch_size: int = 1024,
+    max_wait_ms: float = 5.0,
+    model_cache_dir: str = DEFAULT_MODEL_CACHE_DIR,
+) -> None:
+    """Serve predictions of the model version in a given stage over HTTP until interrupted.
+
+    Args:
+        model_name (str): The name of the registered model.
+        model_stage (str): The stage of the model version to serve.
+        host (str): The host to listen on.
+        port (int): The port to listen on.
+        poll_interval (float): The number of seconds between two registry polls.
+        max_batch_size (int): The maximum number of rows predicted at once.
+        max_wait_ms (float): The maximum time a request waits for others to be batched with.
+        model_cache_dir (str): The directory of the local model artifact cache.
+    """
+    model_cache = ModelCache(model_name, model_stage, poll_interval, ModelArtifactCache(model_cache_dir))
+    model_cache.start()
+    batcher = MicroBatcher(lambda data: model_cache.get()[1].predict(data), max_batch_size, max_wait_ms)
+    server = ThreadingHTTPServer((host, port), make_request_handler(model_cache, batcher))
+    logger.info(f"Serving {model_name} ({model_stage}) on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down server.")
+    finally:
+        server.server_close()
+        model_cache.stop()
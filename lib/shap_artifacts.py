@@ -0,0 +1,91 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+SHAP_VALUES_FILE = "shap_values.npy"
+SHAP_SUMMARY_FILE = "shap_summary.json"
+SUMMARY_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def summarize_shap_values(
+    shap_values: np.ndarray, feature_names: list[str], quantiles: tuple[float, ...] = SUMMARY_QUANTILES
+) -> dict:
+    """Summarize shap values per feature.
+
+    Args:
+        shap_values (np.ndarray): The shap values, one column per feature.
+        feature_names (list[str]): The names of the features.
+        quantiles (tuple[float, ...]): The quantiles of the shap values to compute.
+
+    Returns:
+        dict: The number of rows and, for every feature sorted by decreasing mean absolute shap value, its mean
+        absolute shap value and its shap value quantiles.
+    """
+    mean_abs = np.abs(shap_values).mean(axis=0, dtype=np.float64)
+    quantile_values = np.quantile(shap_values, quantiles, axis=0)
+    features = {
+        str(feature_names[i]): {
+            "mean_abs": float(mean_abs[i]),
+            "quantiles": {str(q): float(v) for q, v in zip(quantiles, quantile_values[:, i], strict=True)},
+        }
+        for i in np.argsort(-mean_abs, kind="stable")
+    }
+    return {"n_rows": int(shap_values.shape[0]), "features": features}
+
+
+def save_shap_values(shap_values: np.ndarray, feature_names: list[str], directory: str) -> tuple[str, str]:
+    """Save shap values as an uncompressed float32 NumPy file, along with their summary and feature names.
+
+    Values are stored column by column (Fortran order), so the values of a feature are contiguous in the file and
+    can be memory-mapped without reading the other features.
+
+    Args:
+        shap_values (np.ndarray): The shap values, one column per feature.
+        feature_names (list[str]): The names of the features.
+        directory (str): The directory to write the files to.
+
+    Returns:
+        tuple: A tuple containing the paths of the shap values file and of the summary file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    values_path = os.path.join(directory, SHAP_VALUES_FILE)
+    summary_path = os.path.join(directory, SHAP_SUMMARY_FILE)
+    shap_values = np.asfortranarray(shap_values, dtype=np.float32)
+    np.save(values_path, shap_values, allow_pickle=False)
+    summary = summarize_shap_values(shap_values, feature_names)
+    with open(summary_path, "w") as f:
+        json.dump({**summary, "feature_names": [str(name) for name in feature_names]}, f)
+    return values_path, summary_path
+
+
+def load_shap_values(path: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """Load shap values saved with `save_shap_values`, memory-mapping the file and reading only the given columns.
+
+    Without `columns`, the returned frame is a read-only view of the memory-mapped file, pages being read from disk
+    as they are accessed. With `columns`, only the values of these features are read.
+
+    Args:
+        path (str): The path of the shap values file, or of the directory containing it.
+        columns (list[str] | None): The features to load, defaults to all of them.
+
+    Returns:
+        pd.DataFrame: The float32 shap values, one column per feature.
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, SHAP_VALUES_FILE)
+    feature_names = load_shap_summary(os.path.dirname(path))["feature_names"]
+    shap_values = np.load(path, mmap_mode="r", allow_pickle=False)
+    if columns is None:
+        return pd.DataFrame(shap_values, columns=feature_names, copy=False)
+    positions = {name: i for i, name in enumerate(feature_names)}
+    return pd.DataFrame(shap_values[:, [positions[name] for name in columns]], columns=columns)
+
+
+def load_shap_summary(path: str) -> dict:
+    """Load the shap summary saved with `save_shap_values`, from its path or the directory containing it."""
+    if os.path.isdir(path):
+        path = os.path.join(path, SHAP_SUMMARY_FILE)
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,46 @@
+import time
+
+import mlflow
+from lightgbm.callback import CallbackEnv
+from mlflow.entities import Metric
+
+MAX_METRICS_PER_BATCH = 1000
+
+
+class MlflowMetricsLogger:
+    """LightGBM callback buffering the evaluation metrics of every iteration and logging them to MLflow in batches.
+
+    Metrics are logged as `<dataset>_<metric>` with the iteration as step, one request per `batch_size` iterations,
+    split in requests of at most `MAX_METRICS_PER_BATCH` metrics, the limit of the MLflow API. Call `flush` once
+    training is done to log the remaining iterations.
+    """
+
+    order = 20
+
+    def __init__(self, run_id: str, batch_size: int = 100) -> None:
+        """Initialize the logger.
+
+        Args:
+            run_id (str): The MLflow run to log to.
+            batch_size (int): The number of iterations buffered before logging them.
+        """
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self._client = mlflow.MlflowClient()
+        self._buffer = []
+        self._n_buffered_iterations = 0
+
+    def __call__(self, env: CallbackEnv) -> None:  # noqa: D102
+        timestamp = int(time.time() * 1000)
+        for data_name, eval_name, value, *_ in env.evaluation_result_list:
+            self._buffer.append(Metric(f"{data_name}_{eval_name}", float(value), timestamp, env.iteration))
+        self._n_buffered_iterations += 1
+        if self._n_buffered_iterations >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Log the buffered metrics."""
+        for start in range(0, len(self._buffer), MAX_METRICS_PER_BATCH):
+            self._client.log_batch(self.run_id, metrics=self._buffer[start : start + MAX_METRICS_PER_BATCH])
+        self._buffer = []
+        self._n_buffered_iterations = 0
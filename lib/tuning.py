@@ -0,0 +1,161 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import repeat
+
+import lightgbm as lgb
+from loguru import logger
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+from lib.dataset_cache import BINNING_PARAMS
+from lib.feature_store import FeatureStore
+
+SEARCH_STRATEGIES = ("random", "grid")
+# LightGBM aliases of the number of boosting rounds, which successive halving allocates as the budget of each rung.
+ITERATION_PARAMS = (
+    "num_iterations",
+    "num_iteration",
+    "n_iter",
+    "num_tree",
+    "num_trees",
+    "num_round",
+    "num_rounds",
+    "nrounds",
+    "num_boost_round",
+    "n_estimators",
+    "max_iter",
+)
+
+
+@dataclass
+class Trial:
+    """A candidate configuration of a search and its validation scores."""
+
+    params: dict
+    scores: dict[int, float] = field(default_factory=dict)
+    durations: dict[int, float] = field(default_factory=dict)
+    pruned_at: int | None = None
+
+
+def sample_candidates(search_space: dict, strategy: str, n_candidates: int, random_state: int = 0) -> list[dict]:
+    """Sample candidate configurations from a search space.
+
+    Args:
+        search_space (dict): The values, or scipy distributions in "random" strategy, of each parameter.
+        strategy (str): One of "grid" (every combination) or "random" (`n_candidates` random combinations).
+        n_candidates (int): The number of candidates sampled in "random" strategy.
+        random_state (int): Seed of the sampling.
+
+    Returns:
+        list[dict]: The candidate configurations.
+
+    Raises:
+        ValueError: If the strategy is unknown, or the search space sets the number of boosting rounds.
+    """
+    if strategy not in SEARCH_STRATEGIES:
+        raise ValueError(f"Unknown search strategy '{strategy}', expected one of {SEARCH_STRATEGIES}")
+    iteration_params = [name for name in search_space if name in ITERATION_PARAMS]
+    if iteration_params:
+        raise ValueError(f"Boosting rounds are set by the halving budgets, remove {iteration_params} from the space")
+    if strategy == "grid":
+        return list(ParameterGrid(search_space))
+    return list(ParameterSampler(search_space, n_candidates, random_state=random_state))
+
+
+def halving_budgets(min_resource: int, max_resource: int, reduction_factor: int = 3) -> list[int]:
+    """Return the increasing numbers of boosting rounds of the rungs of successive halving."""
+    budgets = []
+    budget = min_resource
+    while budget < max_resource:
+        budgets.append(budget)
+        budget *= reduction_factor
+    return [*budgets, max_resource]
+
+
+_worker_data = None
+
+
+def binning_key(params: dict) -> tuple:
+    """Return the values of the parameters of a configuration affecting how LightGBM bins the data."""
+    return tuple((name, params[name]) for name in BINNING_PARAMS if name in params)
+
+
+def _init_search_worker(feature_store: FeatureStore, base_params: dict) -> None:
+    global _worker_data
+    _worker_data = (feature_store, feature_store.load("x_valid"), feature_store.load("y_valid"), base_params, {})
+
+
+def _binned_train_set(params: dict) -> lgb.Dataset:
+    feature_store, _, _, _, train_sets = _worker_data
+    key = binning_key(params)
+    if key not in train_sets:
+        x_train = feature_store.load("x_train")
+        train_set = lgb.Dataset(x_train, label=feature_store.load("y_train"), params=params, free_raw_data=False)
+        train_sets[key] = train_set.construct()
+    return train_sets[key]
+
+
+def _evaluate_candidate(params: dict, budget: int) -> tuple[float, float]:
+    _, x_valid, y_valid, base_params, _ = _worker_data
+    params = {**base_params, **params}
+    train_set = _binned_train_set(params)
+    start = time.perf_counter()
+    booster = lgb.train(params, train_set, num_boost_round=budget)
+    score = roc_auc_score(y_valid, booster.predict(x_valid))
+    return float(score), time.perf_counter() - start
+
+
+def successive_halving(
+    candidates: list[dict],
+    feature_store: FeatureStore,
+    base_params: dict,
+    min_resource: int,
+    max_resource: int,
+    reduction_factor: int = 3,
+    n_workers: int | None = None,
+) -> list[Trial]:
+    """Evaluate candidate LightGBM configurations with successive halving on preprocessed data.
+
+    Candidates are trained with an increasing number of boosting rounds, only the best `1 / reduction_factor` of
+    them by validation ROC AUC being kept from one rung to the next. Each worker process attaches to the feature
+    store and bins the training data once per distinct value of the binning parameters of the candidates (see
+    `binning_key`), and evaluates candidates of a rung concurrently with the others.
+
+    Args:
+        candidates (list[dict]): The candidate configurations of booster parameters.
+        feature_store (FeatureStore): The store of the preprocessed "x_train", "y_train", "x_valid" and "y_valid".
+        base_params (dict): The LightGBM parameters shared by every candidate, including binning parameters.
+        min_resource (int): The number of boosting rounds of the first rung.
+        max_resource (int): The number of boosting rounds of the last rung.
+        reduction_factor (int): The factor by which candidates are reduced, and rounds increased, at each rung.
+        n_workers (int | None): The number of worker processes, defaults to the number of CPUs.
+
+    Returns:
+        list[Trial]: The trials of every candidate, in the order of the candidates.
+    """
+    trials = [Trial(params) for params in candidates]
+    budgets = halving_budgets(min_resource, max_resource, reduction_factor)
+    initargs = (feature_store, base_params)
+    with ProcessPoolExecutor(n_workers or os.cpu_count(), initializer=_init_search_worker, initargs=initargs) as ex:
+        alive = trials
+        for budget in budgets:
+            results = ex.map(_evaluate_candidate, [trial.params for trial in alive], repeat(budget))
+            for trial, (score, duration) in zip(alive, results, strict=True):
+                trial.scores[budget] = score
+                trial.durations[budget] = duration
+            ranked = sorted(alive, key=lambda trial: trial.scores[budget], reverse=True)
+            logger.info(f"Rung of {budget} rounds: best ROC AUC {ranked[0].scores[budget]:.4f} of {len(alive)}.")
+            if budget == budgets[-1]:
+                break
+            alive = ranked[: max(1, len(alive) // reduction_factor)]
+            for trial in ranked[len(alive) :]:
+                trial.pruned_at = budget
+    return trials
+
+
+def best_trial(trials: list[Trial]) -> Trial:
+    """Return the trial with the best score among those reaching the last rung."""
+    finalists = [trial for trial in trials if trial.pruned_at is None]
+    return max(finalists, key=lambda trial: trial.scores[max(trial.scores)])